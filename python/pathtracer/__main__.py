@@ -6,10 +6,19 @@ To be called with `python -m pathtracer` from inside the dir `python/`.
 import argparse
 from datetime import timedelta
 import enum
+from multiprocessing import AuthenticationError
 import sys
 import time
 
+from . import adaptive
+from . import animation
+from . import bench
+from . import distributed
+from . import output
+from . import packet
 from . import render
+from . import sampler
+from . import scene
 
 
 class EnumAction(argparse.Action):
@@ -54,18 +63,44 @@ class EnumAction(argparse.Action):
         setattr(namespace, self.dest, value)
 
 
+def positive_int(text) -> int:
+    """Argparse type of the sizes and counts which can't be below 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 at least, got {value}")
+    return value
+
+
 def main():
     """Entry point."""
     parser = argparse.ArgumentParser(prog="pathtracer")
     parser.add_argument(
         "mode",
         nargs="?",
-        choices=("hello-world", "image"),
+        choices=("hello-world", "image", "bench", "worker"),
         default="image",
-        help="Render mode. Defaults to `image` i.e. render a scene."
+        help=(
+            "Render mode. Defaults to `image` i.e. render a scene, `bench` runs "
+            "the benchmarks, `worker` renders tiles for an `image --serve` "
+            "coordinator."
+        ),
     )
     parser.add_argument(
-        "-p", "--path", help="Path to save image to. Defaults to `./image.ppm`"
+        "-p",
+        "--path",
+        help="Path to save image to. Defaults to `./image.<format extension>`",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        type=output.FORMAT,
+        action=EnumAction,
+        default=output.FORMAT.PPM,
+        dest="image_format",
+        help=(
+            "Image file format. Defaults to `ppm` (binary), `png` or "
+            "`pfm` (linear float HDR values)."
+        ),
     )
     parser.add_argument(
         "-d",
@@ -105,11 +140,299 @@ def main():
             "(if we want reproducible results)."
         )
     )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        type=render.ENGINE,
+        action=EnumAction,
+        default=render.ENGINE.SCALAR,
+        help=(
+            "Which render engine to use. Defaults to `scalar`, "
+            "`numpy` traces batches of rays at once (requires numpy)."
+        ),
+    )
+    parser.add_argument(
+        "-a",
+        "--accelerator",
+        type=scene.ACCELERATOR,
+        action=EnumAction,
+        default=scene.ACCELERATOR.LINEAR,
+        help=(
+            "Acceleration structure to wrap the scene objects in. "
+            "Defaults to `linear`, `bvh` scales to scenes with many objects, "
+            "`grid` to many evenly spread objects of similar sizes."
+        ),
+    )
+    parser.add_argument(
+        "-x",
+        "--extent",
+        type=int,
+        default=11,
+        help=(
+            "Half size of the random scene grid of small spheres, "
+            "the scene holds roughly `(2 * extent) ** 2` spheres. Defaults to 11."
+        ),
+    )
+    parser.add_argument(
+        "--ground",
+        type=scene.GROUND,
+        action=EnumAction,
+        default=scene.GROUND.SPHERE,
+        help=(
+            "Ground of the built-in scenes. Defaults to `sphere`, "
+            "`plane` is faster to intersect (not with the numpy engine)."
+        ),
+    )
+    parser.add_argument(
+        "--lighting",
+        type=scene.LIGHTING,
+        action=EnumAction,
+        default=scene.LIGHTING.SKY,
+        help=(
+            "Lighting of the built-in scenes. Defaults to `sky`, `lamps` lights "
+            "them with small lamps only (not with the numpy engine)."
+        ),
+    )
+    parser.add_argument(
+        "--no-light-sampling",
+        dest="light_sampling",
+        action="store_false",
+        default=True,
+        help=(
+            "Don't sample the lights explicitly at every diffuse hit, they are "
+            "then only found by the bounces, with much more noise."
+        ),
+    )
+    parser.add_argument(
+        "-t",
+        "--tile-size",
+        type=positive_int,
+        default=render._TILE_SIZE,
+        help=f"Width and height of the render tiles. Defaults to {render._TILE_SIZE}.",
+    )
+    parser.add_argument(
+        "--tile-timings",
+        dest="timings_path",
+        help="Path to save the render time of every tile to, as csv.",
+    )
+    parser.add_argument(
+        "-s",
+        "--sample-seed",
+        type=int,
+        default=0,
+        help=(
+            "Seed of the random numbers used to render the image, the same seed "
+            "always renders the same image. Defaults to 0."
+        ),
+    )
+    parser.add_argument(
+        "--sampler",
+        type=sampler.SAMPLER,
+        action=EnumAction,
+        default=sampler.SAMPLER.INDEPENDENT,
+        help=(
+            "How the samples of every pixel are placed. Defaults to "
+            "`independent`, `stratified` and `sobol` converge with fewer samples "
+            "(not with the numpy engine)."
+        ),
+    )
+    parser.add_argument(
+        "--progressive",
+        action="store_true",
+        default=False,
+        help=(
+            "Render in passes over the whole image, writing a preview after each "
+            "pass and checkpointing the samples rendered so far."
+        ),
+    )
+    parser.add_argument(
+        "--pass-samples",
+        type=positive_int,
+        default=1,
+        help="Samples per pixel of each progressive pass. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        dest="checkpoint_path",
+        help="Progressive render checkpoint path. Defaults to `<path>.checkpoint`.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=False,
+        help=(
+            "Resume the progressive render saved in the checkpoint, with the "
+            "scene and sampling settings it was started with."
+        ),
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        default=False,
+        dest="adaptive_sampling",
+        help=(
+            "Spend the samples on the noisiest pixels, saves the map of samples "
+            "per pixel as `<path>.samples.pfm`."
+        ),
+    )
+    parser.add_argument(
+        "--noise-threshold",
+        type=float,
+        default=adaptive.NOISE_THRESHOLD,
+        help=(
+            "Noise under which a pixel gets no more samples with `--adaptive`. "
+            f"Defaults to {adaptive.NOISE_THRESHOLD}."
+        ),
+    )
+    parser.add_argument(
+        "--roulette-depth",
+        type=int,
+        default=render.ROULETTE_DEPTH,
+        help=(
+            "Bounces after which paths are randomly terminated as they darken "
+            f"(Russian roulette). Defaults to {render.ROULETTE_DEPTH}."
+        ),
+    )
+    parser.add_argument(
+        "--no-roulette",
+        action="store_const",
+        const=None,
+        dest="roulette_depth",
+        help="Follow every path up to the max depth, no Russian roulette.",
+    )
+    parser.add_argument(
+        "--packet-size",
+        type=int,
+        default=packet.PACKET_SIZE,
+        help=(
+            "Width and height in pixels of the packets of camera rays culled "
+            "together by the scalar engine, 0 traces single rays. Defaults to "
+            f"{packet.PACKET_SIZE}."
+        ),
+    )
+    parser.add_argument(
+        "--scene",
+        dest="scene_path",
+        help="Render a json or binary scene file instead of the built-in scenes.",
+    )
+    parser.add_argument(
+        "--save-scene",
+        dest="save_scene_path",
+        help=(
+            "Save the scene to a scene file instead of rendering it, as json if "
+            "the path ends with `.json`, binary otherwise."
+        ),
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        default=False,
+        help=(
+            "Count the rays, intersection tests and scattering of the render, "
+            "prints a summary and saves it as `<path>.stats.json`."
+        ),
+    )
+    parser.add_argument(
+        "--serve",
+        type=distributed.parse_address,
+        metavar="HOST:PORT",
+        help=(
+            "Render the tiles with remote workers connecting to this address "
+            "(`python -m pathtracer worker --connect HOST:PORT`) instead of "
+            "local processes. HOST defaults to localhost, `0.0.0.0` listens on "
+            "every interface."
+        ),
+    )
+    parser.add_argument(
+        "--connect",
+        type=distributed.parse_address,
+        metavar="HOST:PORT",
+        help="Address of the coordinator to render tiles for in `worker` mode.",
+    )
+    parser.add_argument(
+        "--auth-key",
+        help=(
+            "Key authenticating the workers to the coordinator, to be the same "
+            "for both. Required by workers, a coordinator without one makes a "
+            "random key and prints it."
+        ),
+    )
+    parser.add_argument(
+        "--frames",
+        type=animation.parse_frames,
+        metavar="[START:]END",
+        help=(
+            "Render the frames START (0 by default) to END - 1 of an animation, "
+            "saved as `<path stem>_<frame number>.<extension>`."
+        ),
+    )
+    parser.add_argument(
+        "--keyframes",
+        dest="keyframes_path",
+        help=(
+            "Json file of the camera keyframes of `--frames`, see "
+            "`pathtracer/animation.py`. By default the camera makes a full turn "
+            "around the scene over the frames 0 to END - 1."
+        ),
+    )
+    parser.add_argument(
+        "--suite",
+        type=bench.SUITE,
+        action=EnumAction,
+        default=bench.SUITE.ALL,
+        help=(
+            "Benchmarks to run in `bench` mode: `all` (default), `micro`, `macro` "
+            "or `convergence` (image error of the samplers and of the light "
+            "sampling)."
+        ),
+    )
+    parser.add_argument(
+        "--bench-output",
+        dest="bench_path",
+        help="Json file to save the `bench` mode results to.",
+    )
+    parser.add_argument(
+        "--baseline",
+        dest="baseline_path",
+        help=(
+            "Json results of a previous `bench` run to compare to, exits with an "
+            "error if any benchmark got slower than `--threshold`."
+        ),
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=bench.THRESHOLD,
+        help=(
+            "Relative slow down of a benchmark making a regression. Defaults to "
+            f"{bench.THRESHOLD}."
+        ),
+    )
     args = parser.parse_args()
 
+    if args.mode == "bench":
+        return bench.main(
+            suite=args.suite,
+            path=args.bench_path,
+            baseline_path=args.baseline_path,
+            threshold=args.threshold,
+        )
+
+    if args.mode == "worker":
+        if args.connect is None:
+            parser.error("worker mode requires --connect HOST:PORT")
+        if args.auth_key is None:
+            parser.error("worker mode requires the --auth-key of the coordinator")
+        try:
+            distributed.worker(args.connect, authkey=args.auth_key.encode())
+        except AuthenticationError:
+            print("The coordinator rejected the --auth-key", file=sys.stderr)
+            return 1
+        return 0
+
     start_time = time.time()
     if args.mode == "hello-world":
-        render.hello_world(path=args.path)
+        render.hello_world(path=args.path, image_format=args.image_format)
     elif args.mode == "image":
         render.image(
             path=args.path,
@@ -117,6 +440,32 @@ def main():
             greyshaded=args.grey,
             randomize=not args.manual_scene,
             seed=args.random_seed,
+            engine=args.engine,
+            accelerator=args.accelerator,
+            extent=args.extent,
+            tile_size=args.tile_size,
+            timings_path=args.timings_path,
+            image_format=args.image_format,
+            sample_seed=args.sample_seed,
+            progressive=args.progressive,
+            resume=args.resume,
+            checkpoint_path=args.checkpoint_path,
+            pass_samples=args.pass_samples,
+            adaptive_sampling=args.adaptive_sampling,
+            noise_threshold=args.noise_threshold,
+            roulette_depth=args.roulette_depth,
+            stats=args.stats,
+            scene_path=args.scene_path,
+            save_scene_path=args.save_scene_path,
+            serve=args.serve,
+            authkey=args.auth_key and args.auth_key.encode(),
+            frames=args.frames,
+            keyframes_path=args.keyframes_path,
+            packet_size=args.packet_size,
+            ground=args.ground,
+            sampler=args.sampler,
+            lighting=args.lighting,
+            light_sampling=args.light_sampling,
         )
     else:
         render.main()
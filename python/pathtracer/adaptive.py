@@ -0,0 +1,119 @@
+"""Adaptive sampling.
+
+Instead of spending exactly `samples` rays on every pixel, each tile gets a
+budget of `samples` rays per pixel on average. Every pixel first gets a few
+samples, then the running mean and variance of its luminance tell how noisy it
+still is: converged pixels (e.g. the sky) stop there and the rest of the budget
+goes, in rounds, to the noisiest pixels (e.g. the glass spheres), up to
+`MAX_SAMPLES_FACTOR` times the fixed sample count.
+
+The noise is the standard error of the mean luminance, measured after the
+gamma 2.0 correction of :mod:`pathtracer.output` (i.e. `d sqrt(L) = dL / 2
+sqrt(L)`), so the threshold is in the same units as the final image values.
+"""
+
+import heapq
+
+LUMINANCE = (0.2126, 0.7152, 0.0722)
+"""tuple: Rec. 709 weights of the RGB channels in the luminance."""
+
+MAX_SAMPLES_FACTOR = 4
+"""int: max samples of a pixel, as a multiple of the fixed sample count."""
+
+NOISE_THRESHOLD = 0.01
+"""float: default noise under which a pixel is converged, about 2.5/255."""
+
+_EPSILON = 1e-3
+
+
+def min_samples(samples: int) -> int:
+    """Samples every pixel gets before its noise is measured.
+
+    Half the budget, 4 at least: variance estimates out of fewer samples are
+    too unreliable, many noisy pixels would pass for converged. Always less
+    than the budget though, so some is left to spend on the noisy pixels. A
+    budget under 3 samples is too small to measure any variance and still
+    have samples left: it is all spent uniformly.
+    """
+    if samples < 3:
+        return samples
+    return min(samples - 1, max(4, samples // 2))
+
+
+def batch_samples(samples: int) -> int:
+    """Samples added to a noisy pixel per round."""
+    return max(1, samples // 8)
+
+
+def noise(count, lum_sum, lum_sq):
+    """Noise of pixels given their sample count, luminance sum and squared sum.
+
+    Works with floats as well as NumPy arrays of pixels.
+    """
+    mean = lum_sum / count
+    variance = abs(lum_sq - lum_sum * mean) / (count - 1)
+    return (variance / count) ** 0.5 / (2 * mean**0.5 + _EPSILON)
+
+
+def render_pixels(pixel_count, samples, sample_pixel, threshold=NOISE_THRESHOLD):
+    """Adaptively sample a block of pixels.
+
+    Args:
+        pixel_count (int): Number of pixels in the block.
+        samples (int): Average samples per pixel budget.
+        sample_pixel (callable): `sample_pixel(pixel, sample)` renders the
+            given sample of the given pixel (index in the block), returns its
+            `(r, g, b)` color.
+        threshold (float): Noise under which a pixel is converged.
+
+    Returns:
+        tuple: `(colors, counts)`, the summed `[r, g, b]` color and the number
+            of samples of every pixel.
+
+    """
+    colors = [[0.0, 0.0, 0.0] for _ in range(pixel_count)]
+    counts = [0] * pixel_count
+    lum_sums = [0.0] * pixel_count
+    lum_sqs = [0.0] * pixel_count
+    weight_r, weight_g, weight_b = LUMINANCE
+
+    def add_samples(pixel, count):
+        color = colors[pixel]
+        start = counts[pixel]
+        for sample in range(start, start + count):
+            r, g, b = sample_pixel(pixel, sample)
+            color[0] += r
+            color[1] += g
+            color[2] += b
+            luminance = weight_r * r + weight_g * g + weight_b * b
+            lum_sums[pixel] += luminance
+            lum_sqs[pixel] += luminance * luminance
+        counts[pixel] = start + count
+
+    pilot = min_samples(samples)
+    batch = batch_samples(samples)
+    budget = samples * pixel_count
+    max_samples = MAX_SAMPLES_FACTOR * samples
+
+    for pixel in range(pixel_count):
+        add_samples(pixel, pilot)
+    spent = pilot * pixel_count
+
+    while spent + batch <= budget:
+        # Noisiest pixels first, each round gives them one more batch.
+        noisy = []
+        for pixel in range(pixel_count):
+            if counts[pixel] + batch > max_samples:
+                continue
+            error = noise(counts[pixel], lum_sums[pixel], lum_sqs[pixel])
+            if error > threshold:
+                noisy.append((-error, pixel))
+        if not noisy:
+            break
+        heapq.heapify(noisy)
+        while noisy and spent + batch <= budget:
+            _, pixel = heapq.heappop(noisy)
+            add_samples(pixel, batch)
+            spent += batch
+
+    return colors, counts
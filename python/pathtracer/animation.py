@@ -0,0 +1,150 @@
+"""Camera animation.
+
+The camera is keyframed: a keyframe sets any of the `lookfrom`, `lookat`,
+`vfov` and `focus_dist` camera parameters at a frame, the frames in between
+are linearly interpolated and the frames before the first (after the last)
+keyframe hold it. Parameters a keyframe leaves out take the value of the
+scene camera. Keyframes are read from a json file:
+
+    [
+      {"frame": 0, "lookfrom": [13, 2, 3], "vfov": 20},
+      {"frame": 47, "lookfrom": [6, 1, 1.5], "vfov": 30, "focus_dist": 5}
+    ]
+
+Without keyframes the camera turns around its `lookat` point (turntable).
+"""
+
+from collections import namedtuple
+import json
+import math
+import os
+
+from .camera import Camera
+from .vec3 import Point3
+
+
+Keyframe = namedtuple("Keyframe", ["frame", "lookfrom", "lookat", "vfov", "focus_dist"])
+"""tuple: camera parameters at a frame.
+
+- frame (int): Frame number.
+- lookfrom (Point3): Camera position.
+- lookat (Point3): Point looked at.
+- vfov (float): Vertical field of view in degrees.
+- focus_dist (float): Focus distance.
+
+"""
+
+
+def parse_frames(text) -> range:
+    """Parse a frame range, `N` for the frames 0 to N-1 or `START:END`.
+
+    Raises:
+        ValueError: For negative frames and ranges without any frame.
+
+    """
+    start, _, end = text.rpartition(":")
+    frames = range(int(start or 0), int(end))
+    if frames.start < 0 or not frames:
+        raise ValueError(f"No frames or negative frames in {text!r}")
+    return frames
+
+
+def frame_path(path, frame) -> str:
+    """Numbered path of a frame, e.g. `image_0012.ppm`."""
+    root, extension = os.path.splitext(path)
+    return f"{root}_{frame:04d}{extension}"
+
+
+def load_keyframes(path, camera: Camera) -> list:
+    """Load keyframes from a json file, completed with the `camera` parameters."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    keyframes = []
+    for item in data:
+        keyframes.append(
+            Keyframe(
+                item["frame"],
+                Point3(*item["lookfrom"]) if "lookfrom" in item else camera.lookfrom,
+                Point3(*item["lookat"]) if "lookat" in item else camera.lookat,
+                item.get("vfov", camera.vfov),
+                item.get("focus_dist", camera.focus_dist),
+            )
+        )
+    if not keyframes:
+        raise ValueError(f"No keyframes in {path}")
+    return sorted(keyframes, key=lambda keyframe: keyframe.frame)
+
+
+def turntable(camera: Camera, frames: int) -> list:
+    """Keyframes of a full turn of the camera around its `lookat` over `frames`.
+
+    The camera turns around the `vup` axis, keeping its distance and height.
+    """
+    axis = camera.vup.unit_vector()
+    offset = camera.lookfrom - camera.lookat
+    along = offset.dot(axis) * axis
+    radial = offset - along
+    side = axis.cross(radial)
+    keyframes = []
+    for frame in range(frames):
+        angle = 2 * math.pi * frame / frames
+        lookfrom = (
+            camera.lookat + along + math.cos(angle) * radial + math.sin(angle) * side
+        )
+        keyframes.append(
+            Keyframe(frame, lookfrom, camera.lookat, camera.vfov, camera.focus_dist)
+        )
+    return keyframes
+
+
+def interpolate(keyframes, frame) -> Keyframe:
+    """Camera parameters at a frame, see the module doc."""
+    if frame <= keyframes[0].frame:
+        return keyframes[0]._replace(frame=frame)
+    for before, after in zip(keyframes, keyframes[1:]):
+        if frame <= after.frame:
+            t = (frame - before.frame) / (after.frame - before.frame)
+            return Keyframe(
+                frame,
+                before.lookfrom + t * (after.lookfrom - before.lookfrom),
+                before.lookat + t * (after.lookat - before.lookat),
+                before.vfov + t * (after.vfov - before.vfov),
+                before.focus_dist + t * (after.focus_dist - before.focus_dist),
+            )
+    return keyframes[-1]._replace(frame=frame)
+
+
+def cameras(camera: Camera, frames, keyframes=None) -> list:
+    """Camera of every frame.
+
+    Args:
+        camera (Camera): Scene camera, sets the parameters not animated.
+        frames (range): Frame numbers to render.
+        keyframes (list): :class:`Keyframe`, a turntable over the frames 0 to
+            `frames.stop` if None.
+
+    Returns:
+        list: `(frame, camera)` tuples.
+
+    """
+    if keyframes is None:
+        keyframes = turntable(camera, frames.stop)
+    result = []
+    for frame in frames:
+        keyframe = interpolate(keyframes, frame)
+        result.append(
+            (
+                frame,
+                Camera(
+                    lookfrom=keyframe.lookfrom,
+                    lookat=keyframe.lookat,
+                    vup=camera.vup,
+                    vfov=keyframe.vfov,
+                    aspect_ratio=camera.aspect_ratio,
+                    aperture=camera.aperture,
+                    focus_dist=keyframe.focus_dist,
+                ),
+            )
+        )
+    return result
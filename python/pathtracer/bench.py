@@ -0,0 +1,479 @@
+"""Benchmarks and performance regression checks.
+
+To be called with `python -m pathtracer bench` (or `python -m pathtracer.bench`)
+from inside the dir `python/`.
+
+- Micro benchmarks time the hot paths (vector arithmetic, hits, scattering,
+  camera rays) one call at a time, in nanoseconds per call.
+- Macro benchmarks render the manual and the random scenes at a few
+  resolutions, sample and process counts, in camera rays (i.e. path samples)
+  per second.
+- The convergence benchmark renders the manual scene with every sampler at
+  increasing samples per pixel, in RMS error against a reference render, and
+  how many samples the samplers need to match the error of independent
+  sampling. Likewise a small random scene lit by lamps, with and without
+  sampling the lamps explicitly.
+
+Everything is built from fixed seeds so successive runs do the same work. The
+results can be saved as json and compared against a previous (baseline) run,
+any benchmark slower than the baseline by more than a threshold is a
+regression.
+"""
+
+from array import array
+from collections import namedtuple
+import contextlib
+import enum
+import io
+import json
+import math
+import multiprocessing
+import platform
+import random
+import sys
+import time
+import timeit
+
+from .camera import Camera
+from .hittable import Instance, Sphere, Transform, TriangleMesh
+from . import material
+from . import packet
+from .ray import Ray
+from . import render
+from .rng import SampleRng
+from .sampler import SAMPLER
+from .scene import ACCELERATOR, LIGHTING, construct_scene
+from .vec3 import Color, Point3, Vec3, reflect, refract
+from . import wavefront
+
+
+SUITE = enum.Enum("SUITE", ["ALL", "MICRO", "MACRO", "CONVERGENCE"])
+"""enum: benchmarks to run.
+
+- ALL: micro and macro benchmarks.
+- MICRO: hot path functions, in nanoseconds per call.
+- MACRO: whole renders, in camera rays per second.
+- CONVERGENCE: image error of the samplers and of the light sampling, in RMS
+  error per samples per pixel.
+
+"""
+
+THRESHOLD = 0.1
+"""float: default slow down, relative to the baseline, making a regression."""
+
+CONVERGENCE_SAMPLES = (1, 2, 4, 8, 16, 32)
+"""tuple: samples per pixel of the convergence benchmark renders."""
+
+_REFERENCE_SAMPLES = 512
+
+_MacroCase = namedtuple(
+    "_MacroCase", ["scene", "resx", "samples", "processes", "engine"]
+)
+"""tuple: settings of a macro benchmark render.
+
+- scene (str): `manual` or `random` scene.
+- resx (int): Image width in pixels, the height follows the scene aspect ratio.
+- samples (int): AA samples.
+- processes (int): Number of worker processes.
+- engine (render.ENGINE): Render engine.
+
+"""
+
+
+def _vec3_benchmarks():
+    """Benchmarks of the vector arithmetic and its main callers."""
+    random.seed(0)
+    a = Vec3(0.3, -1.2, 2.5)
+    b = Vec3(-0.7, 0.4, 1.1)
+    n = Vec3(0.0, 1.0, 0.0)
+    unit = Vec3(0.6, -0.8, 0.0)
+
+    sphere = Sphere(Point3(0.0, 0.0, -1.0), 0.5)
+    ray_hit = Ray(Point3(0.0, 0.0, 0.0), Vec3(0.0, 0.0, -1.0))
+    ray_miss = Ray(Point3(0.0, 0.0, 0.0), Vec3(0.0, 1.0, 0.0))
+
+    camera = Camera(
+        lookfrom=Point3(13, 2, 3),
+        lookat=Point3(0, 0, 0),
+        vup=Vec3(0, 1, 0),
+        vfov=20.0,
+        aspect_ratio=1.5,
+        aperture=0.1,
+        focus_dist=10.0,
+    )
+    rng = SampleRng(0, 0, 0)
+
+    return {
+        "vec3 add": lambda: a + b,
+        "vec3 sub": lambda: a - b,
+        "vec3 mul scalar": lambda: a * 2.0,
+        "vec3 rmul scalar": lambda: 2.0 * a,
+        "vec3 mul vec3": lambda: a * b,
+        "vec3 dot": lambda: a.dot(b),
+        "vec3 cross": lambda: a.cross(b),
+        "vec3 unit_vector": lambda: a.unit_vector(),
+        "reflect": lambda: reflect(unit, n),
+        "refract": lambda: refract(unit, n, 1.0 / 1.5),
+        "sphere hit": lambda: sphere.hit(ray_hit, 0.0001, math.inf),
+        "sphere miss": lambda: sphere.hit(ray_miss, 0.0001, math.inf),
+        "camera get_ray": lambda: camera.get_ray(0.5, 0.5, rng=rng),
+    }
+
+
+def _wavy_mesh(size) -> TriangleMesh:
+    """Mesh of `2 * size ** 2` triangles, a wavy square of side 2 around 0."""
+    vertices = array("d")
+    for j in range(size + 1):
+        for i in range(size + 1):
+            x, z = 2.0 * i / size - 1.0, 2.0 * j / size - 1.0
+            vertices.extend((x, 0.1 * math.sin(5.0 * x) * math.cos(5.0 * z), z))
+    indices = array("i")
+    for j in range(size):
+        for i in range(size):
+            corner = j * (size + 1) + i
+            above = corner + size + 1
+            indices.extend((corner, above + 1, corner + 1, corner, above, above + 1))
+    return TriangleMesh(vertices, indices)
+
+
+def _scene_benchmarks():
+    """Benchmarks of the hits against whole scenes and of the materials."""
+    ray = Ray(Point3(13, 2, 3), Vec3(-13, -2, -3))  # to the random scene center
+    manual = construct_scene()
+    random_linear = construct_scene(randomize=True, seed=0)
+    random_bvh = construct_scene(randomize=True, seed=0, accelerator=ACCELERATOR.BVH)
+    random_grid = construct_scene(randomize=True, seed=0, accelerator=ACCELERATOR.GRID)
+    mesh = _wavy_mesh(64)
+    instance = Instance(
+        mesh, Transform.translation(0.0, 0.5, 0.0) @ Transform.scaling(0.5)
+    )
+    ray_down = Ray(Point3(0.1, 1.0, 0.2), Vec3(0.2, -1.0, 0.1))
+
+    ray_in = Ray(Point3(0.0, 0.0, 0.0), Vec3(0.3, 0.1, -1.0))
+    sphere = Sphere(Point3(0.0, 0.0, -1.0), 0.5)
+    _, record = sphere.hit(ray_in, 0.0001, math.inf)
+    materials = {
+        "lambertian": material.Lambertian(Color(0.7, 0.3, 0.3)),
+        "metal": material.Metal(Color(0.8, 0.6, 0.2), fuzz=0.3),
+        "dielectric": material.Dielectric(1.5),
+    }
+    rng = SampleRng(0, 0, 0)
+
+    benchmarks = {
+        "hittable_list hit (manual scene)": lambda: manual.hit(
+            ray_in, 0.0001, math.inf
+        ),
+        "hittable_list hit (random scene)": lambda: random_linear.hit(
+            ray, 0.0001, math.inf
+        ),
+        "bvh hit (random scene)": lambda: random_bvh.hit(ray, 0.0001, math.inf),
+        "grid hit (random scene)": lambda: random_grid.hit(ray, 0.0001, math.inf),
+        "mesh hit (8192 triangles)": lambda: mesh.hit(ray_down, 0.0001, math.inf),
+        "instance hit (same mesh)": lambda: instance.hit(ray_down, 0.0001, math.inf),
+    }
+    for name, material_ in materials.items():
+        benchmarks[f"{name} scatter"] = (
+            lambda material_=material_: material_.scatter(ray_in, record, rng=rng)
+        )
+    return benchmarks
+
+
+def micro_benchmarks():
+    """All the micro benchmarks, by name."""
+    benchmarks = _vec3_benchmarks()
+    benchmarks.update(_scene_benchmarks())
+    return benchmarks
+
+
+def run(benchmarks, number=None, repeat=5):
+    """Time the benchmarks, returns the best time per call in nanoseconds.
+
+    By default each benchmark is called as many times as it takes to run for
+    at least 0.2s, see :meth:`timeit.Timer.autorange`.
+    """
+    results = {}
+    for name, function in benchmarks.items():
+        timer = timeit.Timer(function)
+        calls = number or timer.autorange()[0]
+        results[name] = 1e9 * min(timer.repeat(number=calls, repeat=repeat)) / calls
+    return results
+
+
+def macro_cases():
+    """Renders of the macro benchmarks.
+
+    The numpy engine is only benchmarked when numpy is installed, and the
+    process counts are 1 and all the CPUs.
+    """
+    engines = [render.ENGINE.SCALAR]
+    if wavefront.np is not None:
+        engines.append(render.ENGINE.NUMPY)
+    processes = sorted({1, multiprocessing.cpu_count()})
+    renders = [("manual", 40, 4), ("manual", 80, 4), ("manual", 40, 16)]
+    renders += [("random", 40, 4), ("random", 80, 4), ("random-grid", 40, 4)]
+    return [
+        _MacroCase(scene, resx, samples, count, engine)
+        for engine in engines
+        for count in processes
+        for scene, resx, samples in renders
+    ]
+
+
+def _case_name(case, resy):
+    return (
+        f"{case.scene} {case.resx}x{resy} {case.samples}spp "
+        f"{case.processes}p {case.engine.name.lower()}"
+    )
+
+
+def run_macro(cases, repeat=3):
+    """Render the macro benchmarks, returns the best camera rays per second."""
+    scenes = {
+        "manual": render._set_scene_image_settings(),
+        # The random scene is too slow to render without a BVH.
+        "random": render._random_scene_image_settings(
+            seed=0, accelerator=ACCELERATOR.BVH
+        ),
+        "random-grid": render._random_scene_image_settings(
+            seed=0, accelerator=ACCELERATOR.GRID
+        ),
+    }
+    results = {}
+    for case in cases:
+        settings = scenes[case.scene]
+        resy = int(case.resx * settings.resy / settings.resx)
+        seconds = math.inf
+        for _ in range(repeat):
+            random.seed(0)  # tile cost estimates
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):  # progress bars
+                render._image(
+                    processes=case.processes,
+                    resx=case.resx,
+                    resy=resy,
+                    camera=settings.camera,
+                    world=settings.world,
+                    samples=case.samples,
+                    max_depth=settings.max_depth,
+                    engine=case.engine,
+                    roulette_depth=render.ROULETTE_DEPTH,
+                    packet_size=packet.PACKET_SIZE,
+                )
+            seconds = min(seconds, time.perf_counter() - start)
+        results[_case_name(case, resy)] = case.resx * resy * case.samples / seconds
+    return results
+
+
+def _render(settings, resx, samples, sampler, sample_seed=0):
+    """Linear RGB framebuffer of a render of the scene settings."""
+    with contextlib.redirect_stdout(io.StringIO()):  # progress bars
+        return render._image(
+            resx=resx,
+            resy=int(resx * settings.resy / settings.resx),
+            camera=settings.camera,
+            world=settings.world,
+            samples=samples,
+            max_depth=settings.max_depth,
+            sample_seed=sample_seed,
+            sampler=sampler,
+            roulette_depth=render.ROULETTE_DEPTH,
+            packet_size=packet.PACKET_SIZE,
+            background=settings.background,
+            lights=settings.lights,
+        )
+
+
+def _rms_error(image, reference) -> float:
+    squares = sum((a - b) ** 2 for a, b in zip(image, reference))
+    return math.sqrt(squares / len(reference))
+
+
+def run_convergence(resx=40, sample_counts=CONVERGENCE_SAMPLES):
+    """Render the manual scene with every sampler, returns the RMS errors.
+
+    The error of every render is measured against a reference rendered with
+    many more Sobol samples (and another seed), the lowest error estimate.
+
+    Returns:
+        dict: RMS error of the linear RGB values of every sampler (by lower
+            case name) and samples per pixel (as a string, for json).
+
+    """
+    settings = render._set_scene_image_settings()
+    reference = _render(
+        settings, resx, _REFERENCE_SAMPLES, SAMPLER.SOBOL, sample_seed=1
+    )
+    results = {}
+    for sampler in SAMPLER:
+        errors = results[sampler.name.lower()] = {}
+        for samples in sample_counts:
+            image = _render(settings, resx, samples, sampler)
+            errors[str(samples)] = _rms_error(image, reference)
+    return results
+
+
+def run_light_sampling(resx=40, sample_counts=CONVERGENCE_SAMPLES):
+    """Render a small random scene lit by lamps, returns the RMS errors.
+
+    With the lamps sampled at every diffuse hit (`lights`) or only found by
+    the bounces (`bounces`), against a reference rendered with many more Sobol
+    samples, see :func:`run_convergence`.
+    """
+    settings = render._random_scene_image_settings(
+        seed=0, extent=4, lighting=LIGHTING.LAMPS
+    )
+    reference = _render(
+        settings, resx, _REFERENCE_SAMPLES, SAMPLER.SOBOL, sample_seed=1
+    )
+    results = {}
+    for name, lights in (("bounces", ()), ("lights", settings.lights)):
+        errors = results[name] = {}
+        for samples in sample_counts:
+            image = _render(
+                settings._replace(lights=lights), resx, samples, SAMPLER.INDEPENDENT
+            )
+            errors[str(samples)] = _rms_error(image, reference)
+    return results
+
+
+def equal_error_samples(errors, target):
+    """Samples per pixel at which the errors reach the target error.
+
+    Interpolated between the samples per pixel around the target, the error of
+    Monte Carlo sampling falling as a power law. None if the errors never go as
+    low as the target, 0 if they are lower from the first sample count on.
+    """
+    counts = sorted(errors, key=int)
+    if errors[counts[0]] <= target:
+        return 0
+    for low, high in zip(counts, counts[1:]):
+        if errors[high] <= target:
+            slope = math.log(errors[high] / errors[low])
+            slope /= math.log(int(high) / int(low))
+            return int(low) * (target / errors[low]) ** (1 / slope)
+    return None
+
+
+def _environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "cpus": multiprocessing.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """Compare results to a baseline, returns the names of the regressions.
+
+    Micro benchmarks regress when their time per call grows by more than the
+    threshold, macro benchmarks when their rays per second shrink by as much.
+    Prints the ratio current/baseline speed of every benchmark in both.
+    """
+    regressions = []
+    for suite in ("micro", "macro"):
+        common = [
+            name
+            for name in results.get(suite, {})
+            if name in baseline.get(suite, {})
+        ]
+        if not common:
+            continue
+        print(f"\n{suite} benchmarks vs baseline (speed ratio, > 1 is faster):")
+        width = max(len(name) for name in common)
+        for name in common:
+            current = results[suite][name]
+            previous = baseline[suite][name]
+            speed = previous / current if suite == "micro" else current / previous
+            regression = speed < 1 / (1 + threshold)
+            if regression:
+                regressions.append(name)
+            flag = "  REGRESSION" if regression else ""
+            print(f"  {name:<{width}}  {speed:6.2f}x{flag}")
+
+    if baseline.get("environment") != results.get("environment"):
+        print(
+            f"\nWarning: the baseline ran on {baseline.get('environment')}, "
+            "timings may not be comparable."
+        )
+    return regressions
+
+
+def _print_results(results):
+    for suite, unit in (("micro", "ns"), ("macro", "rays/s")):
+        if suite not in results:
+            continue
+        print(f"{suite} benchmarks:")
+        width = max(len(name) for name in results[suite])
+        for name, value in results[suite].items():
+            print(f"  {name:<{width}}  {value:12.1f} {unit}")
+    if "convergence" in results:
+        _print_convergence(
+            "convergence benchmark", results["convergence"], "independent"
+        )
+    if "light_sampling" in results:
+        _print_convergence(
+            "light sampling benchmark", results["light_sampling"], "bounces"
+        )
+
+
+def _print_convergence(title, results, baseline):
+    """Print the errors and the samples needed to match those of `baseline`."""
+    errors = results[baseline]
+    counts = list(errors)
+    width = max(len(name) for name in results)
+    print(f"{title} (RMS error):")
+    print(f"  {'spp':<{width}}" + "".join(f"{count:>9}" for count in counts))
+    for name, values in results.items():
+        print(f"  {name:<{width}}" + "".join(f"{values[c]:9.4f}" for c in counts))
+
+    target = errors[counts[-1]]
+    print(f"samples per pixel for the error of {counts[-1]} {baseline} spp:")
+    for name, values in results.items():
+        samples = equal_error_samples(values, target)
+        if samples is None:
+            print(f"  {name:<{width}}  more than {counts[-1]}")
+        else:
+            ratio = int(counts[-1]) / samples if samples else math.inf
+            print(f"  {name:<{width}}  {samples:9.1f}  ({ratio:0.1f}x fewer)")
+
+
+def main(suite=SUITE.ALL, path=None, baseline_path=None, threshold=THRESHOLD):
+    """Run the benchmarks, optionally save them and check for regressions.
+
+    Args:
+        suite (SUITE): Benchmarks to run.
+        path (str): Json file to save the results to.
+        baseline_path (str): Json file of previous results to compare to.
+        threshold (float): Relative slow down making a regression.
+
+    Returns:
+        int: Exit code, 1 if there are regressions.
+
+    """
+    results = {"environment": _environment()}
+    if suite in (SUITE.ALL, SUITE.MICRO):
+        results["micro"] = run(micro_benchmarks())
+    if suite in (SUITE.ALL, SUITE.MACRO):
+        results["macro"] = run_macro(macro_cases())
+    if suite == SUITE.CONVERGENCE:
+        results["convergence"] = run_convergence()
+        results["light_sampling"] = run_light_sampling()
+    _print_results(results)
+
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold=threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 """Camera."""
 
 import math
+import random
 
 from .ray import Ray
 from .vec3 import (
@@ -23,6 +24,11 @@ class Camera:
         aperture: float,
         focus_dist: float,
     ):
+        self.lookfrom = lookfrom
+        self.lookat = lookat
+        self.vup = vup
+        self.vfov = vfov
+
         theta = math.radians(vfov)
         h = math.tan(theta / 2)
         self.aspect_ratio = aspect_ratio
@@ -44,18 +50,13 @@ class Camera:
 
         self.lens_radius = aperture / 2
 
-    def get_ray(self, s: float, t: float) -> Ray:
+    def get_ray(self, s: float, t: float, rng=random) -> Ray:
         """Camera ray."""
-        rd = self.lens_radius * random_in_unit_disk()
-        offset = self.u * rd.x + self.v * rd.y
-
-        return Ray(
-            self.origin + offset,
-            (
-                self.lower_left_corner
-                + s * self.horizontal
-                + t * self.vertical
-                - self.origin
-                - offset
-            ),
+        rd = random_in_unit_disk(rng=rng)
+        origin = self.origin.mul_add(self.lens_radius * rd.x, self.u).mul_add(
+            self.lens_radius * rd.y, self.v
+        )
+        target = self.lower_left_corner.mul_add(s, self.horizontal).mul_add(
+            t, self.vertical
         )
+        return Ray(origin, target - origin)
@@ -0,0 +1,270 @@
+"""Distributed rendering over the network.
+
+A :class:`Coordinator` serves the tiles of a render to remote workers
+instead of a local pool of processes. Workers, started on any number of
+machines with `python -m pathtracer worker --connect host:port` (see
+:func:`worker`), connect to it at any time, receive the render settings
+(scene included) once, then render one tile after another and send back their
+pixels.
+
+The connections are :mod:`multiprocessing.connection` ones: pickled messages
+over TCP, authenticated with a shared key. Pickles can run arbitrary code, so
+the key is the only thing keeping others from running code on the machines:
+there is no default one, a coordinator started without a key makes a random
+one (see :func:`new_authkey`) for its workers. Coordinators listen on the
+local host unless another interface is given, e.g. `0.0.0.0` for all of them.
+Only use it on trusted networks.
+
+A tile whose worker is lost (crashed, killed, disconnected, or hung for
+longer than :data:`TILE_TIMEOUT`) goes back in the queue for another worker,
+the render carries on as long as some worker is left or joins.
+"""
+
+from array import array
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+import os
+import queue
+import secrets
+import socket
+import threading
+import time
+
+from . import raystats
+from . import wavefront
+
+
+TILE_TIMEOUT = 1800.0
+"""float: seconds a worker is given to render a tile before it is dropped."""
+
+_MAX_ATTEMPTS = 3  # renders of a tile before giving up on it
+_CONNECT_TIMEOUT = 30.0  # seconds a worker waits for the coordinator
+_POLL_SECONDS = 0.1
+
+
+def parse_address(text) -> tuple:
+    """Parse a `host:port` address (the host defaults to the local host)."""
+    host, _, port = text.rpartition(":")
+    return (host or "localhost", int(port))
+
+
+def new_authkey() -> bytes:
+    """Random key for the workers to authenticate with, printable to pass it on."""
+    return secrets.token_urlsafe(16).encode()
+
+
+def _local(host):
+    """Host to connect to for a server listening on `host`."""
+    return "localhost" if host in ("", "0.0.0.0") else host
+
+
+class Coordinator:
+    """Serve the tiles of renders to remote workers.
+
+    Every worker connection is served by a thread, which sends the render
+    settings, then the tasks one at a time as the worker sends back results.
+    The workers stay connected between renders (e.g. progressive passes)
+    until the coordinator is closed.
+
+    Args:
+        address (tuple): `(host, port)` to listen on.
+        kwargs (dict): Render settings, see `render._image`.
+        authkey (bytes): Key the workers must authenticate with, a random one
+            printed for them if None.
+        tile_timeout (float): Seconds after which a worker still rendering a
+            tile is taken for lost, its tile given to another worker.
+
+    """
+
+    def __init__(self, address, kwargs, authkey=None, tile_timeout=TILE_TIMEOUT):
+        self._settings = dict(kwargs)
+        self._tile_timeout = tile_timeout
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._attempts = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        generated = authkey is None
+        if generated:
+            authkey = new_authkey()
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        """tuple: `(host, port)` actually listened on."""
+        threading.Thread(target=self._accept, daemon=True).start()
+        print(f"Waiting for workers on {self.address[0]}:{self.address[1]}")
+        if generated:
+            print(f"Workers authenticate with --auth-key {authkey.decode()}")
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                continue  # not a worker, or closing
+            if self._closed.is_set():
+                connection.close()
+                return
+            threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            ).start()
+
+    def _next_task(self):
+        """Next task to render, None once the coordinator is closed."""
+        while not self._closed.is_set():
+            try:
+                return self._tasks.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return None
+
+    def _serve(self, connection):
+        with connection:
+            try:
+                connection.send(self._settings)
+            except OSError:
+                return
+            while True:
+                task = self._next_task()
+                try:
+                    connection.send(task)
+                    if task is None:
+                        return
+                    if not connection.poll(self._tile_timeout):
+                        raise TimeoutError  # hung, dropped like a lost one
+                    result = connection.recv()
+                except (EOFError, OSError):
+                    if task is not None:
+                        self._retry(task)
+                    return
+                self._results.put(result)
+
+    def _retry(self, task):
+        """Queue again the task of a lost worker."""
+        tile, sample_start, _, frame = task
+        key = (tile, sample_start, frame)
+        with self._lock:
+            attempts = self._attempts[key] = self._attempts.get(key, 0) + 1
+        if attempts >= _MAX_ATTEMPTS:
+            self._results.put(
+                RuntimeError(f"Workers were lost {attempts} times rendering {tile}")
+            )
+            return
+        print(f"\nWorker lost, rendering {tile} again")
+        self._tasks.put(task)
+
+    def render_tiles(self, tiles, sample_start=0, samples=None, frame=None):
+        """Render the tiles with the connected workers.
+
+        Same results as `render._render_tiles`, the workers being identified
+        by `host:pid`.
+
+        Raises:
+            RuntimeError: Workers kept being lost rendering the same tile.
+            Exception: The error of a worker failing to render a tile.
+
+        """
+        from .render import _TileTiming, _write_tile, render_progress
+
+        resx = self._settings.get("resx")
+        resy = self._settings.get("resy")
+        framebuffer = array("f", bytes(4 * 3 * resx * resy))
+        sample_map = None
+        timings = []
+        worker_stats = {}
+        tasks_registry = {}
+
+        for tile in tiles:
+            self._tasks.put((tile, sample_start, samples, frame))
+        with memoryview(framebuffer) as pixels_view:
+            for task_num in range(1, len(tiles) + 1):
+                result = self._results.get()
+                if isinstance(result, Exception):
+                    raise result
+                tile, pixels, seconds, worker, counts, stats = result
+                _write_tile(pixels_view, pixels, tile, resx, resy)
+                if counts is not None:
+                    if sample_map is None:
+                        sample_map = array("I", bytes(4 * resx * resy))
+                    with memoryview(sample_map) as counts_view:
+                        _write_tile(counts_view, counts, tile, resx, resy, 1)
+                if stats is not None:
+                    worker_stats.setdefault(worker, raystats.RayStats()).merge(stats)
+                timings.append(_TileTiming(tile, seconds, worker))
+                render_progress(tasks_registry, task_num, len(tiles), None)
+        print()  # ensure new line for future prints
+        return framebuffer, timings, sample_map, worker_stats
+
+    def close(self):
+        """Stop serving, the workers are told to exit."""
+        self._closed.set()
+        host, port = self.address
+        try:  # wake up the thread blocked accepting connections
+            socket.create_connection((_local(host), port), timeout=1).close()
+        except OSError:
+            pass
+        self._listener.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _connect(address, authkey, timeout):
+    """Connect to the coordinator, waiting for it to start up to `timeout`."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(_POLL_SECONDS * 5)
+
+
+def worker(address, authkey, timeout=_CONNECT_TIMEOUT):
+    """Render tiles for a coordinator until it closes, see :class:`Coordinator`.
+
+    Args:
+        address (tuple): `(host, port)` of the coordinator.
+        authkey (bytes): Key to authenticate with.
+        timeout (float): Seconds to wait for the coordinator to start.
+
+    """
+    from .render import ENGINE, _trace_tile
+
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    tiles = 0
+    with _connect(address, authkey, timeout) as connection:
+        try:
+            settings = connection.recv()
+        except EOFError:
+            return
+        print(f"Worker {name} connected to {address[0]}:{address[1]}")
+        if settings.get("engine") == ENGINE.NUMPY:
+            # Flattened once rather than for every tile, as for local workers.
+            settings["world"] = wavefront.scene_arrays(settings["world"])
+        elif settings.get("stats"):
+            settings["world"] = raystats.instrument(settings["world"])
+
+        while True:
+            try:
+                task = connection.recv()
+            except EOFError:  # coordinator gone
+                break
+            if task is None:
+                break
+            start_time = time.perf_counter()
+            try:
+                pixels, counts = _trace_tile(task, settings)
+            except Exception as error:
+                connection.send(error)
+                raise
+            seconds = time.perf_counter() - start_time
+            connection.send(
+                (task[0], pixels, seconds, name, counts, raystats.current)
+            )
+            tiles += 1
+    print(f"Worker {name} rendered {tiles} tiles")
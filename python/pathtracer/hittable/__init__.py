@@ -1,9 +1,28 @@
 """Hittable/scene objects."""
 
+from .aabb import AABB
+from .box import Box
+from .bvh import BVH
+from .disk import Disk
+from .grid import UniformGrid
 from .hittable_list import HittableList
+from .instance import Instance, Transform
+from .mesh import TriangleMesh
+from .packed import PackedSpheres
+from .plane import Plane
 from .sphere import Sphere
 
 __all__ = [
+    "AABB",
+    "BVH",
+    "Box",
+    "Disk",
     "HittableList",
+    "Instance",
+    "PackedSpheres",
+    "Plane",
     "Sphere",
+    "Transform",
+    "TriangleMesh",
+    "UniformGrid",
 ]
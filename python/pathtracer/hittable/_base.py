@@ -18,8 +18,63 @@ class HitRecord:
 
 
 class Hittable:
-    """Hittable base class."""
+    """Hittable base class.
+
+    Intersections take two steps: :meth:`closest_hit` only finds the `t` of
+    the closest hit and which object it was, then :meth:`hit_record` builds the
+    record of that single hit. Aggregates (lists, hierarchies...) compare the
+    hits of their objects without building a record for each of them.
+
+    Subclasses implement both, or only :meth:`hit` (whose records are then
+    built for every hit).
+    """
+
+    __slots__ = ()  # leaves the choice to the subclasses, see `Instance`
 
     def hit(self, ray, t_min: float, t_max: float):
-        """Whether the ray hit the object."""
+        """Whether the ray hit the object.
+
+        Returns:
+            tuple: `(hit, record)`, the :class:`HitRecord` of the closest hit
+                in between `t_min` and `t_max` (None if `hit` is False).
+
+        """
+        closest = self.closest_hit(ray, t_min, t_max)
+        if closest is None:
+            return (False, None)
+        t, owner, key = closest
+        return (True, owner.hit_record(ray, t, key))
+
+    def closest_hit(self, ray, t_min: float, t_max: float):
+        """Closest hit of the ray in between `t_min` and `t_max`, without record.
+
+        Returns:
+            tuple: `(t, owner, key)`, `owner.hit_record(ray, t, key)` being the
+                record of the hit (`owner` is the object hit or the one
+                holding it, `key` tells which), None if the ray misses.
+
+        """
+        hit, record = self.hit(ray, t_min, t_max)
+        return (record.t, self, record) if hit else None
+
+    def hit_record(self, ray, t: float, key):
+        """Record of a hit found by :meth:`closest_hit`."""
+        return key  # the record itself, for subclasses implementing `hit`
+
+    def occluded(self, ray, t_min: float, t_max: float) -> bool:
+        """Whether the ray hits anything in between `t_min` and `t_max`.
+
+        Any hit will do (e.g. shadow rays), aggregates stop at the first one
+        they find instead of looking for the closest.
+        """
+        return self.closest_hit(ray, t_min, t_max) is not None
+
+    def bounding_box(self):
+        """Axis-aligned box bounding the object.
+
+        Returns:
+            tuple: `(bounded, box)`, `bounded` is False (and `box` None) for
+                objects that can't be bounded e.g. infinite planes.
+
+        """
         raise NotImplementedError
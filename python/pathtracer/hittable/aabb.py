@@ -0,0 +1,63 @@
+"""Axis-aligned bounding box."""
+
+from ..vec3 import Point3
+
+
+class AABB:
+    """Axis-aligned bounding box."""
+
+    def __init__(self, minimum: Point3, maximum: Point3):
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def hit(self, ray, t_min: float, t_max: float) -> bool:
+        """Whether the ray overlaps the box in between `t_min` and `t_max`."""
+        origin = ray.origin
+        direction = ray.direction
+        for axis in range(3):
+            if direction[axis] == 0:
+                # Parallel to the slab: either always or never inside of it.
+                if not self.minimum[axis] <= origin[axis] <= self.maximum[axis]:
+                    return False
+                continue
+
+            inverse = 1.0 / direction[axis]
+            t0 = (self.minimum[axis] - origin[axis]) * inverse
+            t1 = (self.maximum[axis] - origin[axis]) * inverse
+            if inverse < 0.0:
+                t0, t1 = t1, t0
+            if t0 > t_min:
+                t_min = t0
+            if t1 < t_max:
+                t_max = t1
+            if t_max <= t_min:
+                return False
+        return True
+
+    def centroid(self) -> Point3:
+        """Center point of the box."""
+        return 0.5 * (self.minimum + self.maximum)
+
+    def surface_area(self) -> float:
+        """Surface area of the box."""
+        extent = self.maximum - self.minimum
+        return 2.0 * (extent.x * extent.y + extent.y * extent.z + extent.z * extent.x)
+
+    def __str__(self):
+        return f"{self.minimum} {self.maximum}"
+
+
+def surrounding_box(box_a: AABB, box_b: AABB) -> AABB:
+    """Bounding box enclosing both boxes."""
+    return AABB(
+        Point3(
+            min(box_a.minimum.x, box_b.minimum.x),
+            min(box_a.minimum.y, box_b.minimum.y),
+            min(box_a.minimum.z, box_b.minimum.z),
+        ),
+        Point3(
+            max(box_a.maximum.x, box_b.maximum.x),
+            max(box_a.maximum.y, box_b.maximum.y),
+            max(box_a.maximum.z, box_b.maximum.z),
+        ),
+    )
@@ -0,0 +1,67 @@
+"""Box hittable object."""
+
+from ..vec3 import Vec3
+from ._base import Hittable, HitRecord
+from .aabb import AABB
+
+
+# Outward normals of the faces on the minimum then maximum side of each axis.
+_NORMALS = (
+    (Vec3(-1.0, 0.0, 0.0), Vec3(1.0, 0.0, 0.0)),
+    (Vec3(0.0, -1.0, 0.0), Vec3(0.0, 1.0, 0.0)),
+    (Vec3(0.0, 0.0, -1.0), Vec3(0.0, 0.0, 1.0)),
+)
+
+
+class Box(Hittable):
+    """Axis-aligned box between the `minimum` and `maximum` corners.
+
+    Intersected with the slab test of its bounding box, the face hit being the
+    last one entered (or the first one left from inside the box).
+    """
+
+    def __init__(self, minimum, maximum, material=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.material = material
+
+    def closest_hit(self, ray, t_min, t_max):
+        origin = ray.origin
+        direction = ray.direction
+        near, far = -float("inf"), float("inf")
+        near_axis = far_axis = 0
+        for axis in range(3):
+            if direction[axis] == 0:
+                # Parallel to the slab: either always or never inside of it.
+                if not self.minimum[axis] <= origin[axis] <= self.maximum[axis]:
+                    return None
+                continue
+
+            inverse = 1.0 / direction[axis]
+            t0 = (self.minimum[axis] - origin[axis]) * inverse
+            t1 = (self.maximum[axis] - origin[axis]) * inverse
+            if inverse < 0.0:
+                t0, t1 = t1, t0
+            if t0 > near:
+                near, near_axis = t0, axis
+            if t1 < far:
+                far, far_axis = t1, axis
+            if far < near:
+                return None
+
+        # The key is the outward normal of the face hit.
+        if t_min <= near <= t_max:
+            # Entering through the face the ray points into.
+            return (near, self, _NORMALS[near_axis][direction[near_axis] < 0])
+        if t_min <= far <= t_max:
+            return (far, self, _NORMALS[far_axis][direction[far_axis] > 0])
+        return None
+
+    def hit_record(self, ray, t, key):
+        point = ray.origin.mul_add(t, ray.direction)
+        record = HitRecord(t, point, key, material=self.material)
+        record.set_face_normal(ray, key)
+        return record
+
+    def bounding_box(self):
+        return (True, AABB(self.minimum, self.maximum))
@@ -0,0 +1,178 @@
+"""Bounding volume hierarchy."""
+
+from ._base import Hittable
+from .aabb import AABB, surrounding_box
+
+
+# Number of candidate split planes per axis evaluated with the surface area
+# heuristic (SAH).
+_SAH_BINS = 12
+
+
+class _BVHNode(Hittable):
+    """Inner node of the hierarchy, children are nodes or primitives."""
+
+    def __init__(self, left: Hittable, right: Hittable, box: AABB, axis: int):
+        self.left = left
+        self.right = right
+        self.box = box
+        self.axis = axis
+
+    def closest_hit(self, ray, t_min, t_max):
+        if not self.box.hit(ray, t_min, t_max):
+            return None
+
+        # Visit the nearest child first so the farthest one can early out
+        # against the already shrunk `t_max`.
+        if ray.direction[self.axis] < 0:
+            first, second = self.right, self.left
+        else:
+            first, second = self.left, self.right
+
+        closest_first = first.closest_hit(ray, t_min, t_max)
+        if closest_first is not None:
+            t_max = closest_first[0]
+        closest_second = second.closest_hit(ray, t_min, t_max)
+        if closest_second is not None:
+            return closest_second
+        return closest_first
+
+    def occluded(self, ray, t_min, t_max):
+        if not self.box.hit(ray, t_min, t_max):
+            return False
+        return self.left.occluded(ray, t_min, t_max) or self.right.occluded(
+            ray, t_min, t_max
+        )
+
+    def bounding_box(self):
+        return (True, self.box)
+
+
+class BVH(Hittable):
+    """Bounding volume hierarchy of hittable objects.
+
+    Built top-down splitting along the longest axis of the object centroids,
+    at the plane minimizing the surface area heuristic (or the median when the
+    centroids are too close together to be binned). Unbounded objects (e.g.
+    planes) are kept out of the hierarchy and tested first by every ray.
+    """
+
+    def __init__(self, objects):
+        self.objects = list(objects)
+        if not self.objects:
+            raise ValueError("Can't build a BVH without objects")
+
+        items = []
+        self.unbounded = []
+        """list: objects out of the hierarchy, tested by every ray."""
+        for item in self.objects:
+            bounded, box = item.bounding_box()
+            if bounded:
+                items.append((box, box.centroid(), item))
+            else:
+                self.unbounded.append(item)
+
+        self.root = _build(items) if items else None
+
+    def __len__(self):
+        return len(self.objects)
+
+    def closest_hit(self, ray, t_min, t_max):
+        if not self.unbounded:
+            return self.root.closest_hit(ray, t_min, t_max)
+
+        closest_so_far = None
+        for item in self.unbounded:
+            closest = item.closest_hit(ray, t_min, t_max)
+            if closest is not None:
+                t_max = closest[0]
+                closest_so_far = closest
+        if self.root is not None:
+            closest = self.root.closest_hit(ray, t_min, t_max)
+            if closest is not None:
+                return closest
+        return closest_so_far
+
+    def occluded(self, ray, t_min, t_max):
+        for item in self.unbounded:
+            if item.occluded(ray, t_min, t_max):
+                return True
+        return self.root is not None and self.root.occluded(ray, t_min, t_max)
+
+    def bounding_box(self):
+        if self.unbounded:
+            return (False, None)
+        return self.root.bounding_box()
+
+
+def _enclose(items):
+    box = items[0][0]
+    for other, _, _ in items[1:]:
+        box = surrounding_box(box, other)
+    return box
+
+
+def _build(items):
+    """Recursively build the hierarchy of `(box, centroid, object)` items."""
+    if len(items) == 1:
+        return items[0][2]
+
+    box = _enclose(items)
+
+    # Split along the axis in which the centroids spread the most.
+    lows = [min(centroid[axis] for _, centroid, _ in items) for axis in range(3)]
+    highs = [max(centroid[axis] for _, centroid, _ in items) for axis in range(3)]
+    axis = max(range(3), key=lambda axis: highs[axis] - lows[axis])
+    low, high = lows[axis], highs[axis]
+
+    left = right = None
+    if high > low and len(items) > 2:
+        left, right = _sah_split(items, axis, low, high)
+
+    if not left or not right:
+        # Median split, also for two items or coincident centroids.
+        items = sorted(items, key=lambda item: item[1][axis])
+        middle = len(items) // 2
+        left, right = items[:middle], items[middle:]
+
+    return _BVHNode(_build(left), _build(right), box, axis)
+
+
+def _sah_split(items, axis, low, high):
+    """Partition the items at the binned split plane with the lowest SAH cost."""
+    scale = _SAH_BINS / (high - low)
+
+    def bin_index(item):
+        return min(int((item[1][axis] - low) * scale), _SAH_BINS - 1)
+
+    counts = [0] * _SAH_BINS
+    boxes = [None] * _SAH_BINS
+    for item in items:
+        index = bin_index(item)
+        counts[index] += 1
+        boxes[index] = item[0] if boxes[index] is None else surrounding_box(
+            boxes[index], item[0]
+        )
+
+    # Sweep the split planes from both sides, accumulating count x area.
+    left_costs = []
+    count, box = 0, None
+    for index in range(_SAH_BINS - 1):
+        if counts[index]:
+            count += counts[index]
+            box = boxes[index] if box is None else surrounding_box(box, boxes[index])
+        left_costs.append(count * box.surface_area() if box else 0.0)
+
+    best_cost, best_split = None, None
+    count, box = 0, None
+    for index in range(_SAH_BINS - 1, 0, -1):
+        if counts[index]:
+            count += counts[index]
+            box = boxes[index] if box is None else surrounding_box(box, boxes[index])
+        cost = left_costs[index - 1] + (count * box.surface_area() if box else 0.0)
+        if best_cost is None or cost < best_cost:
+            best_cost, best_split = cost, index
+
+    left = [item for item in items if bin_index(item) < best_split]
+    right = [item for item in items if bin_index(item) >= best_split]
+    return left, right
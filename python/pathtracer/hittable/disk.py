@@ -0,0 +1,91 @@
+"""Disk hittable object."""
+
+import math
+import random
+
+from ..vec3 import Vec3, concentric_disk, from_local
+from ._base import Hittable, HitRecord
+from .aabb import AABB
+
+
+# Thickness given to the bounding box, flat boxes can't be hit.
+_PADDING = 1e-4
+
+
+class Disk(Hittable):
+    """Disk of `radius` around `center`, its front facing `normal`."""
+
+    def __init__(self, center, normal, radius: float, material=None):
+        self.center = center
+        self.normal = normal.unit_vector()
+        self.radius = radius
+        self.material = material
+        self.offset = self.normal.dot(center)
+
+    def closest_hit(self, ray, t_min, t_max):
+        denominator = self.normal.dot(ray.direction)
+        if denominator == 0:  # parallel
+            return None
+        root = (self.offset - self.normal.dot(ray.origin)) / denominator
+        if not t_min <= root <= t_max:
+            return None
+        # Distance to the center of the hit point, without building it.
+        x = ray.origin.x + root * ray.direction.x - self.center.x
+        y = ray.origin.y + root * ray.direction.y - self.center.y
+        z = ray.origin.z + root * ray.direction.z - self.center.z
+        if x * x + y * y + z * z > self.radius * self.radius:
+            return None
+        return (root, self, None)
+
+    def hit_record(self, ray, t, key):
+        point = ray.origin.mul_add(t, ray.direction)
+        if self.normal.dot(ray.direction) < 0:
+            return HitRecord(t, point, self.normal, True, self.material)
+        return HitRecord(t, point, -self.normal, False, self.material)
+
+    def sample_direction(self, origin, rng=random):
+        """Random unit direction from `origin` towards the disk, for lighting.
+
+        Towards a point uniformly distributed over the disk area.
+
+        Returns:
+            tuple: `(direction, pdf)`, the direction and its probability density
+                per solid angle, see :meth:`direction_pdf`.
+
+        """
+        x, y = concentric_disk(rng=rng)
+        radius = self.radius
+        point = self.center + from_local(self.normal, radius * x, radius * y, 0.0)
+        to_point = point - origin
+        distance_squared = to_point.squared_length()
+        direction = to_point / math.sqrt(distance_squared)
+        cosine = abs(self.normal.dot(direction))
+        if cosine == 0.0:  # seen edge on
+            return direction, 0.0
+        return direction, distance_squared / (cosine * math.pi * self.radius**2)
+
+    def direction_pdf(self, origin, direction) -> float:
+        """Density of :meth:`sample_direction` drawing `direction`, 0 if it misses."""
+        denominator = self.normal.dot(direction)
+        if denominator == 0:
+            return 0.0
+        root = (self.offset - self.normal.dot(origin)) / denominator
+        if root <= 0.0:
+            return 0.0
+        point = origin.mul_add(root, direction)
+        if point.distance_squared(self.center) > self.radius * self.radius:
+            return 0.0
+        distance_squared = root * root * direction.squared_length()
+        cosine = abs(denominator) / direction.length()
+        return distance_squared / (cosine * math.pi * self.radius**2)
+
+    def bounding_box(self):
+        # The disk spans `radius * sin(angle between the normal and the axis)`.
+        extent = Vec3(
+            *(
+                self.radius * math.sqrt(max(1.0 - component * component, 0.0))
+                + _PADDING
+                for component in self.normal
+            )
+        )
+        return (True, AABB(self.center - extent, self.center + extent))
@@ -0,0 +1,201 @@
+"""Uniform grid."""
+
+import math
+
+from ._base import Hittable
+from .aabb import surrounding_box
+
+
+# Objects per cell aimed at when sizing the grid.
+_DENSITY = 2.0
+# Cells along any axis at most.
+_MAX_RESOLUTION = 64
+# Objects larger than this many times the median object size aren't binned.
+_OVERSIZE = 8.0
+
+
+class UniformGrid(Hittable):
+    """Grid of equally sized cells, each listing the objects overlapping it.
+
+    Rays walk through the cells they cross in order (3D-DDA), testing the
+    objects of each cell, and stop at the first cell ending beyond the closest
+    hit so far. Suited to evenly spread objects of similar sizes like the
+    random scene, whose cells are sized to hold a couple of objects each.
+
+    Objects much larger than the others (e.g. the huge ground sphere) would
+    overlap most cells, as would unbounded ones: they are kept out of the grid,
+    in a list tested first by every ray.
+    """
+
+    def __init__(self, objects):
+        self.objects = list(objects)
+        if not self.objects:
+            raise ValueError("Can't build a grid without objects")
+
+        items = []
+        self.oversized = []
+        """list: objects not binned, tested by every ray."""
+        for item in self.objects:
+            bounded, box = item.bounding_box()
+            if bounded:
+                items.append((box, max(box.maximum - box.minimum)))
+            else:
+                items.append((None, math.inf))
+        sizes = sorted(size for _, size in items)
+        limit = _OVERSIZE * sizes[len(sizes) // 2]
+
+        binned = []
+        for item, (box, size) in zip(self.objects, items):
+            if box is None or size > limit:
+                self.oversized.append(item)
+            else:
+                binned.append((box, item))
+
+        self.box = None
+        self.cells = []
+        if binned:
+            self._bin(binned)
+
+    def _bin(self, binned):
+        """Size the grid around the objects and fill its cells."""
+        self.box = binned[0][0]
+        for box, _ in binned[1:]:
+            self.box = surrounding_box(self.box, box)
+        low = self.box.minimum
+        extent = [max(size, 1e-9) for size in self.box.maximum - low]
+
+        # Cubic cells holding `_DENSITY` objects on average.
+        side = (extent[0] * extent[1] * extent[2] / (_DENSITY * len(binned))) ** (
+            1 / 3
+        )
+        self.resolution = [
+            min(max(int(size / side), 1), _MAX_RESOLUTION) for size in extent
+        ]
+        self.cell_size = [
+            size / count for size, count in zip(extent, self.resolution)
+        ]
+
+        nx, ny, nz = self.resolution
+        cells = [[] for _ in range(nx * ny * nz)]
+        for box, item in binned:
+            first = self._cell_of(box.minimum)
+            last = self._cell_of(box.maximum)
+            for z in range(first[2], last[2] + 1):
+                for y in range(first[1], last[1] + 1):
+                    for x in range(first[0], last[0] + 1):
+                        cells[x + nx * (y + ny * z)].append(item)
+        self.cells = [tuple(cell) for cell in cells]
+
+    def _cell_of(self, point):
+        """Indices of the cell holding `point`, clamped to the grid."""
+        return [
+            min(max(int((point[axis] - self.box.minimum[axis]) / size), 0), count - 1)
+            for axis, (size, count) in enumerate(zip(self.cell_size, self.resolution))
+        ]
+
+    def __len__(self):
+        return len(self.objects)
+
+    def occluded(self, ray, t_min, t_max):
+        return self.closest_hit(ray, t_min, t_max, any_hit=True) is not None
+
+    def closest_hit(self, ray, t_min, t_max, any_hit=False):
+        """Closest hit along the cells crossed, or the first one with `any_hit`."""
+        closest_so_far = None
+        for item in self.oversized:
+            closest = item.closest_hit(ray, t_min, t_max)
+            if closest is not None:
+                if any_hit:
+                    return closest
+                t_max = closest[0]
+                closest_so_far = closest
+        if self.box is None:
+            return closest_so_far
+
+        # Clip the ray to the grid box.
+        origin = ray.origin
+        direction = ray.direction
+        low = self.box.minimum
+        high = self.box.maximum
+        t_enter, t_exit = t_min, t_max
+        for axis in range(3):
+            if direction[axis] == 0:
+                if not low[axis] <= origin[axis] <= high[axis]:
+                    return closest_so_far
+                continue
+            inverse = 1.0 / direction[axis]
+            t0 = (low[axis] - origin[axis]) * inverse
+            t1 = (high[axis] - origin[axis]) * inverse
+            if inverse < 0.0:
+                t0, t1 = t1, t0
+            t_enter = max(t_enter, t0)
+            t_exit = min(t_exit, t1)
+            if t_exit < t_enter:
+                return closest_so_far
+
+        # Cell of the entry point and ray distances to the next cell boundaries.
+        cell = self._cell_of(origin + t_enter * direction)
+        steps = [0, 0, 0]
+        nexts = [math.inf, math.inf, math.inf]
+        deltas = [math.inf, math.inf, math.inf]
+        for axis in range(3):
+            size = self.cell_size[axis]
+            if direction[axis] > 0:
+                steps[axis] = 1
+                boundary = low[axis] + (cell[axis] + 1) * size
+                nexts[axis] = (boundary - origin[axis]) / direction[axis]
+                deltas[axis] = size / direction[axis]
+            elif direction[axis] < 0:
+                steps[axis] = -1
+                boundary = low[axis] + cell[axis] * size
+                nexts[axis] = (boundary - origin[axis]) / direction[axis]
+                deltas[axis] = -size / direction[axis]
+
+        nx, ny, nz = self.resolution
+        x, y, z = cell
+        step_x, step_y, step_z = steps
+        next_x, next_y, next_z = nexts
+        delta_x, delta_y, delta_z = deltas
+        cells = self.cells
+        while True:
+            for item in cells[x + nx * (y + ny * z)]:
+                closest = item.closest_hit(ray, t_min, t_max)
+                if closest is not None:
+                    if any_hit:
+                        return closest
+                    t_max = closest[0]
+                    closest_so_far = closest
+
+            # Hits in the next cells are farther than the end of this one.
+            if next_x <= next_y and next_x <= next_z:
+                if next_x >= t_max or next_x >= t_exit:
+                    break
+                x += step_x
+                if not 0 <= x < nx:
+                    break
+                next_x += delta_x
+            elif next_y <= next_z:
+                if next_y >= t_max or next_y >= t_exit:
+                    break
+                y += step_y
+                if not 0 <= y < ny:
+                    break
+                next_y += delta_y
+            else:
+                if next_z >= t_max or next_z >= t_exit:
+                    break
+                z += step_z
+                if not 0 <= z < nz:
+                    break
+                next_z += delta_z
+
+        return closest_so_far
+
+    def bounding_box(self):
+        box = self.box
+        for item in self.oversized:
+            bounded, other = item.bounding_box()
+            if not bounded:
+                return (False, None)
+            box = other if box is None else surrounding_box(box, other)
+        return (True, box)
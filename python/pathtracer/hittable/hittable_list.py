@@ -1,6 +1,7 @@
 """List of Hittable objects."""
 
 from ._base import Hittable
+from .aabb import surrounding_box
 
 
 class HittableList(Hittable):
@@ -20,15 +21,28 @@ class HittableList(Hittable):
         """Clear hittable list."""
         self.hittable_list.clear()
 
-    def hit(self, ray, t_min, t_max):
-        hit_anything = False
-        closest_so_far = t_max
-        record_so_far = None
+    def closest_hit(self, ray, t_min, t_max):
+        closest_so_far = None
         for item in self.hittable_list:
-            hit, record = item.hit(ray, t_min, closest_so_far)
-            if hit:
-                hit_anything = True
-                closest_so_far = record.t
-                record_so_far = record
+            closest = item.closest_hit(ray, t_min, t_max)
+            if closest is not None:
+                t_max = closest[0]
+                closest_so_far = closest
 
-        return (hit_anything, record_so_far)
+        return closest_so_far
+
+    def occluded(self, ray, t_min, t_max):
+        for item in self.hittable_list:
+            if item.occluded(ray, t_min, t_max):
+                return True
+        return False
+
+    def bounding_box(self):
+        output_box = None
+        for item in self.hittable_list:
+            bounded, box = item.bounding_box()
+            if not bounded:
+                return (False, None)
+            output_box = box if output_box is None else surrounding_box(output_box, box)
+
+        return (output_box is not None, output_box)
@@ -0,0 +1,204 @@
+"""Instances of shared objects."""
+
+from array import array
+import math
+
+from ..ray import Ray
+from ..vec3 import Point3, Vec3
+from ._base import Hittable
+from .aabb import AABB
+
+
+_IDENTITY = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+
+
+class Transform:
+    """Affine transform, a 3x4 matrix.
+
+    The 12 values of `matrix` are its rows: point `p` goes to
+    `(m0 p.x + m1 p.y + m2 p.z + m3, m4 p.x + ..., m8 p.x + ...)`. Transforms
+    compose with `@`, `a @ b` applying `b` first then `a`, e.g.
+    `Transform.translation(0, 1, 0) @ Transform.scaling(2)`.
+    """
+
+    __slots__ = ("matrix",)
+
+    def __init__(self, matrix=_IDENTITY):
+        self.matrix = tuple(float(value) for value in matrix)
+        if len(self.matrix) != 12:
+            raise ValueError("A transform takes the 12 values of a 3x4 matrix")
+
+    @classmethod
+    def translation(cls, x: float, y: float, z: float):
+        """Transform moving points by `(x, y, z)`."""
+        return cls((1, 0, 0, x, 0, 1, 0, y, 0, 0, 1, z))
+
+    @classmethod
+    def scaling(cls, x: float, y: float = None, z: float = None):
+        """Transform scaling along the axes, uniformly if only `x` is given."""
+        y = x if y is None else y
+        z = x if z is None else z
+        return cls((x, 0, 0, 0, 0, y, 0, 0, 0, 0, z, 0))
+
+    @classmethod
+    def rotation(cls, axis, degrees: float):
+        """Transform rotating counterclockwise around an axis through the origin."""
+        x, y, z = axis.unit_vector()
+        angle = math.radians(degrees)
+        cos, sin = math.cos(angle), math.sin(angle)
+        c = 1.0 - cos
+        return cls(
+            (
+                *(cos + x * x * c, x * y * c - z * sin, x * z * c + y * sin, 0),
+                *(y * x * c + z * sin, cos + y * y * c, y * z * c - x * sin, 0),
+                *(z * x * c - y * sin, z * y * c + x * sin, cos + z * z * c, 0),
+            )
+        )
+
+    def __matmul__(self, other):
+        a = self.matrix
+        b = other.matrix
+        matrix = []
+        for row in range(0, 12, 4):
+            for column in range(4):
+                value = sum(a[row + k] * b[4 * k + column] for k in range(3))
+                matrix.append(value + (a[row + 3] if column == 3 else 0.0))
+        return Transform(matrix)
+
+    def inverse(self):
+        """Inverse transform.
+
+        Raises:
+            ValueError: If the transform flattens space (e.g. a 0 scale).
+
+        """
+        a, b, c, x, d, e, f, y, g, h, i, z = self.matrix
+        # Adjugate of the 3x3 part over its determinant.
+        cofactors = (
+            e * i - f * h,
+            c * h - b * i,
+            b * f - c * e,
+            f * g - d * i,
+            a * i - c * g,
+            c * d - a * f,
+            d * h - e * g,
+            b * g - a * h,
+            a * e - b * d,
+        )
+        determinant = a * cofactors[0] + b * cofactors[3] + c * cofactors[6]
+        if determinant == 0:
+            raise ValueError("Can't invert a transform flattening space")
+        rows = [
+            [value / determinant for value in cofactors[row : row + 3]]
+            for row in range(0, 9, 3)
+        ]
+        return Transform(
+            value
+            for row in rows
+            for value in (*row, -(row[0] * x + row[1] * y + row[2] * z))
+        )
+
+    def point(self, point):
+        """Transformed point."""
+        m = self.matrix
+        x, y, z = point
+        return Point3(
+            m[0] * x + m[1] * y + m[2] * z + m[3],
+            m[4] * x + m[5] * y + m[6] * z + m[7],
+            m[8] * x + m[9] * y + m[10] * z + m[11],
+        )
+
+
+class Instance(Hittable):
+    """Object placed in the world by a transform, sharing its geometry.
+
+    Any number of instances may refer to the same `prototype`, e.g. a
+    :class:`TriangleMesh` or a :class:`BVH` of objects, built and stored once.
+    Rays are transformed into the space of the prototype and intersected with
+    it (the ray parameter `t` is the same in both spaces), then the hit point
+    and normal are transformed back. An instance only holds its two matrices
+    besides, a forest of thousands of trees costs little more than one.
+
+    Args:
+        prototype (Hittable): Shared object, in its own space.
+        transform (Transform): From the prototype space to the world.
+        material: Material overriding that of the prototype, if not None.
+
+    """
+
+    __slots__ = ("prototype", "material", "_matrices")
+
+    def __init__(self, prototype, transform, material=None):
+        self.prototype = prototype
+        self.material = material
+        # The matrix, then the inverse one taking rays to the prototype space.
+        self._matrices = array("d", transform.matrix + transform.inverse().matrix)
+
+    @property
+    def transform(self) -> Transform:
+        """From the prototype space to the world."""
+        return Transform(self._matrices[:12])
+
+    def _local(self, ray) -> Ray:
+        """The ray in the prototype space."""
+        a, b, c, x, d, e, f, y, g, h, i, z = self._matrices[12:]
+        ox, oy, oz = ray.origin
+        dx, dy, dz = ray.direction
+        return Ray(
+            Point3(
+                a * ox + b * oy + c * oz + x,
+                d * ox + e * oy + f * oz + y,
+                g * ox + h * oy + i * oz + z,
+            ),
+            Vec3(
+                a * dx + b * dy + c * dz,
+                d * dx + e * dy + f * dz,
+                g * dx + h * dy + i * dz,
+            ),
+        )
+
+    def closest_hit(self, ray, t_min, t_max):
+        closest = self.prototype.closest_hit(self._local(ray), t_min, t_max)
+        if closest is None:
+            return None
+        t, owner, key = closest
+        return (t, self, (owner, key))
+
+    def occluded(self, ray, t_min, t_max):
+        return self.prototype.occluded(self._local(ray), t_min, t_max)
+
+    def hit_record(self, ray, t, key):
+        owner, key = key
+        record = owner.hit_record(self._local(ray), t, key)
+        record.point = ray.origin.mul_add(t, ray.direction)
+        # Normals go through the transpose of the inverse matrix, which keeps
+        # them perpendicular to the surface and on the same side of it.
+        a, b, c, _, d, e, f, _, g, h, i, _ = self._matrices[12:]
+        nx, ny, nz = record.normal
+        record.normal = Vec3(
+            a * nx + d * ny + g * nz,
+            b * nx + e * ny + h * nz,
+            c * nx + f * ny + i * nz,
+        ).unit_vector()
+        if self.material is not None:
+            record.material = self.material
+        return record
+
+    def bounding_box(self):
+        bounded, box = self.prototype.bounding_box()
+        if not bounded:
+            return (False, None)
+        transform = self.transform
+        corners = [
+            transform.point(Point3(x, y, z))
+            for x in (box.minimum.x, box.maximum.x)
+            for y in (box.minimum.y, box.maximum.y)
+            for z in (box.minimum.z, box.maximum.z)
+        ]
+        return (
+            True,
+            AABB(
+                Point3(*(min(corner[axis] for corner in corners) for axis in range(3))),
+                Point3(*(max(corner[axis] for corner in corners) for axis in range(3))),
+            ),
+        )
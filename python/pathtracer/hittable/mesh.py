@@ -0,0 +1,368 @@
+"""Triangle mesh."""
+
+from array import array
+import math
+
+from ..vec3 import Point3, Vec3
+from ._base import Hittable, HitRecord
+from .aabb import AABB
+
+
+# Number of candidate split planes per axis evaluated with the surface area
+# heuristic (SAH), see `bvh`.
+_SAH_BINS = 12
+# Triangles per leaf of the hierarchy at most.
+_LEAF_SIZE = 4
+
+
+class TriangleMesh(Hittable):
+    """Triangles sharing their vertices, stored as flat arrays.
+
+    A mesh of millions of triangles is a single object of the world: it takes
+    a few arrays instead of an object per triangle, and rays only test the
+    triangles of the leaves of its own bounding volume hierarchy they cross,
+    with the Möller-Trumbore algorithm.
+
+    The hierarchy is flattened like that of :class:`PackedSpheres`: node `n`
+    is the box `bvh_boxes[6n:6n+6]` (min then max corner) and
+    `bvh_nodes[3n:3n+3]` its split axis and children nodes, or `-1` then the
+    range of its triangles for the leaves. The triangles are reordered so
+    that those of every leaf follow each other.
+
+    Args:
+        vertices: Flat float64 buffer of the vertices `x, y, z`.
+        indices: Flat int32 buffer of the triangles, 3 vertex indices each.
+        material: Material of every triangle.
+
+    """
+
+    def __init__(self, vertices, indices, material=None):
+        if not indices:
+            raise ValueError("Can't build a mesh without triangles")
+        self.vertices = vertices
+        self.material = material
+        self.indices, self.bvh_boxes, self.bvh_nodes = _build(vertices, indices)
+
+    def __len__(self):
+        return len(self.indices) // 3
+
+    def occluded(self, ray, t_min, t_max):
+        return self.closest_hit(ray, t_min, t_max, any_hit=True) is not None
+
+    def closest_hit(self, ray, t_min, t_max, any_hit=False):
+        """Closest hit keyed by the triangle index, or the first one with `any_hit`."""
+        direction = ray.direction
+        ox, oy, oz = ray.origin
+        dx, dy, dz = direction
+        # Infinite inverses make the slabs parallel to the ray all or nothing.
+        ix = 1.0 / dx if dx else math.inf
+        iy = 1.0 / dy if dy else math.inf
+        iz = 1.0 / dz if dz else math.inf
+        vertices = self.vertices
+        indices = self.indices
+        boxes = self.bvh_boxes
+        nodes = self.bvh_nodes
+        closest = None
+        stack = [0]
+        while stack:
+            node = stack.pop()
+
+            # Slab test of the node box, same as `AABB.hit`.
+            start = 6 * node
+            near, far = t_min, t_max
+            t0 = (boxes[start] - ox) * ix
+            t1 = (boxes[start + 3] - ox) * ix
+            if ix < 0.0:
+                t0, t1 = t1, t0
+            if t0 > near:
+                near = t0
+            if t1 < far:
+                far = t1
+            t0 = (boxes[start + 1] - oy) * iy
+            t1 = (boxes[start + 4] - oy) * iy
+            if iy < 0.0:
+                t0, t1 = t1, t0
+            if t0 > near:
+                near = t0
+            if t1 < far:
+                far = t1
+            t0 = (boxes[start + 2] - oz) * iz
+            t1 = (boxes[start + 5] - oz) * iz
+            if iz < 0.0:
+                t0, t1 = t1, t0
+            if t0 > near:
+                near = t0
+            if t1 < far:
+                far = t1
+            if far < near:
+                continue
+
+            axis, first, second = nodes[3 * node : 3 * node + 3]
+            if axis >= 0:
+                # Nearest child on top of the stack, see `_BVHNode.closest_hit`.
+                if direction[axis] < 0:
+                    stack.append(first)
+                    stack.append(second)
+                else:
+                    stack.append(second)
+                    stack.append(first)
+                continue
+
+            for triangle in range(first, second):
+                a, b, c = indices[3 * triangle : 3 * triangle + 3]
+                ax, ay, az = vertices[3 * a : 3 * a + 3]
+                bx, by, bz = vertices[3 * b : 3 * b + 3]
+                cx, cy, cz = vertices[3 * c : 3 * c + 3]
+                e1x, e1y, e1z = bx - ax, by - ay, bz - az
+                e2x, e2y, e2z = cx - ax, cy - ay, cz - az
+                # Moller-Trumbore: barycentric u, v and t by Cramer's rule.
+                px = dy * e2z - dz * e2y
+                py = dz * e2x - dx * e2z
+                pz = dx * e2y - dy * e2x
+                determinant = e1x * px + e1y * py + e1z * pz
+                if determinant == 0.0:
+                    continue  # parallel to the triangle
+                inverse = 1.0 / determinant
+                sx, sy, sz = ox - ax, oy - ay, oz - az
+                u = (sx * px + sy * py + sz * pz) * inverse
+                if u < 0.0 or u > 1.0:
+                    continue
+                qx = sy * e1z - sz * e1y
+                qy = sz * e1x - sx * e1z
+                qz = sx * e1y - sy * e1x
+                v = (dx * qx + dy * qy + dz * qz) * inverse
+                if v < 0.0 or u + v > 1.0:
+                    continue
+                t = (e2x * qx + e2y * qy + e2z * qz) * inverse
+                if t_min <= t <= t_max:
+                    if any_hit:
+                        return (t, self, triangle)
+                    t_max, closest = t, triangle
+
+        if closest is None:
+            return None
+        return (t_max, self, closest)
+
+    def hit_record(self, ray, t, key):
+        a, b, c = self.indices[3 * key : 3 * key + 3]
+        vertices = self.vertices
+        corner = Vec3(*vertices[3 * a : 3 * a + 3])
+        edge_1 = Vec3(*vertices[3 * b : 3 * b + 3]) - corner
+        edge_2 = Vec3(*vertices[3 * c : 3 * c + 3]) - corner
+        # Counterclockwise triangles face the viewer, as in Wavefront OBJ files.
+        normal = edge_1.cross(edge_2).unit_vector()
+        point = ray.origin.mul_add(t, ray.direction)
+        record = HitRecord(t, point, normal, material=self.material)
+        record.set_face_normal(ray, normal)
+        return record
+
+    def bounding_box(self):
+        return (
+            True,
+            AABB(Point3(*self.bvh_boxes[0:3]), Point3(*self.bvh_boxes[3:6])),
+        )
+
+
+def _triangle_boxes(vertices, indices):
+    """`(lows, highs)` float64 arrays of the triangle bounding box corners."""
+    lows = array("d")
+    highs = array("d")
+    for start in range(0, len(indices), 3):
+        a, b, c = indices[start : start + 3]
+        ax, ay, az = vertices[3 * a : 3 * a + 3]
+        bx, by, bz = vertices[3 * b : 3 * b + 3]
+        cx, cy, cz = vertices[3 * c : 3 * c + 3]
+        lows.extend((min(ax, bx, cx), min(ay, by, cy), min(az, bz, cz)))
+        highs.extend((max(ax, bx, cx), max(ay, by, cy), max(az, bz, cz)))
+    return lows, highs
+
+
+def _area(box) -> float:
+    """Surface area of a `[min x, min y, min z, max x, max y, max z]` box."""
+    x, y, z = box[3] - box[0], box[4] - box[1], box[5] - box[2]
+    return 2.0 * (x * y + y * z + z * x)
+
+
+def _empty_box() -> list:
+    return [math.inf] * 3 + [-math.inf] * 3
+
+
+def _merge(box, other) -> list:
+    return [min(box[i], other[i]) for i in range(3)] + [
+        max(box[i], other[i]) for i in range(3, 6)
+    ]
+
+
+def _range_box(order, start, end, lows, highs) -> list:
+    """Box of the triangles `order[start:end]`."""
+    box = _empty_box()
+    for index in range(start, end):
+        offset = 3 * order[index]
+        for axis in range(3):
+            low = lows[offset + axis]
+            high = highs[offset + axis]
+            if low < box[axis]:
+                box[axis] = low
+            if high > box[axis + 3]:
+                box[axis + 3] = high
+    return box
+
+
+def _sah_split(order, start, end, lows, highs, axis, low, high):
+    """Partition the triangles at the binned plane with the lowest SAH cost.
+
+    Centroids are doubled, `low` and `high` being those of the triangles.
+
+    Returns:
+        tuple: `(middle, left box, right box)`, `middle` the index in `order`
+            of the first triangle of the right side, None if all fall in a
+            single bin.
+
+    """
+    scale = _SAH_BINS / (high - low)
+    top = _SAH_BINS - 1
+
+    bins = bytearray(end - start)
+    counts = [0] * _SAH_BINS
+    boxes = [_empty_box() for _ in range(_SAH_BINS)]
+    for index in range(start, end):
+        offset = 3 * order[index]
+        x0, y0, z0 = lows[offset : offset + 3]
+        x1, y1, z1 = highs[offset : offset + 3]
+        bin_ = int((lows[offset + axis] + highs[offset + axis] - low) * scale)
+        if bin_ > top:
+            bin_ = top
+        bins[index - start] = bin_
+        counts[bin_] += 1
+        box = boxes[bin_]
+        if x0 < box[0]:
+            box[0] = x0
+        if y0 < box[1]:
+            box[1] = y0
+        if z0 < box[2]:
+            box[2] = z0
+        if x1 > box[3]:
+            box[3] = x1
+        if y1 > box[4]:
+            box[4] = y1
+        if z1 > box[5]:
+            box[5] = z1
+
+    # Sweep the split planes from both sides, accumulating count x area.
+    left_boxes = []
+    left_costs = []
+    count, box = 0, _empty_box()
+    for bin_ in range(_SAH_BINS - 1):
+        if counts[bin_]:
+            count += counts[bin_]
+            box = _merge(box, boxes[bin_])
+        left_boxes.append(box)
+        left_costs.append(count * _area(box) if count else 0.0)
+
+    best_cost, best_split, right_box = None, None, None
+    count, box = 0, _empty_box()
+    for bin_ in range(_SAH_BINS - 1, 0, -1):
+        if counts[bin_]:
+            count += counts[bin_]
+            box = _merge(box, boxes[bin_])
+        if not count or count == end - start:
+            continue
+        cost = left_costs[bin_ - 1] + count * _area(box)
+        if best_cost is None or cost < best_cost:
+            best_cost, best_split, right_box = cost, bin_, box
+    if best_split is None:
+        return None
+
+    # In place, swapping the misplaced triangles of both ends.
+    first, last = 0, end - start - 1
+    while True:
+        while bins[first] < best_split:
+            first += 1
+        while bins[last] >= best_split:
+            last -= 1
+        if first > last:
+            break
+        bins[first], bins[last] = bins[last], bins[first]
+        order[start + first], order[start + last] = (
+            order[start + last],
+            order[start + first],
+        )
+    return start + first, left_boxes[best_split - 1], right_box
+
+
+def _build(vertices, indices) -> tuple:
+    """Build the hierarchy of the triangles, see :class:`TriangleMesh`.
+
+    Top-down like :class:`BVH`, splitting along the longest axis of the
+    triangle centroids at the SAH plane (or the median), on the triangle boxes
+    only. Depth first without recursion, partitioning a single array of the
+    triangles in place so that large meshes don't take more memory.
+
+    Returns:
+        tuple: `(indices, boxes, nodes)`, the triangles reordered by leaf and
+            the flattened hierarchy arrays.
+
+    """
+    lows, highs = _triangle_boxes(vertices, indices)
+    boxes = array("d")
+    nodes = array("i")
+    order = array("i", range(len(indices) // 3))
+    # `(start, end, box, parent node slot)` ranges of `order`, the root has no
+    # parent.
+    stack = [(0, len(order), _range_box(order, 0, len(order), lows, highs), None)]
+    while stack:
+        start, end, box, slot = stack.pop()
+        node = len(nodes) // 3
+        if slot is not None:
+            nodes[slot] = node
+        boxes.extend(box)
+
+        if end - start <= _LEAF_SIZE:
+            nodes.extend((-1, start, end))
+            continue
+
+        # Split along the axis in which the (doubled) centroids spread the most.
+        centroid_lows = [math.inf] * 3
+        centroid_highs = [-math.inf] * 3
+        for index in range(start, end):
+            offset = 3 * order[index]
+            for axis in range(3):
+                centroid = lows[offset + axis] + highs[offset + axis]
+                if centroid < centroid_lows[axis]:
+                    centroid_lows[axis] = centroid
+                if centroid > centroid_highs[axis]:
+                    centroid_highs[axis] = centroid
+        spreads = [high - low for low, high in zip(centroid_lows, centroid_highs)]
+        axis = spreads.index(max(spreads))
+        low, high = centroid_lows[axis], centroid_highs[axis]
+
+        split = None
+        if high > low:
+            split = _sah_split(order, start, end, lows, highs, axis, low, high)
+        if split is None:
+            # Median split, for coincident centroids.
+            order[start:end] = array(
+                "i",
+                sorted(
+                    order[start:end],
+                    key=lambda triangle: lows[3 * triangle + axis]
+                    + highs[3 * triangle + axis],
+                ),
+            )
+            middle = (start + end) // 2
+            split = (
+                middle,
+                _range_box(order, start, middle, lows, highs),
+                _range_box(order, middle, end, lows, highs),
+            )
+        middle, left_box, right_box = split
+
+        nodes.extend((axis, 0, 0))
+        # Left child built first, right after the whole left subtree.
+        stack.append((middle, end, right_box, 3 * node + 2))
+        stack.append((start, middle, left_box, 3 * node + 1))
+
+    reordered = array("i")
+    for triangle in order:
+        reordered.extend(indices[3 * triangle : 3 * triangle + 3])
+    return reordered, boxes, nodes
@@ -0,0 +1,368 @@
+"""Spheres (and planes) packed in flat arrays."""
+
+from array import array
+import math
+
+from .. import material
+from ..vec3 import Color, Point3, Vec3
+from ._base import HitRecord
+from .aabb import AABB
+from .bvh import BVH, _BVHNode
+from .hittable_list import HittableList
+from .plane import Plane
+from .sphere import Sphere
+
+
+NO_MATERIAL = -1
+"""int: material id of the grey shaded spheres (without material)."""
+
+_LAMBERTIAN = 0
+_METAL = 1
+_DIELECTRIC = 2
+_DIFFUSE_LIGHT = 3
+
+_MATERIAL_ROW = 5  # kind, r, g, b (albedo or emit), fuzz or index of refraction
+
+
+def pack_materials(materials) -> array:
+    """Flatten materials into a float64 table, see :class:`PackedMaterials`."""
+    table = array("d")
+    for material_ in materials:
+        if isinstance(material_, material.Lambertian):
+            albedo = material_.albedo
+            table.extend((_LAMBERTIAN, albedo.r, albedo.g, albedo.b, 0.0))
+        elif isinstance(material_, material.Metal):
+            albedo = material_.albedo
+            table.extend((_METAL, albedo.r, albedo.g, albedo.b, material_.fuzz))
+        elif isinstance(material_, material.Dielectric):
+            ior = material_.index_of_refraction
+            table.extend((_DIELECTRIC, 0.0, 0.0, 0.0, ior))
+        elif isinstance(material_, material.DiffuseLight):
+            emit = material_.emit
+            table.extend((_DIFFUSE_LIGHT, emit.r, emit.g, emit.b, 0.0))
+        else:
+            raise TypeError(f"Can't pack material {type(material_).__name__}")
+    return table
+
+
+class PackedMaterials:
+    """Materials stored as a flat float64 table.
+
+    Every material takes a row of 5 values: its kind, the albedo (or emitted
+    radiance of a light) RGB and the metal fuzz or dielectric index of
+    refraction. The material objects are
+    built the first time they are looked up.
+    """
+
+    def __init__(self, table):
+        self.table = table
+        self._materials = {}
+
+    def __len__(self):
+        return len(self.table) // _MATERIAL_ROW
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def __getitem__(self, index):
+        material_ = self._materials.get(index)
+        if material_ is None:
+            start = index * _MATERIAL_ROW
+            kind, r, g, b, parameter = self.table[start : start + _MATERIAL_ROW]
+            if kind == _LAMBERTIAN:
+                material_ = material.Lambertian(Color(r, g, b))
+            elif kind == _METAL:
+                material_ = material.Metal(Color(r, g, b), parameter)
+            elif kind == _DIFFUSE_LIGHT:
+                material_ = material.DiffuseLight(Color(r, g, b))
+            else:
+                material_ = material.Dielectric(parameter)
+            self._materials[index] = material_
+        return material_
+
+
+def flatten_bvh(bvh: BVH, index_of) -> tuple:
+    """Flatten a BVH of spheres into arrays, see :class:`PackedSpheres`.
+
+    Args:
+        bvh (BVH): Hierarchy of spheres.
+        index_of (dict): Index of every sphere (by `id`) in the packed arrays.
+
+    Returns:
+        tuple: `(boxes, nodes)` float64 and int32 arrays.
+
+    """
+    boxes = array("d")
+    nodes = array("i")
+
+    def add(item):
+        if not isinstance(item, _BVHNode):
+            return -index_of[id(item)] - 1
+        node = len(nodes) // 3
+        minimum, maximum = item.box.minimum, item.box.maximum
+        boxes.extend((minimum.x, minimum.y, minimum.z, maximum.x, maximum.y, maximum.z))
+        nodes.extend((item.axis, 0, 0))
+        nodes[3 * node + 1] = add(item.left)
+        nodes[3 * node + 2] = add(item.right)
+        return node
+
+    add(bvh.root)
+    return boxes, nodes
+
+
+class PackedSpheres(HittableList):
+    """List of spheres stored as flat arrays, e.g. in a memory-mapped file.
+
+    Rays are intersected straight with the arrays, the :class:`Sphere` objects
+    are only built if the list itself is needed (e.g. to build a :class:`BVH`).
+
+    The spheres may also be partitioned by a flattened bounding volume
+    hierarchy (see :func:`flatten_bvh`): node `n` is the box
+    `bvh_boxes[6n:6n+6]` (min then max corner) and `bvh_nodes[3n:3n+3]` its
+    split axis and children. A child `c >= 0` is node `c`, a negative one the
+    sphere `-c - 1`.
+
+    Infinite planes (e.g. the ground) can be packed along, they are tested
+    before the spheres and come first in :attr:`hittable_list`.
+
+    Args:
+        spheres: Flat float64 buffer of the spheres `x, y, z, radius`.
+        material_ids: int32 buffer, index of the material of every sphere in
+            `materials` or `NO_MATERIAL`.
+        materials: Materials of the spheres, a list or :class:`PackedMaterials`.
+        bvh_boxes: float64 buffer of the BVH node boxes, if any.
+        bvh_nodes: int32 buffer of the BVH node axes and children, if any.
+        planes: Flat float64 buffer of the planes unit normal `x, y, z` and
+            offset (see :class:`Plane`), if any.
+        plane_material_ids: int32 buffer, same as `material_ids` for the
+            planes.
+
+    """
+
+    def __init__(
+        self,
+        spheres,
+        material_ids,
+        materials,
+        bvh_boxes=None,
+        bvh_nodes=None,
+        planes=None,
+        plane_material_ids=None,
+    ):
+        # Not calling `HittableList.__init__`, `hittable_list` is built lazily.
+        self.spheres = spheres
+        self.material_ids = material_ids
+        self.materials = materials
+        self.bvh_boxes = bvh_boxes
+        self.bvh_nodes = bvh_nodes
+        self.planes = planes if planes is not None else array("d")
+        self.plane_material_ids = (
+            plane_material_ids if plane_material_ids is not None else array("i")
+        )
+        self._hittable_list = None
+
+    def __len__(self):
+        return len(self.plane_material_ids) + len(self.material_ids)
+
+    @property
+    def hittable_list(self):
+        """The :class:`Plane` then :class:`Sphere` objects, built on first access."""
+        if self._hittable_list is None:
+            self._hittable_list = [
+                self._plane(index) for index in range(len(self.plane_material_ids))
+            ] + [self.sphere(index) for index in range(len(self.material_ids))]
+        return self._hittable_list
+
+    def sphere(self, index) -> Sphere:
+        """The sphere `index` (in the packed order) as a :class:`Sphere`."""
+        x, y, z, radius = self.spheres[4 * index : 4 * index + 4]
+        return Sphere(Point3(x, y, z), radius, material=self._material(index))
+
+    def _plane(self, index) -> Plane:
+        x, y, z, offset = self.planes[4 * index : 4 * index + 4]
+        normal = Vec3(x, y, z)
+        plane = Plane(offset * normal, normal, material=self._plane_material(index))
+        # The packed values as is, not normalized again, for the same results.
+        plane.normal, plane.offset = normal, offset
+        return plane
+
+    def _material(self, index):
+        material_id = self.material_ids[index]
+        return None if material_id == NO_MATERIAL else self.materials[material_id]
+
+    def _plane_material(self, index):
+        material_id = self.plane_material_ids[index]
+        return None if material_id == NO_MATERIAL else self.materials[material_id]
+
+    def _hit_planes(self, origin, direction, t_min, t_max):
+        """`(t, plane index)` of the closest plane hit, see :class:`Plane`."""
+        planes = self.planes
+        closest = None
+        for index in range(len(self.plane_material_ids)):
+            x, y, z, offset = planes[4 * index : 4 * index + 4]
+            denominator = x * direction.x + y * direction.y + z * direction.z
+            if denominator == 0:
+                continue
+            root = (offset - (x * origin.x + y * origin.y + z * origin.z)) / denominator
+            if t_min <= root <= t_max:
+                t_max, closest = root, index
+        return t_max, closest
+
+    def _intersect(self, index, origin, direction, a, t_min, t_max):
+        """Ray parameter of the hit with a sphere, None if it misses.
+
+        Same computations as :meth:`Sphere.closest_hit`, for the very same results.
+        """
+        x, y, z, radius = self.spheres[4 * index : 4 * index + 4]
+        ox = origin.x - x
+        oy = origin.y - y
+        oz = origin.z - z
+        b = ox * direction.x + oy * direction.y + oz * direction.z
+        c = (ox * ox + oy * oy + oz * oz) - radius * radius
+        discriminant = b * b - a * c
+        if discriminant < 0:
+            return None
+        sqrtd = math.sqrt(discriminant)
+        root = (-b - sqrtd) / a
+        if not t_min <= root <= t_max:
+            root = (-b + sqrtd) / a
+            if not t_min <= root <= t_max:
+                return None
+        return root
+
+    def _box_hit(self, node, origin, direction, t_min, t_max):
+        """Same slab test as :meth:`AABB.hit`."""
+        box = self.bvh_boxes[6 * node : 6 * node + 6]
+        for axis in range(3):
+            start = origin[axis]
+            if direction[axis] == 0:
+                if not box[axis] <= start <= box[axis + 3]:
+                    return False
+                continue
+            inverse = 1.0 / direction[axis]
+            t0 = (box[axis] - start) * inverse
+            t1 = (box[axis + 3] - start) * inverse
+            if inverse < 0.0:
+                t0, t1 = t1, t0
+            if t0 > t_min:
+                t_min = t0
+            if t1 < t_max:
+                t_max = t1
+            if t_max <= t_min:
+                return False
+        return True
+
+    def closest_hit(self, ray, t_min, t_max):
+        """Closest hit, keyed by the sphere index (`-index - 1` for the planes)."""
+        origin = ray.origin
+        direction = ray.direction
+        a = direction.dot(direction)
+        closest = None
+        closest_plane = None
+        if self.plane_material_ids:
+            t_max, closest_plane = self._hit_planes(origin, direction, t_min, t_max)
+
+        if self.bvh_nodes is None:
+            for index in range(len(self.material_ids)):
+                root = self._intersect(index, origin, direction, a, t_min, t_max)
+                if root is not None:
+                    t_max, closest = root, index
+        else:
+            nodes = self.bvh_nodes
+            stack = [0]
+            while stack:
+                node = stack.pop()
+                if node < 0:
+                    index = -node - 1
+                    root = self._intersect(index, origin, direction, a, t_min, t_max)
+                    if root is not None:
+                        t_max, closest = root, index
+                    continue
+                if not self._box_hit(node, origin, direction, t_min, t_max):
+                    continue
+                # Nearest child on top of the stack, see `_BVHNode.closest_hit`.
+                axis, left, right = nodes[3 * node : 3 * node + 3]
+                if direction[axis] < 0:
+                    stack.extend((left, right))
+                else:
+                    stack.extend((right, left))
+
+        if closest is not None:
+            return (t_max, self, closest)
+        if closest_plane is not None:
+            return (t_max, self, -closest_plane - 1)
+        return None
+
+    def occluded(self, ray, t_min, t_max):
+        origin = ray.origin
+        direction = ray.direction
+        if self.plane_material_ids:
+            if self._hit_planes(origin, direction, t_min, t_max)[1] is not None:
+                return True
+        a = direction.dot(direction)
+
+        if self.bvh_nodes is None:
+            for index in range(len(self.material_ids)):
+                root = self._intersect(index, origin, direction, a, t_min, t_max)
+                if root is not None:
+                    return True
+            return False
+
+        nodes = self.bvh_nodes
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                root = self._intersect(-node - 1, origin, direction, a, t_min, t_max)
+                if root is not None:
+                    return True
+            elif self._box_hit(node, origin, direction, t_min, t_max):
+                stack.extend(nodes[3 * node + 1 : 3 * node + 3])
+        return False
+
+    def hit_record(self, ray, t, key):
+        point = ray.origin.mul_add(t, ray.direction)
+        if key < 0:
+            index = -key - 1
+            x, y, z, _ = self.planes[4 * index : 4 * index + 4]
+            material_ = self._plane_material(index)
+            normal = Vec3(x, y, z)
+            if normal.dot(ray.direction) < 0:
+                return HitRecord(t, point, normal, True, material_)
+            return HitRecord(t, point, -normal, False, material_)
+        x, y, z, radius = self.spheres[4 * key : 4 * key + 4]
+        normal = point.sub_mul(Vec3(x, y, z), 1 / radius)
+        record = HitRecord(t, point, normal, material=self._material(key))
+        record.set_face_normal(ray, normal)
+        return record
+
+    def bounding_box(self):
+        if not self.material_ids or self.plane_material_ids:
+            return (False, None)
+        spheres = self.spheres
+        lows = [math.inf] * 3
+        highs = [-math.inf] * 3
+        for start in range(0, len(spheres), 4):
+            radius = spheres[start + 3]
+            for axis in range(3):
+                lows[axis] = min(lows[axis], spheres[start + axis] - radius)
+                highs[axis] = max(highs[axis], spheres[start + axis] + radius)
+        return (True, AABB(Point3(*lows), Point3(*highs)))
+
+    def __getstate__(self):
+        # Copy the buffers, memory maps can't be pickled, and leave the spheres
+        # to be built again on the other side only if needed.
+        state = dict(self.__dict__, _hittable_list=None)
+        state["spheres"] = array("d", self.spheres)
+        state["material_ids"] = array("i", self.material_ids)
+        state["planes"] = array("d", self.planes)
+        state["plane_material_ids"] = array("i", self.plane_material_ids)
+        if self.bvh_boxes is not None:
+            state["bvh_boxes"] = array("d", self.bvh_boxes)
+            state["bvh_nodes"] = array("i", self.bvh_nodes)
+        if isinstance(self.materials, PackedMaterials):
+            state["materials"] = PackedMaterials(array("d", self.materials.table))
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
@@ -0,0 +1,35 @@
+"""Plane hittable object."""
+
+from ._base import Hittable, HitRecord
+
+
+class Plane(Hittable):
+    """Infinite plane through `point`, its front facing `normal`.
+
+    Cheaper than a huge sphere standing in for the ground: a single division
+    per ray, no square root, and no loss of precision far from the origin.
+    """
+
+    def __init__(self, point, normal, material=None):
+        self.point = point
+        self.normal = normal.unit_vector()
+        self.material = material
+        self.offset = self.normal.dot(point)
+
+    def closest_hit(self, ray, t_min, t_max):
+        denominator = self.normal.dot(ray.direction)
+        if denominator == 0:  # parallel
+            return None
+        root = (self.offset - self.normal.dot(ray.origin)) / denominator
+        if not t_min <= root <= t_max:
+            return None
+        return (root, self, None)
+
+    def hit_record(self, ray, t, key):
+        point = ray.origin.mul_add(t, ray.direction)
+        if self.normal.dot(ray.direction) < 0:
+            return HitRecord(t, point, self.normal, True, self.material)
+        return HitRecord(t, point, -self.normal, False, self.material)
+
+    def bounding_box(self):
+        return (False, None)
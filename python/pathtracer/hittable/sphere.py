@@ -1,8 +1,12 @@
 """Sphere hittable object."""
 
 import math
+import random
 
+from ..ray import Ray
+from ..vec3 import Vec3, from_local, random_unit_vector
 from ._base import Hittable, HitRecord
+from .aabb import AABB
 
 
 class Sphere(Hittable):
@@ -13,29 +17,72 @@ class Sphere(Hittable):
         self.radius = radius
         self.material = material
 
-    def hit(self, ray, t_min, t_max):
-        oc = ray.origin - self.center
-        a = ray.direction.dot(ray.direction)
-        b = oc.dot(ray.direction)
-        c = oc.dot(oc) - self.radius * self.radius
+    def closest_hit(self, ray, t_min, t_max):
+        origin = ray.origin
+        direction = ray.direction
+        a = direction.dot(direction)
+        b = origin.sub_dot(self.center, direction)
+        c = origin.distance_squared(self.center) - self.radius * self.radius
         discriminant = b * b - a * c
 
         # Find the nearest root that lies in the acceptable range.
         if discriminant >= 0:
-            root = (-b - math.sqrt(discriminant)) / a
-            if t_min <= root <= t_max:
-                point = ray.point_at_parameter(root)
-                normal = (point - self.center) / self.radius
-                record = HitRecord(root, point, normal, material=self.material)
-                record.set_face_normal(ray, normal)
-                return (True, record)
-
-            root = (-b + math.sqrt(discriminant)) / a
-            if t_min <= root <= t_max:
-                point = ray.point_at_parameter(root)
-                normal = (point - self.center) / self.radius
-                record = HitRecord(root, point, normal, material=self.material)
-                record.set_face_normal(ray, normal)
-                return (True, record)
-
-        return (False, None)
+            sqrtd = math.sqrt(discriminant)
+            root = (-b - sqrtd) / a
+            if not t_min <= root <= t_max:
+                root = (-b + sqrtd) / a
+                if not t_min <= root <= t_max:
+                    return None
+            return (root, self, None)
+
+        return None
+
+    def hit_record(self, ray, t, key):
+        point = ray.origin.mul_add(t, ray.direction)
+        normal = point.sub_mul(self.center, 1 / self.radius)
+        record = HitRecord(t, point, normal, material=self.material)
+        record.set_face_normal(ray, normal)
+        return record
+
+    def sample_direction(self, origin, rng=random):
+        """Random unit direction from `origin` towards the sphere, for lighting.
+
+        Uniform over the cone of directions the sphere subtends, any direction
+        from inside it.
+
+        Returns:
+            tuple: `(direction, pdf)`, the direction and its probability density
+                per solid angle, see :meth:`direction_pdf`.
+
+        """
+        to_center = self.center - origin
+        distance_squared = to_center.squared_length()
+        sin_squared = self.radius * self.radius / distance_squared
+        if sin_squared >= 1.0:
+            return random_unit_vector(rng=rng), 1.0 / (4.0 * math.pi)
+        # 1 - cos of the cone half angle, without cancellation for small ones.
+        height = sin_squared / (1.0 + math.sqrt(1.0 - sin_squared))
+        cosine = 1.0 - rng.random() * height
+        phi = rng.uniform(0.0, 2.0 * math.pi)
+        sine = math.sqrt(max(0.0, 1.0 - cosine * cosine))
+        direction = from_local(
+            to_center / math.sqrt(distance_squared),
+            sine * math.cos(phi),
+            sine * math.sin(phi),
+            cosine,
+        )
+        return direction, 1.0 / (2.0 * math.pi * height)
+
+    def direction_pdf(self, origin, direction) -> float:
+        """Density of :meth:`sample_direction` drawing `direction`, 0 if it misses."""
+        if self.closest_hit(Ray(origin, direction), 0.0, math.inf) is None:
+            return 0.0
+        sin_squared = self.radius * self.radius / origin.distance_squared(self.center)
+        if sin_squared >= 1.0:
+            return 1.0 / (4.0 * math.pi)
+        height = sin_squared / (1.0 + math.sqrt(1.0 - sin_squared))
+        return 1.0 / (2.0 * math.pi * height)
+
+    def bounding_box(self):
+        extent = Vec3(self.radius, self.radius, self.radius)
+        return (True, AABB(self.center - extent, self.center + extent))
@@ -0,0 +1,121 @@
+"""Direct light sampling (next event estimation).
+
+Paths only gather the light of the emitting objects they happen to bounce
+into, hopelessly rare for small lights. At every diffuse hit, a randomly chosen
+light is also sampled explicitly and its light added unless something shadows
+it, as tested by a shadow ray (see :meth:`Hittable.occluded`).
+
+A light is then reached by two sampling strategies, the light sampling and the
+bounce (BSDF) sampling of the path: both contributions are weighted with the
+power heuristic of their densities (multiple importance sampling), so the light
+isn't counted twice and each strategy dominates where it has the least noise,
+small lights through light sampling, large ones through bounces.
+
+Spheres (sampled by the cone they subtend) and disks (by area) can be sampled
+as lights, other emitting objects are only reached by bounces.
+"""
+
+import math
+
+from .hittable import BVH, Disk, HittableList, PackedSpheres, Sphere, UniformGrid
+from .ray import Ray
+from . import raystats
+
+
+SAMPLED_SHAPES = (Sphere, Disk)
+"""tuple: classes of the objects that can be sampled as lights."""
+
+_T_MIN = 0.0001  # see `render.ray_color`
+
+
+def find_lights(world) -> list:
+    """The objects of a world that can be sampled as lights.
+
+    Those of :data:`SAMPLED_SHAPES` with an emitting material, e.g. a
+    :class:`material.DiffuseLight`.
+    """
+    if isinstance(world, PackedSpheres):
+        emitting = {
+            index
+            for index, material_ in enumerate(world.materials)
+            if material_.emit is not None
+        }
+        return [
+            world.sphere(index)
+            for index, material_id in enumerate(world.material_ids)
+            if material_id in emitting
+        ]
+    if isinstance(world, (BVH, UniformGrid)):
+        objects = world.objects
+    else:
+        objects = world.hittable_list
+    lights = []
+    for item in objects:
+        if isinstance(item, HittableList):
+            # Nested, e.g. the spheres of a scene file along its meshes.
+            lights.extend(find_lights(item))
+        elif (
+            isinstance(item, SAMPLED_SHAPES)
+            and item.material is not None
+            and item.material.emit is not None
+        ):
+            lights.append(item)
+    return lights
+
+
+def power_heuristic(pdf: float, other_pdf: float) -> float:
+    """MIS weight of a sample of density `pdf`, `other_pdf` for the other strategy."""
+    pdf *= pdf
+    return pdf / (pdf + other_pdf * other_pdf)
+
+
+def sample_direct(lights, world, record, rng):
+    """Light reaching a Lambertian hit straight from a random light, MIS weighted.
+
+    Args:
+        lights (list): Light objects, see :data:`SAMPLED_SHAPES`.
+        world (Hittable): Scene, to cast the shadow ray.
+        record (HitRecord): Hit on a :class:`material.Lambertian`.
+        rng: Random numbers source, see :func:`vec3.Vec3.random`.
+
+    Returns:
+        Color: Radiance reflected along the path, to be multiplied by its
+            throughput, None if the light is shadowed or behind the hit.
+
+    """
+    count = len(lights)
+    light = lights[min(int(rng.random() * count), count - 1)]
+    direction, pdf = light.sample_direction(record.point, rng=rng)
+    cosine = direction.dot(record.normal)
+    if pdf <= 0.0 or cosine <= 0.0:
+        return None
+    shadow_ray = Ray(record.point, direction)
+    closest = light.closest_hit(shadow_ray, _T_MIN, math.inf)
+    if closest is None:
+        return None
+    stats = raystats.current
+    if stats is not None:
+        stats.shadow_rays += 1
+    if world.occluded(shadow_ray, _T_MIN, closest[0] - _T_MIN):
+        return None
+
+    pdf /= count  # of choosing the light too
+    bsdf_pdf = cosine / math.pi  # of the cosine weighted bounce
+    weight = power_heuristic(pdf, bsdf_pdf)
+    # albedo / pi (the Lambertian BRDF) * emitted * cosine / pdf
+    return (weight * bsdf_pdf / pdf) * (record.material.albedo * light.material.emit)
+
+
+def lights_pdf(lights, ray, t: float) -> float:
+    """Density of the light sampling drawing the direction of a ray hitting a light.
+
+    Only the lights hit first, at `t`, count: the light sampling could not
+    reach the others along the ray, shadowed. 0 if the ray hit an emitting
+    object which isn't in the lights.
+    """
+    pdf = 0.0
+    for light in lights:
+        # The closest hit at `t` is computed the very same way by the light.
+        if light.closest_hit(ray, _T_MIN, t) is not None:
+            pdf += light.direction_pdf(ray.origin, ray.direction)
+    return pdf / len(lights)
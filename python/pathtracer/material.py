@@ -7,8 +7,8 @@ import random
 from .ray import Ray
 from .vec3 import (
     Color,
+    random_cosine_direction,
     random_in_unit_sphere,
-    random_unit_vector,
     reflect,
     refract,
 )
@@ -27,8 +27,18 @@ _RayAttenuation = namedtuple("RayAttenuation", ["scatter", "attenuation", "scatt
 class _Material:
     """Base material class implementation."""
 
-    def scatter(self, ray_in, record):
-        """Whether we should scatter the light and how."""
+    emit = None
+    """Color: radiance emitted by the material, None if it emits no light."""
+
+    def scatter(self, ray_in, record, rng=random):
+        """Whether we should scatter the light and how.
+
+        Args:
+            ray_in (Ray): Incoming ray.
+            record (HitRecord): Where the ray hit the material.
+            rng: Random numbers source, see :func:`vec3.Vec3.random`.
+
+        """
         raise NotImplementedError
 
 
@@ -39,12 +49,10 @@ class Lambertian(_Material):
         super().__init__()
         self.albedo = albedo
 
-    def scatter(self, ray_in, record):
-        scatter_direction = record.normal + random_unit_vector()
-
-        # Catch degenerate scatter direction to avoid inf and NaNs.
-        if scatter_direction.near_zero():
-            scatter_direction = record.normal
+    def scatter(self, ray_in, record, rng=random):
+        # Cosine weighted around the normal, never degenerate unlike the
+        # book's `normal + random_unit_vector()` of the same distribution.
+        scatter_direction = random_cosine_direction(record.normal, rng=rng)
 
         scattered = Ray(record.point, scatter_direction)
         attenuation = self.albedo
@@ -64,9 +72,11 @@ class Metal(_Material):
         self.albedo = albedo
         self.fuzz = fuzz if fuzz < 1 else 1.0
 
-    def scatter(self, ray_in, record):
+    def scatter(self, ray_in, record, rng=random):
         reflected = reflect(ray_in.direction.unit_vector(), record.normal)
-        scattered = Ray(record.point, reflected + self.fuzz * random_in_unit_sphere())
+        scattered = Ray(
+            record.point, reflected + self.fuzz * random_in_unit_sphere(rng=rng)
+        )
         attenuation = self.albedo
 
         return _RayAttenuation(
@@ -90,7 +100,7 @@ class Dielectric(_Material):
         r0 = r0 * r0
         return r0 + (1 - r0) * pow((1 - cosine), 5)
 
-    def scatter(self, ray_in, record):
+    def scatter(self, ray_in, record, rng=random):
         if record.front_face:
             refraction_ratio = 1.0 / self.index_of_refraction
         else:
@@ -103,7 +113,7 @@ class Dielectric(_Material):
         cannot_refract = refraction_ratio * sin_theta > 1.0
         if (
             cannot_refract
-            or self.reflectance(cos_theta, refraction_ratio) > random.random()
+            or self.reflectance(cos_theta, refraction_ratio) > rng.random()
         ):
             # cannot refract, so we reflect
             direction = reflect(unit_direction, record.normal)
@@ -116,3 +126,22 @@ class Dielectric(_Material):
             attenuation=Color(1.0, 1.0, 1.0),  # glass surface absorbs nothing
             scattered=scattered,
         )
+
+
+class DiffuseLight(_Material):
+    """Light emitting material, the same radiance in every direction.
+
+    Both faces of the objects emit and nothing is reflected. Spheres and disks
+    made of it are sampled explicitly as lights, see :mod:`pathtracer.light`.
+    """
+
+    def __init__(self, emit):
+        super().__init__()
+        self.emit = emit
+
+    def scatter(self, ray_in, record, rng=random):
+        return _RayAttenuation(
+            scatter=False,
+            attenuation=Color(0.0, 0.0, 0.0),
+            scattered=None,
+        )
@@ -0,0 +1,75 @@
+"""Wavefront OBJ meshes.
+
+Only the geometry is read: the vertex positions (`v`) and the faces (`f`),
+polygons being split into fans of triangles. Texture coordinates, normals,
+groups and materials are skipped, the whole mesh takes a single material.
+
+The file is streamed line by line into flat arrays (see
+:class:`TriangleMesh`), a mesh of millions of triangles takes 24 bytes per
+vertex and 12 per triangle while loading, however large the file.
+"""
+
+from array import array
+
+from .hittable import TriangleMesh
+
+
+def _vertex_index(token: str, count: int) -> int:
+    """0-based index of the vertex of a face corner `v`, `v/vt`, `v//vn`..."""
+    index = int(token.split("/", 1)[0])
+    if index == 0:
+        raise ValueError(f"vertex index 0 in {token!r}, indices start at 1")
+    # 1-based, or relative to the last vertex read when negative.
+    return index - 1 if index > 0 else count + index
+
+
+def read(path) -> tuple:
+    """Read the geometry of an OBJ file.
+
+    Returns:
+        tuple: `(vertices, indices)` float64 and int32 arrays, see
+            :class:`TriangleMesh`.
+
+    Raises:
+        ValueError: For malformed lines and faces referring to missing
+            vertices.
+
+    """
+    vertices = array("d")
+    indices = array("i")
+    count = 0  # vertices read so far
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields:
+                continue
+            kind = fields[0]
+            try:
+                if kind == "v":
+                    vertices.extend(
+                        (float(fields[1]), float(fields[2]), float(fields[3]))
+                    )
+                    count += 1
+                elif kind == "f":
+                    corners = [_vertex_index(token, count) for token in fields[1:]]
+                    if len(corners) < 3:
+                        raise ValueError("a face needs 3 vertices at least")
+                    for corner in corners:
+                        if not 0 <= corner < count:
+                            raise ValueError(f"vertex {corner + 1} isn't defined")
+                    first = corners[0]
+                    for second, third in zip(corners[1:], corners[2:]):
+                        indices.extend((first, second, third))
+            except (IndexError, ValueError) as error:
+                raise ValueError(
+                    f"{path}:{number}: bad {kind!r} line: {error}"
+                ) from None
+    return vertices, indices
+
+
+def load(path, material=None) -> TriangleMesh:
+    """Load an OBJ file as a mesh of the given material."""
+    vertices, indices = read(path)
+    if not indices:
+        raise ValueError(f"{path} has no faces")
+    return TriangleMesh(vertices, indices, material=material)
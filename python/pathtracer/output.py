@@ -0,0 +1,99 @@
+"""Image output.
+
+The renderer produces a framebuffer of linear float RGB values (already
+averaged over the samples), stored as a flat `array("f")` with the rows from
+top to bottom. The writers here dump it to disk in bulk.
+"""
+
+from array import array
+import enum
+import math
+import struct
+import sys
+import zlib
+
+
+FORMAT = enum.Enum("FORMAT", ["PPM", "PNG", "PFM"])
+"""enum: image file format.
+
+- PPM: binary (P6) 8 bit portable pixmap.
+- PNG: 8 bit RGB png.
+- PFM: 32 bit float portable float map, linear HDR values for compositing.
+
+"""
+
+EXTENSIONS = {
+    FORMAT.PPM: "ppm",
+    FORMAT.PNG: "png",
+    FORMAT.PFM: "pfm",
+}
+
+
+def to_bytes(framebuffer) -> bytes:
+    """Gamma correct (gamma=2.0) and quantize the framebuffer to 8 bits."""
+    sqrt = math.sqrt
+    # Same as `Color.as_string`: clamp to [0, 0.999] before scaling to 256.
+    return bytes(
+        int(256 * min(sqrt(value), 0.999)) if value > 0 else 0 for value in framebuffer
+    )
+
+
+def write_ppm(path, framebuffer, resx, resy):
+    """Write a binary (P6) ppm image."""
+    with open(path, "wb") as f:
+        f.write(f"P6\n{resx} {resy}\n255\n".encode("ascii"))
+        f.write(to_bytes(framebuffer))
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return (
+        struct.pack(">I", len(data))
+        + chunk_type
+        + data
+        + struct.pack(">I", zlib.crc32(chunk_type + data))
+    )
+
+
+def write_png(path, framebuffer, resx, resy):
+    """Write an 8 bit RGB png image."""
+    pixels = to_bytes(framebuffer)
+    stride = resx * 3
+    # Every scanline is prefixed by its filter type, 0 i.e. no filter.
+    scanlines = b"".join(
+        b"\x00" + pixels[start : start + stride]
+        for start in range(0, len(pixels), stride)
+    )
+
+    header = struct.pack(">IIBBBBB", resx, resy, 8, 2, 0, 0, 0)  # 8 bit RGB
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(_png_chunk(b"IHDR", header))
+        f.write(_png_chunk(b"IDAT", zlib.compress(scanlines, 6)))
+        f.write(_png_chunk(b"IEND", b""))
+
+
+def write_pfm(path, framebuffer, resx, resy):
+    """Write a linear float RGB pfm image."""
+    stride = resx * 3
+    # PFM stores the rows from bottom to top.
+    data = array("f")
+    for start in range(len(framebuffer) - stride, -1, -stride):
+        data.extend(framebuffer[start : start + stride])
+
+    # The sign of the scale tells the byte order, negative is little endian.
+    scale = -1.0 if sys.byteorder == "little" else 1.0
+    with open(path, "wb") as f:
+        f.write(f"PF\n{resx} {resy}\n{scale}\n".encode("ascii"))
+        f.write(data.tobytes())
+
+
+_WRITERS = {
+    FORMAT.PPM: write_ppm,
+    FORMAT.PNG: write_png,
+    FORMAT.PFM: write_pfm,
+}
+
+
+def write(path, framebuffer, resx, resy, image_format=FORMAT.PPM):
+    """Write the framebuffer to disk in the given format."""
+    _WRITERS[image_format](path, framebuffer, resx, resy)
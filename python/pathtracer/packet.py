@@ -0,0 +1,161 @@
+"""Packet tracing of camera rays.
+
+The camera rays through a block of neighbouring pixels (all their samples
+included) are coherent: they all leave the lens and cross the focus plane
+within the block. Instead of testing every one of them against every sphere,
+the spheres the whole packet can't hit are culled first, once per block, and
+the camera rays are intersected with the remaining candidates only. Paths go
+on with single rays against the whole world from their first bounce, where
+coherence is lost.
+
+The culling is done in camera space, with the camera basis `u, v` and the
+depth `d` along `-w`: a ray leaving the lens at `l` through the focus plane
+(depth `f`) at `p` is at `l + (p - l) * d / f` at depth `d`. Over the depth
+range of a sphere this spans an interval of `x` (and `y`) for the lens square
+`[-r, r]` and the block of the focus plane, spheres outside of it are missed by
+the whole packet. The test is conservative and the candidates keep the world
+order, so renders are exactly the same as with single rays.
+
+Only flat worlds are culled, BVHs already cull whole subtrees. Their spheres
+(and disks, bounded by the sphere of the same radius) are culled, other objects
+(planes, boxes) are candidates of every packet.
+"""
+
+from array import array
+
+from .hittable import HittableList, PackedSpheres
+
+
+PACKET_SIZE = 8
+"""int: default width and height of the packets in pixels."""
+
+_MARGIN = 1e-6  # relative, against rounding errors
+
+
+def _centers(world):
+    """`(center, radius)` of the spheres of a flat world, None otherwise.
+
+    The objects without center and radius have None instead.
+    """
+    if isinstance(world, PackedSpheres):
+        if world.bvh_nodes is not None:
+            return None
+        data = world.spheres
+        # The planes come first in the objects, see `PackedSpheres.hittable_list`.
+        return [None] * len(world.plane_material_ids) + [
+            ((data[start], data[start + 1], data[start + 2]), data[start + 3])
+            for start in range(0, len(data), 4)
+        ]
+    if not isinstance(world, HittableList):
+        return None
+    centers = []
+    for item in world.hittable_list:
+        center = getattr(item, "center", None)
+        radius = getattr(item, "radius", None)
+        if center is None or radius is None:
+            centers.append(None)
+            continue
+        centers.append(((center.x, center.y, center.z), radius))
+    return centers
+
+
+def camera_spheres(world, camera) -> list:
+    """Spheres of a flat world prepared for :func:`cull`, None if not flat.
+
+    Returns:
+        list: `(x, y, radius, near_scale, far_scale, near_lens, far_lens)` of
+            each sphere: its center in camera space, its radius (with a
+            margin) and the ray offsets at its nearest and farthest depths,
+            see the module doc. None for the objects never culled.
+
+    """
+    centers = _centers(world)
+    if centers is None:
+        return None
+
+    origin = camera.origin
+    u, v, w = camera.u, camera.v, camera.w
+    focus = camera.focus_dist
+    lens_radius = camera.lens_radius
+    spheres = []
+    for center in centers:
+        if center is None:
+            spheres.append(None)
+            continue
+        (cx, cy, cz), radius = center
+        rx, ry, rz = cx - origin.x, cy - origin.y, cz - origin.z
+        x = rx * u.x + ry * u.y + rz * u.z
+        y = rx * v.x + ry * v.y + rz * v.z
+        depth = -(rx * w.x + ry * w.y + rz * w.z)
+        radius += _MARGIN * (radius + abs(x) + abs(y) + abs(depth) + 1.0)
+        near_scale = max(depth - radius, 0.0) / focus
+        far_scale = (depth + radius) / focus
+        spheres.append(
+            (
+                x,
+                y,
+                radius,
+                near_scale,
+                far_scale,
+                lens_radius * abs(1.0 - near_scale),
+                lens_radius * abs(1.0 - far_scale),
+            )
+        )
+    return spheres
+
+
+def cull(spheres, camera, u_range, v_range) -> list:
+    """Indices of the spheres a packet of camera rays may hit.
+
+    Args:
+        spheres (list): See :func:`camera_spheres`.
+        camera (Camera): Camera of the rays.
+        u_range (tuple): `(low, high)` of the horizontal film coordinates
+            (`s` of :meth:`Camera.get_ray`) of the rays.
+        v_range (tuple): Same for the vertical coordinates (`t`).
+
+    """
+    focus = camera.focus_dist
+    width = focus * camera.viewport_width
+    height = focus * camera.viewport_height
+    x_low, x_high = width * (u_range[0] - 0.5), width * (u_range[1] - 0.5)
+    y_low, y_high = height * (v_range[0] - 0.5), height * (v_range[1] - 0.5)
+
+    candidates = []
+    for index, sphere in enumerate(spheres):
+        if sphere is None:
+            candidates.append(index)
+            continue
+        x, y, radius, near, far, near_lens, far_lens = sphere
+        if far <= 0.0:  # behind the camera
+            continue
+        if x + radius < min(near * x_low - near_lens, far * x_low - far_lens):
+            continue
+        if x - radius > max(near * x_high + near_lens, far * x_high + far_lens):
+            continue
+        if y + radius < min(near * y_low - near_lens, far * y_low - far_lens):
+            continue
+        if y - radius > max(near * y_high + near_lens, far * y_high + far_lens):
+            continue
+        candidates.append(index)
+    return candidates
+
+
+def restrict(world, indices):
+    """The objects of a flat world at `indices`, in the same order."""
+    if isinstance(world, PackedSpheres):
+        spheres = array("d")
+        material_ids = array("i")
+        first_sphere = len(world.plane_material_ids)  # planes are never culled
+        for index in indices[first_sphere:]:
+            index -= first_sphere
+            spheres.extend(world.spheres[4 * index : 4 * index + 4])
+            material_ids.append(world.material_ids[index])
+        return PackedSpheres(
+            spheres,
+            material_ids,
+            world.materials,
+            planes=world.planes,
+            plane_material_ids=world.plane_material_ids,
+        )
+    return HittableList([world.hittable_list[index] for index in indices])
@@ -0,0 +1,153 @@
+"""Progressive rendering checkpoints.
+
+A progressive render goes over the whole frame in passes of a few samples per
+pixel, summing them into a float accumulation buffer. The buffer lives in a
+memory-mapped checkpoint file so an interrupted render can be resumed from the
+last pass saved.
+
+A checkpoint is made of two files:
+
+- `<path>`: float64 values, the number of samples accumulated (-1 while a
+  pass is being added) followed by the summed linear RGB values of every
+  pixel, rows from top to bottom.
+- `<path>.json`: the render settings, so the very same scene and random
+  streams can be set up again when resuming.
+
+Since the random numbers are keyed by image seed, pixel, sample and bounce (see
+:mod:`pathtracer.rng`), the sample count is all the random state there is to
+save: resuming renders exactly the samples an uninterrupted render would have.
+
+The passes are summed straight into the mapping, with numpy when it is
+installed (an optional dependency, see :mod:`pathtracer.wavefront`).
+"""
+
+from array import array
+from itertools import repeat
+import json
+import mmap
+from operator import add, mul
+import os
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+
+_ITEM_SIZE = array("d").itemsize
+
+
+class Checkpoint:
+    """Accumulation buffer memory-mapped to a checkpoint file.
+
+    Args:
+        path (str): Checkpoint file path.
+        metadata (dict): Render settings stored along the buffer, at the very
+            least `resx` and `resy`.
+
+    """
+
+    def __init__(self, path, metadata):
+        self.path = path
+        self.metadata = metadata
+        self._file = None
+        self._mmap = None
+        self._view = None
+
+    @property
+    def size(self) -> int:
+        """Number of float values in the accumulation buffer."""
+        return 3 * self.metadata["resx"] * self.metadata["resy"]
+
+    @classmethod
+    def create(cls, path, metadata):
+        """Create a new empty checkpoint, replacing any existing one."""
+        checkpoint = cls(path, metadata)
+        with open(path, "wb") as f:
+            f.truncate((1 + checkpoint.size) * _ITEM_SIZE)
+        _write_json(f"{path}.json", metadata)
+        checkpoint._map()
+        return checkpoint
+
+    @classmethod
+    def load(cls, path):
+        """Open an existing checkpoint."""
+        with open(f"{path}.json", encoding="utf-8") as f:
+            metadata = json.load(f)
+        checkpoint = cls(path, metadata)
+        expected = (1 + checkpoint.size) * _ITEM_SIZE
+        if os.path.getsize(path) != expected:
+            raise ValueError(
+                f"Checkpoint {path} is corrupted: expected {expected} bytes, "
+                f"found {os.path.getsize(path)}"
+            )
+        checkpoint._map()
+        if checkpoint._view[0] < 0:
+            checkpoint.close()
+            raise ValueError(
+                f"Checkpoint {path} is corrupted: interrupted while adding a pass"
+            )
+        return checkpoint
+
+    def _map(self):
+        self._file = open(self.path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._view = memoryview(self._mmap).cast("d")
+
+    @property
+    def samples(self) -> int:
+        """Number of samples per pixel accumulated so far."""
+        return int(self._view[0])
+
+    def accumulate(self, framebuffer, samples):
+        """Add a pass to the accumulation buffer, in place.
+
+        The sample count is marked invalid while the buffer is updated, so an
+        interrupt can't leave a buffer silently out of sync with its count:
+        such a checkpoint fails to load instead.
+
+        Args:
+            framebuffer (array): Linear RGB values of the pass, averaged over
+                its samples (see :mod:`pathtracer.output`).
+            samples (int): Samples per pixel of the pass.
+
+        """
+        done = self.samples + samples
+        self._view[0] = -1.0
+        if np is not None:
+            values = np.frombuffer(self._view, dtype=np.float64)[1:]
+            values += np.asarray(framebuffer, dtype=np.float64) * samples
+        else:
+            passed = map(mul, framebuffer, repeat(samples))
+            self._view[1:] = array("d", map(add, self._view[1:], passed))
+        self._view[0] = done
+        self._mmap.flush()
+
+    def preview(self) -> array:
+        """Framebuffer of the mean linear RGB values accumulated so far."""
+        scale = 1 / self.samples
+        if np is not None:
+            values = np.frombuffer(self._view, dtype=np.float64)[1:] * scale
+            return array("f", values.astype(np.float32).tobytes())
+        return array("f", map(mul, self._view[1:], repeat(scale)))
+
+    def close(self):
+        """Unmap and close the checkpoint file."""
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+            self._file.close()
+            self._view = self._mmap = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _write_json(path, data):
+    """Write json atomically, so a checkpoint never has half its metadata."""
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(f"{path}.tmp", path)
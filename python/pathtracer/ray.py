@@ -6,6 +6,8 @@ from .vec3 import Vec3
 class Ray:
     """Ray."""
 
+    __slots__ = ("_origin", "_direction")
+
     def __init__(self, origin: Vec3 = Vec3(), direction: Vec3 = Vec3()):
         self._origin = origin
         self._direction = direction
@@ -30,7 +32,7 @@ class Ray:
 
     def point_at_parameter(self, parameter: float):
         """Ray point at parameter."""
-        return self._origin + parameter * self._direction
+        return self._origin.mul_add(parameter, self._direction)
 
     def __str__(self):
         return f"{self._origin} {self._direction}"
@@ -0,0 +1,118 @@
+"""Ray statistics.
+
+Opt-in counters of what a render does: the rays cast, how their paths ended,
+the shadow rays, the intersection tests and the scattering per material. Every
+worker process counts into its own :data:`current` stats, one per tile
+rendered, which the main process merges back.
+
+The render hot paths only look the counters up when :data:`current` isn't
+None, and the intersection tests are counted by wrapping the scene objects
+(see :func:`instrument`), so renders without stats pay next to nothing.
+"""
+
+from collections import Counter
+import enum
+
+from .hittable import BVH, HittableList, PackedSpheres, UniformGrid
+from .hittable._base import Hittable
+
+
+TERMINATION = enum.Enum(
+    "TERMINATION", ["ESCAPED", "ABSORBED", "LIGHT", "ROULETTE", "MAX_DEPTH"]
+)
+"""enum: how a path ended.
+
+- ESCAPED: to the sky.
+- ABSORBED: by a material not scattering it.
+- LIGHT: on a light (emitting material).
+- ROULETTE: randomly terminated by Russian roulette.
+- MAX_DEPTH: cut short at the max bounce.
+
+"""
+
+GREY = "grey"
+"""str: material name of the grey shaded objects (without material)."""
+
+current = None
+"""RayStats: stats collected by this process, None when disabled."""
+
+
+class RayStats:
+    """Ray counters of a render, or of part of it."""
+
+    def __init__(self):
+        self.primary_rays = 0
+        self.secondary_rays = 0
+        self.shadow_rays = 0
+        self.intersection_tests = 0
+        self.terminations = Counter()
+        self.scatters = Counter()
+
+    @property
+    def rays(self) -> int:
+        """All the rays cast along the paths (not the shadow rays)."""
+        return self.primary_rays + self.secondary_rays
+
+    def end_path(self, rays: int, termination):
+        """Count a path of `rays` rays (the camera ray included)."""
+        self.primary_rays += 1
+        self.secondary_rays += rays - 1
+        self.terminations[termination] += 1
+
+    def merge(self, other):
+        """Add up the counters of other stats."""
+        self.primary_rays += other.primary_rays
+        self.secondary_rays += other.secondary_rays
+        self.shadow_rays += other.shadow_rays
+        self.intersection_tests += other.intersection_tests
+        self.terminations.update(other.terminations)
+        self.scatters.update(other.scatters)
+
+    def to_dict(self) -> dict:
+        """The counters as a json serializable dict."""
+        return {
+            "primary_rays": self.primary_rays,
+            "secondary_rays": self.secondary_rays,
+            "shadow_rays": self.shadow_rays,
+            "intersection_tests": self.intersection_tests,
+            "terminations": {
+                termination.name.lower(): self.terminations[termination]
+                for termination in TERMINATION
+            },
+            "scatters": dict(self.scatters),
+        }
+
+
+class _CountedHittable(Hittable):
+    """Object counting its intersection tests into the :data:`current` stats."""
+
+    def __init__(self, item):
+        self.item = item
+
+    def __getattr__(self, name):
+        # The geometry of the object, e.g. the center and radius of a sphere.
+        return getattr(self.item, name)
+
+    def closest_hit(self, ray, t_min, t_max):
+        current.intersection_tests += 1
+        return self.item.closest_hit(ray, t_min, t_max)
+
+    def occluded(self, ray, t_min, t_max):
+        current.intersection_tests += 1
+        return self.item.occluded(ray, t_min, t_max)
+
+    def bounding_box(self):
+        return self.item.bounding_box()
+
+
+def instrument(world):
+    """Same world, counting the intersection tests of each of its objects."""
+    if isinstance(world, BVH):
+        return BVH(_CountedHittable(item) for item in world.objects)
+    if isinstance(world, UniformGrid):
+        return UniformGrid(_CountedHittable(item) for item in world.objects)
+    if isinstance(world, PackedSpheres) and world.bvh_nodes is not None:
+        return BVH(_CountedHittable(item) for item in world.hittable_list)
+    if isinstance(world, HittableList):
+        return HittableList([_CountedHittable(item) for item in world.hittable_list])
+    return _CountedHittable(world)
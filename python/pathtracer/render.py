@@ -1,24 +1,46 @@
 """Render."""
 
+from array import array
 from collections import namedtuple
+import contextlib
+import csv
 import enum
 import functools
+import json
 import math
 import multiprocessing
+import os
 import random
+import time
 
 from .camera import Camera
 from .hittable import HittableList
+from . import adaptive
+from . import animation
+from . import distributed
+from . import light
+from . import material
+from . import output
+from . import packet
+from .progressive import Checkpoint
 from .ray import Ray
-from .scene import construct_scene
+from . import raystats
+from .raystats import TERMINATION
+from .rng import LIGHT_BOUNCE, ROULETTE_BOUNCE, SampleRng
+from .sampler import SAMPLER, rng_factory
+from .scene import ACCELERATOR, GROUND, LIGHTING, accelerate, construct_scene
+from . import scenefile
+from . import sharedmemory
+from . import sharedscene
 from .vec3 import (
     Color,
     Point3,
     Vec3,
+    random_cosine_direction,
     random_in_hemisphere,
     random_in_unit_sphere,
-    random_unit_vector,
 )
+from . import wavefront
 
 
 _BLACK = Color(0.0, 0.0, 0.0)
@@ -27,10 +49,29 @@ _LIGHT_BLUE = Color(0.5, 0.7, 1.0)
 
 DIFFUSE_MODE = enum.Enum("DIFFUSE_MODE", ["SIMPLE", "LAMBERTIAN", "ALTERNATE"])
 
+ENGINE = enum.Enum("ENGINE", ["SCALAR", "NUMPY"])
+"""enum: render engine.
+
+- SCALAR: trace one :class:`Ray` at a time through :func:`ray_color`.
+- NUMPY: trace whole batches of rays with :mod:`pathtracer.wavefront`.
+
+"""
+
+ROULETTE_DEPTH = 5
+"""int: default number of bounces after which paths play Russian roulette, see
+:func:`ray_color`."""
+
 _PROCESSES = multiprocessing.cpu_count()
 
+_TILE_SIZE = 32  # default tile width and height in pixels
+
+# Render settings of the pool worker processes, see `_init_worker`.
+_WORKER_SETTINGS = {}
+
 _SceneSettings = namedtuple(
-    "_SceneSettings", ["resx", "resy", "camera", "samples", "max_depth", "world"]
+    "_SceneSettings",
+    ["resx", "resy", "camera", "samples", "max_depth", "world", "background", "lights"],
+    defaults=(None, ()),
 )
 """tuple: for use as the :func:`_image` parameters.
 
@@ -40,87 +81,554 @@ _SceneSettings = namedtuple(
 - samples (int): AA samples.
 - max_depth (int): Max bounce.
 - world (HittableList): Scene description.
+- background (Color): Uniform sky color, None for the sky gradient.
+- lights (list): Objects of the world sampled as lights, see
+  :mod:`pathtracer.light`.
+
+"""
+
+_Tile = namedtuple("_Tile", ["x", "y", "width", "height"])
+"""tuple: block of pixels rendered as a single task.
+
+- x (int): First pixel column.
+- y (int): First scanline, counted from the bottom of the image.
+- width (int): Width in pixels.
+- height (int): Height in pixels.
+
+"""
+
+_TileTiming = namedtuple("_TileTiming", ["tile", "seconds", "worker"])
+"""tuple: render time of a tile.
+
+- tile (_Tile): The tile rendered.
+- seconds (float): Time it took to render.
+- worker (int): Process id of the worker that rendered it.
 
 """
 
 
 def ray_color(
-    ray: Ray, world: HittableList, depth: int, diffuse_mode=DIFFUSE_MODE.SIMPLE
+    ray: Ray,
+    world: HittableList,
+    depth: int,
+    diffuse_mode=DIFFUSE_MODE.SIMPLE,
+    rng=None,
+    roulette_depth=None,
+    first_hit=None,
+    lights=None,
+    background=None,
 ) -> Vec3:
-    """Calculate pixel color."""
-    # Protect against recursion limit:
-    # If we have exceeded the ray bounce limit, no more light is gathered.
-    if depth <= 0:
-        return _BLACK
+    """Calculate pixel color.
+
+    Follows the path of the ray for at most `depth` bounces, carrying its
+    throughput (the product of the attenuations met so far) and gathering the
+    light of the emitting objects it hits, until it escapes to the sky. After
+    `roulette_depth` bounces, paths are randomly terminated with
+    a probability growing as their throughput darkens and the survivors are
+    weighted up to compensate (Russian roulette), so long dark paths are cut
+    short without biasing the image. `None` never terminates paths early.
+
+    At every Lambertian hit one of the `lights` is also sampled explicitly
+    (next event estimation), see :mod:`pathtracer.light`. Without lights, the
+    emitting objects are only found by chance.
+
+    The sky is a white to blue gradient, or a uniform `background` color.
+
+    `rng` is the :class:`SampleRng` of the pixel sample being rendered, each
+    bounce draws its own numbers from it, keyed by the bounce number. Defaults
+    to a randomly seeded one.
+
+    `first_hit` is the `(hit, record)` of the ray if already intersected with
+    the world, e.g. as part of a packet (see :mod:`pathtracer.packet`).
+    """
+    if rng is None:
+        rng = SampleRng(random.getrandbits(64), 0, 0)
+    stats = raystats.current
+
+    radiance = _BLACK
+    throughput = _WHITE
+    # Density of the last bounce direction if the lights were sampled there too.
+    bounce_pdf = None
+    for bounce in range(1, depth + 1):
+        rng.set_bounce(bounce)
+
+        if first_hit is None:
+            # Only the record of the closest hit is built, see `Hittable`.
+            record = None
+            closest = world.closest_hit(ray, 0.0001, math.inf)
+            if closest is not None:
+                t, owner, key = closest
+                record = owner.hit_record(ray, t, key)
+        else:
+            (_, record), first_hit = first_hit, None
+        if record is None:
+            if stats is not None:
+                stats.end_path(bounce, TERMINATION.ESCAPED)
+            if background is not None:
+                return radiance + throughput * background
+            unit_direction = ray.direction.unit_vector()
+            parameter = 0.5 * (unit_direction.y + 1.0)  # remap from -1<x<1 to 0<x<1
+            # blended_value = (1 - t) * start_value + t * end_value
+            sky = (1 - parameter) * _WHITE + parameter * _LIGHT_BLUE
+            return radiance + throughput * sky
 
-    hit, record = world.hit(ray, 0.0001, math.inf)
-    if hit:
         material_ = record.material
+        if stats is not None:
+            name = type(material_).__name__.lower() if material_ else raystats.GREY
+            stats.scatters[name] += 1
         if material_:
-            light_scatter = material_.scatter(ray, record)
-            if light_scatter.scatter:
-                return light_scatter.attenuation * ray_color(
-                    light_scatter.scattered, world, depth - 1
-                )
-            return _BLACK
+            if material_.emit is not None:
+                weight = throughput
+                if bounce_pdf is not None:
+                    light_pdf = light.lights_pdf(lights, ray, record.t)
+                    weight = light.power_heuristic(bounce_pdf, light_pdf) * weight
+                radiance = radiance + weight * material_.emit
+            light_scatter = material_.scatter(ray, record, rng=rng)
+            if not light_scatter.scatter:
+                if stats is not None:
+                    termination = TERMINATION.ABSORBED
+                    if material_.emit is not None:
+                        termination = TERMINATION.LIGHT
+                    stats.end_path(bounce, termination)
+                return radiance
+            bounce_pdf = None
+            ray = light_scatter.scattered
+            if lights and isinstance(material_, material.Lambertian):
+                rng.set_bounce(LIGHT_BOUNCE + bounce)
+                direct = light.sample_direct(lights, world, record, rng)
+                if direct is not None:
+                    radiance = radiance + throughput * direct
+                # Cosine weighted, see `Lambertian.scatter`.
+                bounce_pdf = ray.direction.dot(record.normal) / math.pi
+            throughput = throughput * light_scatter.attenuation
         else:  # grey shaded diffuse
             if diffuse_mode == DIFFUSE_MODE.SIMPLE:
-                target = record.point + record.normal + random_in_unit_sphere()
+                direction = record.normal + random_in_unit_sphere(rng=rng)
             elif diffuse_mode == DIFFUSE_MODE.LAMBERTIAN:
-                target = record.point + record.normal + random_unit_vector()
+                direction = random_cosine_direction(record.normal, rng=rng)
             elif diffuse_mode == DIFFUSE_MODE.ALTERNATE:
-                target = record.point + random_in_hemisphere(record.normal)
-            return 0.5 * ray_color(
-                Ray(record.point, target - record.point),
-                world,
-                depth - 1,
-                diffuse_mode=diffuse_mode,
-            )
+                direction = random_in_hemisphere(record.normal, rng=rng)
+            ray = Ray(record.point, direction)
+            throughput = 0.5 * throughput
+            bounce_pdf = None
+
+        if roulette_depth is not None and bounce >= roulette_depth:
+            survival = max(throughput.x, throughput.y, throughput.z)
+            if survival < 1.0:
+                rng.set_bounce(ROULETTE_BOUNCE + bounce)
+                if rng.random() >= survival:
+                    if stats is not None:
+                        stats.end_path(bounce, TERMINATION.ROULETTE)
+                    return radiance
+                throughput = throughput * (1.0 / survival)
+
+    # If we have exceeded the ray bounce limit, no more light is gathered.
+    if stats is not None and depth > 0:
+        stats.end_path(depth, TERMINATION.MAX_DEPTH)
+    return radiance
 
-    unit_direction = ray.direction.unit_vector()
-    parameter = 0.5 * (unit_direction.y + 1.0)  # remap from -1<x<1 to 0<x<1
-    # blended_value = (1 - t) * start_value + t * end_value
-    return (1 - parameter) * _WHITE + parameter * _LIGHT_BLUE  # lerp
 
+def _scanline(
+    scanline, kwargs, columns=None, sample_start=0, samples=None, primary_world=None
+):
+    """Render a scanline into packed linear RGB floats, averaged over samples.
 
-def _scanline(scanline, kwargs):
+    Renders the samples `sample_start` to `sample_start + samples` of each
+    pixel, by default all the samples of the render settings. The camera rays
+    are intersected with `primary_world` if given (the objects of the world
+    they may hit, see :func:`_packet_tile`), the world otherwise.
+    """
     test = kwargs.get("test", False)
     resx = kwargs.get("resx", 0)
     resy = kwargs.get("resy", 0)
-    samples = kwargs.get("samples", 1)
+    if samples is None:
+        samples = kwargs.get("samples", 1)
     camera = kwargs.get("camera")
     world = kwargs.get("world")
     max_depth = kwargs.get("max_depth")
     diffuse_mode = kwargs.get("diffuse_mode", DIFFUSE_MODE.SIMPLE)
+    sample_seed = kwargs.get("sample_seed", 0)
+    roulette_depth = kwargs.get("roulette_depth")
+    lights = kwargs.get("lights")
+    background = kwargs.get("background")
+    sample_rng = rng_factory(
+        kwargs.get("sampler", SAMPLER.INDEPENDENT), kwargs.get("samples", 1)
+    )
+
+    if columns is None:
+        columns = range(resx)
 
-    pixels = []
+    pixels = array("f")
 
     if test:
-        for i in range(resx):
-            pixel_color = Color(i / (resx - 1), scanline / (resy - 1), 0.2)
-            pixels.append(pixel_color.as_string())
+        for i in columns:
+            pixels.extend((i / (resx - 1), scanline / (resy - 1), 0.2))
 
     else:
-        for i in range(resx):
+        scale = 1 / samples
+        for i in columns:
+            pixel = scanline * resx + i
             pixel_color = Color(0, 0, 0)
-            for _ in range(samples):
-                u = (i + random.random()) / (resx - 1)
-                v = (scanline + random.random()) / (resy - 1)
-                ray = camera.get_ray(u, v)
+            for sample in range(sample_start, sample_start + samples):
+                rng = sample_rng(sample_seed, pixel, sample)
+                u = (i + rng.random()) / (resx - 1)
+                v = (scanline + rng.random()) / (resy - 1)
+                ray = camera.get_ray(u, v, rng=rng)
                 # point = ray.point_at_parameter(2.0)
+                first_hit = None
+                if primary_world is not None and max_depth > 0:
+                    first_hit = primary_world.hit(ray, 0.0001, math.inf)
                 pixel_color += ray_color(
-                    ray, world, max_depth, diffuse_mode=diffuse_mode
+                    ray,
+                    world,
+                    max_depth,
+                    diffuse_mode=diffuse_mode,
+                    rng=rng,
+                    roulette_depth=roulette_depth,
+                    first_hit=first_hit,
+                    lights=lights,
+                    background=background,
+                )
+            pixels.extend(
+                (pixel_color.r * scale, pixel_color.g * scale, pixel_color.b * scale)
+            )
+
+    return pixels
+
+
+def _packet_tile(tile, kwargs, sample_start=0, samples=None):
+    """Render a tile in packets of camera rays, see :mod:`pathtracer.packet`.
+
+    The tile is split into blocks of `packet_size` pixels square, the camera
+    rays of each block are only intersected with the spheres the block may
+    hit. Same results as rendering the scanlines of the tile with single rays.
+
+    Returns:
+        array: Packed linear RGB floats of the tile pixels from top to bottom,
+            None if the world can't be culled (not a flat list of spheres).
+
+    """
+    resx = kwargs.get("resx")
+    resy = kwargs.get("resy")
+    camera = kwargs.get("camera")
+    world = kwargs.get("world")
+    size = kwargs.get("packet_size")
+    spheres = packet.camera_spheres(world, camera)
+    if spheres is None:
+        return None
+
+    rows = {j: array("f") for j in range(tile.y, tile.y + tile.height)}
+    for y in range(tile.y, tile.y + tile.height, size):
+        block_rows = range(y, min(y + size, tile.y + tile.height))
+        for x in range(tile.x, tile.x + tile.width, size):
+            columns = range(x, min(x + size, tile.x + tile.width))
+            # Pixel (i, j) rays cross the film at `((i + [0, 1)) / (resx - 1), ...`
+            candidates = packet.cull(
+                spheres,
+                camera,
+                (columns[0] / (resx - 1), (columns[-1] + 1) / (resx - 1)),
+                (block_rows[0] / (resy - 1), (block_rows[-1] + 1) / (resy - 1)),
+            )
+            primary_world = packet.restrict(world, candidates)
+            for j in block_rows:
+                rows[j].extend(
+                    _scanline(
+                        j,
+                        kwargs,
+                        columns=columns,
+                        sample_start=sample_start,
+                        samples=samples,
+                        primary_world=primary_world,
+                    )
                 )
-            pixels.append(pixel_color.as_string(samples))
 
+    pixels = array("f")
+    for j in range(tile.y + tile.height - 1, tile.y - 1, -1):
+        pixels.extend(rows[j])
     return pixels
 
 
+def _tiles(resx, resy, tile_size):
+    """Split the image into square tiles (smaller ones along the edges)."""
+    return [
+        _Tile(x, y, min(tile_size, resx - x), min(tile_size, resy - y))
+        for y in range(0, resy, tile_size)
+        for x in range(0, resx, tile_size)
+    ]
+
+
+def _tile_cost(tile, kwargs):
+    """Estimate the cost of a tile by following one path through its center.
+
+    The cost is the number of bounces the path takes before escaping or being
+    absorbed, so sky tiles are cheap and tiles full of glass are expensive.
+    """
+    resx = kwargs.get("resx")
+    resy = kwargs.get("resy")
+    camera = kwargs.get("camera")
+    world = kwargs.get("world")
+    max_depth = kwargs.get("max_depth")
+
+    u = (tile.x + tile.width / 2) / (resx - 1)
+    v = (tile.y + tile.height / 2) / (resy - 1)
+    ray = camera.get_ray(u, v)
+
+    cost = 1
+    for _ in range(max_depth):
+        hit, record = world.hit(ray, 0.0001, math.inf)
+        if not hit or not record.material:
+            break
+        light_scatter = record.material.scatter(ray, record)
+        if not light_scatter.scatter:
+            break
+        ray = light_scatter.scattered
+        cost += 1
+    return cost
+
+
+def _init_worker(kwargs):
+    """Pool initializer, receives the render settings once per worker."""
+    _WORKER_SETTINGS.clear()
+    _WORKER_SETTINGS.update(kwargs)
+    numpy_engine = kwargs.get("engine") == ENGINE.NUMPY
+    shared_scene = kwargs.get("shared_scene")
+    if shared_scene is not None:
+        _WORKER_SETTINGS["world"] = sharedscene.world(shared_scene, numpy_engine)
+    if kwargs.get("stats") and not numpy_engine:
+        _WORKER_SETTINGS["world"] = raystats.instrument(_WORKER_SETTINGS["world"])
+    if "shared_framebuffer" in kwargs:
+        _WORKER_SETTINGS.update(sharedmemory.attach(kwargs["shared_framebuffer"]))
+
+
+@contextlib.contextmanager
+def _pool(processes, kwargs):
+    """Pool of workers initialized with the render settings.
+
+    The world is copied once into shared memory, the workers render views of
+    it, see :mod:`pathtracer.sharedscene`. With the scalar engine, worlds which
+    can't be packed (not made of spheres only) are pickled to every worker
+    instead.
+
+    The workers write the tiles they render straight into a shared
+    framebuffer (and map of samples per pixel with adaptive sampling).
+
+    Yields:
+        tuple: `(pool, views)`, `views` being the memoryviews of the shared
+            `framebuffer` and `sample_map` (if any), see :func:`_render_tiles`.
+
+    """
+    shared = None
+    if kwargs.get("world") is not None:
+        numpy_engine = kwargs.get("engine") == ENGINE.NUMPY
+        try:
+            shared = sharedscene.share(kwargs["world"], numpy_engine=numpy_engine)
+        except TypeError:
+            # The numpy engine renders nothing else, see `image`.
+            if numpy_engine:
+                raise
+    pixels = kwargs.get("resx") * kwargs.get("resy")
+    specs = {"framebuffer": ("f", (3 * pixels,))}
+    if kwargs.get("adaptive") and not kwargs.get("test"):
+        specs["sample_map"] = ("I", (pixels,))
+    frame = sharedmemory.SharedArrays.zeros(specs)
+    views = frame.views()
+
+    kwargs = dict(kwargs, shared_framebuffer=frame.handle)
+    if shared is not None:
+        kwargs.update(world=None, shared_scene=shared.handle)
+    try:
+        with multiprocessing.Pool(
+            processes, initializer=_init_worker, initargs=(kwargs,)
+        ) as pool:
+            yield pool, views
+    finally:
+        for view in views.values():
+            view.release()
+        frame.close()
+        if shared is not None:
+            shared.close()
+
+
+@contextlib.contextmanager
+def _tile_renderer(processes, kwargs, serve=None, authkey=None):
+    """Render tiles locally with a pool of `processes` workers, or remotely.
+
+    With a `serve` address (`(host, port)`) the tiles are served to remote
+    workers authenticating with `authkey` (a random one printed if None)
+    instead, see :class:`distributed.Coordinator`.
+
+    Yields:
+        callable: :func:`_render_tiles` bound to the workers, takes the tiles
+            and range of samples to render.
+
+    """
+    if serve is not None:
+        with distributed.Coordinator(serve, kwargs, authkey=authkey) as coordinator:
+            yield coordinator.render_tiles
+        return
+    with _pool(processes, kwargs) as (pool, views):
+        yield functools.partial(_render_tiles, pool, views)
+
+
+def _write_tile(buffer, values, tile, resx, resy, channels=3):
+    """Copy the values of a tile, from top to bottom, into an image buffer."""
+    top = resy - tile.y - tile.height  # image rows go top to bottom
+    stride = channels * tile.width
+    with memoryview(values) as values:
+        for row in range(tile.height):
+            start = channels * ((top + row) * resx + tile.x)
+            buffer[start : start + stride] = values[row * stride : (row + 1) * stride]
+
+
+def _adaptive_tile(tile, kwargs):
+    """Adaptively sample a tile, see :func:`adaptive.render_pixels`.
+
+    Returns:
+        tuple: `(pixels, counts)`, the packed linear RGB floats averaged over
+            the samples of the tile pixels from top to bottom and an
+            `array("I")` of their sample counts.
+
+    """
+    resx = kwargs.get("resx", 0)
+    resy = kwargs.get("resy", 0)
+    camera = kwargs.get("camera")
+    world = kwargs.get("world")
+    max_depth = kwargs.get("max_depth")
+    diffuse_mode = kwargs.get("diffuse_mode", DIFFUSE_MODE.SIMPLE)
+    sample_seed = kwargs.get("sample_seed", 0)
+    roulette_depth = kwargs.get("roulette_depth")
+    lights = kwargs.get("lights")
+    background = kwargs.get("background")
+    sample_rng = rng_factory(
+        kwargs.get("sampler", SAMPLER.INDEPENDENT), kwargs.get("samples", 1)
+    )
+
+    pixels = [
+        (i, j)
+        for j in range(tile.y + tile.height - 1, tile.y - 1, -1)
+        for i in range(tile.x, tile.x + tile.width)
+    ]
+
+    def sample_pixel(pixel, sample):
+        i, j = pixels[pixel]
+        rng = sample_rng(sample_seed, j * resx + i, sample)
+        u = (i + rng.random()) / (resx - 1)
+        v = (j + rng.random()) / (resy - 1)
+        ray = camera.get_ray(u, v, rng=rng)
+        color = ray_color(
+            ray,
+            world,
+            max_depth,
+            diffuse_mode=diffuse_mode,
+            rng=rng,
+            roulette_depth=roulette_depth,
+            lights=lights,
+            background=background,
+        )
+        return color.r, color.g, color.b
+
+    colors, counts = adaptive.render_pixels(
+        len(pixels),
+        kwargs.get("samples", 1),
+        sample_pixel,
+        threshold=kwargs.get("noise_threshold", adaptive.NOISE_THRESHOLD),
+    )
+
+    data = array("f")
+    for (r, g, b), count in zip(colors, counts):
+        data.extend((r / count, g / count, b / count))
+    return data, array("I", counts)
+
+
+def _trace_tile(task, kwargs):
+    """Render a tile.
+
+    Args:
+        task (tuple): `(tile, sample_start, samples, frame)`, the tile to
+            render, the range of samples of its pixels and the index of the
+            animation frame in the `cameras` setting (None for still images).
+        kwargs (dict): Render settings, see :func:`_init_worker`.
+
+    Returns:
+        tuple: `(pixels, counts)`, the packed `array("f")` of the tile RGB
+            values from top to bottom and the `array("I")` of samples per
+            pixel of adaptive sampling (None otherwise). The ray stats of the
+            tile are counted into a new :data:`raystats.current` if enabled.
+
+    """
+    tile, sample_start, samples, frame = task
+    if frame is not None:
+        kwargs = dict(kwargs, camera=kwargs["cameras"][frame])
+    if kwargs.get("stats"):
+        raystats.current = raystats.RayStats()
+    pixels = None
+    counts = None
+    if kwargs.get("adaptive") and not kwargs.get("test"):
+        if kwargs.get("engine") == ENGINE.NUMPY:
+            pixels, counts = wavefront.render_tile_adaptive(
+                tile,
+                kwargs,
+                threshold=kwargs.get("noise_threshold", adaptive.NOISE_THRESHOLD),
+            )
+        else:
+            pixels, counts = _adaptive_tile(tile, kwargs)
+    elif kwargs.get("engine") == ENGINE.NUMPY and not kwargs.get("test"):
+        pixels = wavefront.render_tile(
+            tile, kwargs, sample_start=sample_start, samples=samples
+        )
+    elif kwargs.get("packet_size") and not kwargs.get("test"):
+        pixels = _packet_tile(tile, kwargs, sample_start=sample_start, samples=samples)
+    if pixels is None:
+        columns = range(tile.x, tile.x + tile.width)
+        pixels = array("f")
+        for j in range(tile.y + tile.height - 1, tile.y - 1, -1):
+            pixels.extend(
+                _scanline(
+                    j,
+                    kwargs,
+                    columns=columns,
+                    sample_start=sample_start,
+                    samples=samples,
+                )
+            )
+    return pixels, counts
+
+
+def _render_tile(task):
+    """Render a tile with the settings the worker was initialized with.
+
+    The tile is written into the shared framebuffer (and sample map), the
+    main process is only notified of its completion.
+
+    Args:
+        task (tuple): `(tile, sample_start, samples, frame)`, see
+            :func:`_trace_tile`.
+
+    Returns:
+        tuple: `(tile, seconds, worker, stats)` where `seconds` is the time it
+            took to render, `worker` the id of the process that rendered it and
+            `stats` the :class:`raystats.RayStats` of the tile (None unless
+            enabled).
+
+    """
+    start_time = time.perf_counter()
+    kwargs = _WORKER_SETTINGS
+    pixels, counts = _trace_tile(task, kwargs)
+    tile = task[0]
+    resx = kwargs.get("resx")
+    resy = kwargs.get("resy")
+    _write_tile(kwargs["framebuffer"], pixels, tile, resx, resy)
+    if counts is not None:
+        _write_tile(kwargs["sample_map"], counts, tile, resx, resy, channels=1)
+    seconds = time.perf_counter() - start_time
+    return tile, seconds, os.getpid(), raystats.current
+
+
 def render_progress(tasks_registry, task_num, total, _):
     """Print progress bar.
 
-    This is used as the callback function for pool.apply_async which gets passed
-    the process result, thus the use of `_` in the function definition.
+    This is called with every finished task and its result, which is not
+    needed, thus the use of `_` in the function definition.
 
     Args:
         tasks_registry (dict): Registry passed by reference to keep track of
@@ -138,31 +646,357 @@ def render_progress(tasks_registry, task_num, total, _):
     print(f"\rProgress: |{progress}| {percent}% complete", end="\r", flush=True)
 
 
-def _image(test=False, **kwargs):
+def _report_tile_timings(timings, tile_size, path=None):
+    """Print a summary of the tile render times, optionally save them as csv."""
+    if not timings:
+        return
+    seconds = sorted(timing.seconds for timing in timings)
+    print(
+        f"Tiles: {len(timings)} of {tile_size}x{tile_size}px, seconds per tile "
+        f"min {seconds[0]:0.3f} / median {seconds[len(seconds) // 2]:0.3f} / "
+        f"max {seconds[-1]:0.3f}"
+    )
+
+    workers = {}
+    for timing in timings:
+        tiles, busy = workers.get(timing.worker, (0, 0.0))
+        workers[timing.worker] = (tiles + 1, busy + timing.seconds)
+    for worker, (tiles, busy) in sorted(workers.items()):
+        print(f"  worker {worker}: {tiles} tiles in {busy:0.2f}s")
+
+    if path:
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(_TileTiming._fields[1:] + _Tile._fields)
+            for timing in timings:
+                writer.writerow(timing[1:] + timing.tile)
+
+
+def _render_tiles(pool, views, tiles, sample_start=0, samples=None, frame=None):
+    """Render the tiles with the pool workers into the shared framebuffer.
+
+    Args:
+        pool: Workers, see :func:`_pool`.
+        views (dict): Memoryviews of the shared `framebuffer` and `sample_map`.
+        tiles (list): The :class:`_Tile` to render.
+        sample_start, samples, frame: See :func:`_trace_tile`.
+
+    Returns:
+        tuple: `(framebuffer, timings, sample_map, worker_stats)`, see
+            :func:`_image` and :class:`_TileTiming`. `sample_map` is the
+            `array("I")` of samples per pixel with adaptive sampling, None
+            otherwise. `worker_stats` maps the worker process ids to their
+            merged :class:`raystats.RayStats`, empty unless enabled.
+
+    """
+    timings = []
+    worker_stats = {}
+    tasks_registry = {}  # used by passing by reference to print the progress bar
+
+    tasks = [(tile, sample_start, samples, frame) for tile in tiles]
+    results = pool.imap_unordered(_render_tile, tasks, chunksize=1)
+    for task_num, (tile, seconds, worker, stats) in enumerate(results, 1):
+        if stats is not None:
+            worker_stats.setdefault(worker, raystats.RayStats()).merge(stats)
+        timings.append(_TileTiming(tile, seconds, worker))
+        render_progress(tasks_registry, task_num, len(tiles), None)
+    print()  # ensure new line for future prints
+
+    # Copies, the shared memory doesn't outlive the pool.
+    framebuffer = array("f")
+    framebuffer.frombytes(views["framebuffer"].cast("B"))
+    sample_map = None
+    if "sample_map" in views:
+        sample_map = array("I")
+        sample_map.frombytes(views["sample_map"].cast("B"))
+    return framebuffer, timings, sample_map, worker_stats
+
+
+def _sorted_tiles(tile_size, kwargs):
+    """Tiles of the image, from the most to the least expensive (estimated)."""
+    tiles = _tiles(kwargs.get("resx"), kwargs.get("resy"), tile_size)
+    if not kwargs.get("test"):
+        costs = {tile: _tile_cost(tile, kwargs) for tile in tiles}
+        tiles.sort(key=costs.get, reverse=True)
+    return tiles
+
+
+def _image(
+    test=False,
+    tile_size=_TILE_SIZE,
+    timings_path=None,
+    sample_map_path=None,
+    stats_path=None,
+    processes=_PROCESSES,
+    serve=None,
+    authkey=None,
+    **kwargs,
+):
+    """Render the image in tiles.
+
+    Returns the framebuffer, a flat `array("f")` of linear RGB values with the
+    rows from top to bottom, see :mod:`pathtracer.output`. With adaptive
+    sampling the map of samples per pixel is saved to `sample_map_path`. With
+    `stats` the ray statistics are printed and saved to `stats_path`.
+
+    The scene settings are sent to every worker once when the pool starts, the
+    world through shared memory. The tiles are queued from the most to the
+    least expensive (estimated) and each idle worker takes the next one off the
+    queue, so the cheap tiles even out the load at the end of the render, by
+    `processes` workers, or by remote workers connecting to the `serve`
+    address, see :mod:`pathtracer.distributed`.
+    """
+    resx = kwargs.get("resx")
     resy = kwargs.get("resy")
     kwargs.update({"test": test})
 
-    results = []
-    tasks_registry = {}  # used by passing by reference to print the progress bar
+    tiles = _sorted_tiles(tile_size, kwargs)
+    start_time = time.perf_counter()
+    with _tile_renderer(
+        processes, kwargs, serve=serve, authkey=authkey
+    ) as render_tiles:
+        framebuffer, timings, sample_map, worker_stats = render_tiles(tiles)
+    seconds = time.perf_counter() - start_time
 
-    with multiprocessing.Pool(_PROCESSES) as pool:
-        pool_results = [
-            pool.apply_async(
-                _scanline,
-                args=(j, kwargs),
-                callback=functools.partial(
-                    render_progress, tasks_registry, resy - j, resy
-                ),
+    if not test:
+        _report_tile_timings(timings, tile_size, path=timings_path)
+    if worker_stats:
+        _report_stats(
+            worker_stats, timings, seconds, kwargs.get("max_depth"), path=stats_path
+        )
+    if sample_map is not None:
+        _report_sample_map(
+            sample_map, kwargs.get("samples"), resx, resy, path=sample_map_path
+        )
+    return framebuffer
+
+
+def _report_stats(worker_stats, timings, seconds, max_depth, path=None):
+    """Print a summary of the ray statistics, optionally save them as json.
+
+    Args:
+        worker_stats (dict): :class:`raystats.RayStats` of each worker.
+        timings (list): :class:`_TileTiming` of every tile rendered.
+        seconds (float): Wall clock time of the render.
+        max_depth (int): Max bounce.
+        path (str): Json file path.
+
+    """
+    total = raystats.RayStats()
+    for stats in worker_stats.values():
+        total.merge(stats)
+    paths = max(total.primary_rays, 1)
+    busy = {}
+    for timing in timings:
+        busy[timing.worker] = busy.get(timing.worker, 0.0) + timing.seconds
+
+    print(
+        f"Rays: {total.primary_rays} primary + {total.secondary_rays} secondary, "
+        f"{total.rays / seconds:0.0f} rays/s"
+    )
+    if total.shadow_rays:
+        print(f"Shadow rays: {total.shadow_rays / paths:0.2f} per path")
+    endings = ", ".join(
+        f"{name} {100 * count / paths:0.1f}%"
+        for name, count in total.to_dict()["terminations"].items()
+    )
+    print(f"Path depth: mean {total.rays / paths:0.2f} of {max_depth} ({endings})")
+    if total.intersection_tests:
+        tests = total.intersection_tests / max(total.rays + total.shadow_rays, 1)
+        print(f"Intersection tests: {tests:0.1f} per ray")
+    scatters = ", ".join(
+        f"{name} {count}" for name, count in sorted(total.scatters.items())
+    )
+    print(f"Scatters: {scatters}")
+    for worker, stats in sorted(worker_stats.items()):
+        print(
+            f"  worker {worker}: {stats.rays / busy[worker]:0.0f} rays/s, "
+            f"{100 * busy[worker] / seconds:0.1f}% busy"
+        )
+
+    if path:
+        data = {
+            "seconds": seconds,
+            "max_depth": max_depth,
+            "rays_per_second": total.rays / seconds,
+            "total": total.to_dict(),
+            "workers": {
+                str(worker): dict(
+                    stats.to_dict(),
+                    busy_seconds=busy[worker],
+                    utilization=busy[worker] / seconds,
+                )
+                for worker, stats in worker_stats.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+def _report_sample_map(sample_map, samples, resx, resy, path=None):
+    """Print a summary of the adaptive samples per pixel, optionally save them.
+
+    The map is saved as a pfm image, with the sample count of every pixel as
+    the value of all three channels.
+    """
+    total = sum(sample_map)
+    print(
+        f"Adaptive sampling: {total / len(sample_map):0.2f} samples per pixel "
+        f"(min {min(sample_map)}, max {max(sample_map)}), "
+        f"{100 * total / (samples * len(sample_map)):0.1f}% of {samples} per pixel"
+    )
+    if path:
+        values = array("f")
+        for count in sample_map:
+            values.extend((count, count, count))
+        output.write_pfm(path, values, resx, resy)
+
+
+def _progressive_image(
+    path,
+    checkpoint,
+    image_format=output.FORMAT.PPM,
+    tile_size=_TILE_SIZE,
+    pass_samples=1,
+    stats_path=None,
+    processes=_PROCESSES,
+    serve=None,
+    authkey=None,
+    **kwargs,
+):
+    """Render the image in passes over the whole frame.
+
+    Each pass renders `pass_samples` more samples of every pixel, summed into
+    the accumulation buffer of the :class:`Checkpoint` (which may already hold
+    the passes of an interrupted render). The buffer is saved to the checkpoint
+    and a preview image written to `path` after every pass. With `stats` the
+    ray statistics of all the passes are reported at the end. The tiles are
+    rendered by `processes` local or remote workers, see :func:`_image`.
+    """
+    resx = kwargs.get("resx")
+    resy = kwargs.get("resy")
+    total_samples = kwargs.get("samples")
+    kwargs.update({"test": False})
+
+    done = checkpoint.samples
+    if done:
+        print(f"Resuming from {done}/{total_samples} samples per pixel")
+
+    tiles = _sorted_tiles(tile_size, kwargs)
+    all_timings = []
+    all_stats = {}
+    start_time = time.perf_counter()
+    with _tile_renderer(
+        processes, kwargs, serve=serve, authkey=authkey
+    ) as render_tiles:
+        passes = 0
+        while done < total_samples:
+            samples = min(pass_samples, total_samples - done)
+            framebuffer, timings, _, worker_stats = render_tiles(
+                tiles, sample_start=done, samples=samples
             )
-            for j in range(resy - 1, -1, -1)
-        ]
-        results = [result.get() for result in pool_results]
+            all_timings.extend(timings)
+            for worker, stats in worker_stats.items():
+                all_stats.setdefault(worker, raystats.RayStats()).merge(stats)
+            checkpoint.accumulate(framebuffer, samples)
+            done += samples
+            passes += 1
 
-    print()  # ensure new line for future prints
-    return (pixel_color for pixel_row in results for pixel_color in pixel_row)
+            preview = checkpoint.preview()
+            output.write(path, preview, resx, resy, image_format=image_format)
+            print(f"Pass {passes}: {done}/{total_samples} samples per pixel")
+
+    if all_stats:
+        _report_stats(
+            all_stats,
+            all_timings,
+            time.perf_counter() - start_time,
+            kwargs.get("max_depth"),
+            path=stats_path,
+        )
 
 
-def _set_scene_image_settings(greyshaded=False):
+def _animation(
+    path,
+    cameras,
+    image_format=output.FORMAT.PPM,
+    tile_size=_TILE_SIZE,
+    timings_path=None,
+    stats_path=None,
+    processes=_PROCESSES,
+    serve=None,
+    authkey=None,
+    **kwargs,
+):
+    """Render a sequence of frames, one image per camera.
+
+    The workers (local or remote) and the world are set up once for the whole
+    sequence, see :func:`_image`. The cameras of all the frames are sent to the
+    workers along with the render settings, and each tile task names its frame.
+    Every frame is written to its numbered path (see
+    :func:`animation.frame_path`), the tile timings and ray statistics of all
+    the frames are reported at the end.
+
+    Args:
+        path (str): Path of the image sequence, numbered per frame.
+        cameras (list): `(frame, camera)` tuples, see :func:`animation.cameras`.
+
+    """
+    resx = kwargs.get("resx")
+    resy = kwargs.get("resy")
+    kwargs.update({"test": False, "cameras": [camera for _, camera in cameras]})
+
+    all_timings = []
+    all_stats = {}
+    start_time = time.perf_counter()
+    with _tile_renderer(
+        processes, kwargs, serve=serve, authkey=authkey
+    ) as render_tiles:
+        for index, (frame, camera) in enumerate(cameras):
+            tiles = _sorted_tiles(tile_size, dict(kwargs, camera=camera))
+            framebuffer, timings, sample_map, worker_stats = render_tiles(
+                tiles, frame=index
+            )
+            all_timings.extend(timings)
+            for worker, stats in worker_stats.items():
+                all_stats.setdefault(worker, raystats.RayStats()).merge(stats)
+
+            frame_path = animation.frame_path(path, frame)
+            output.write(frame_path, framebuffer, resx, resy, image_format=image_format)
+            if sample_map is not None:
+                _report_sample_map(
+                    sample_map,
+                    kwargs.get("samples"),
+                    resx,
+                    resy,
+                    path=f"{frame_path}.samples.pfm",
+                )
+            print(f"Frame {frame} ({index + 1}/{len(cameras)}) saved to {frame_path}")
+
+    _report_tile_timings(all_timings, tile_size, path=timings_path)
+    if all_stats:
+        _report_stats(
+            all_stats,
+            all_timings,
+            time.perf_counter() - start_time,
+            kwargs.get("max_depth"),
+            path=stats_path,
+        )
+
+
+def _lighting_settings(world, lighting) -> dict:
+    """`background` and `lights` settings of a built-in scene."""
+    if lighting == LIGHTING.LAMPS:
+        return {"background": _BLACK, "lights": light.find_lights(world)}
+    return {}
+
+
+def _set_scene_image_settings(
+    greyshaded=False,
+    accelerator=ACCELERATOR.LINEAR,
+    ground=GROUND.SPHERE,
+    lighting=LIGHTING.SKY,
+):
     """Build scene description + settings for the manually built scene."""
     # Image
     aspect_ratio = 16.0 / 9.0
@@ -170,7 +1004,12 @@ def _set_scene_image_settings(greyshaded=False):
     resy = int(resx // aspect_ratio)
 
     # Scene
-    world = construct_scene(greyshaded=greyshaded)
+    world = construct_scene(
+        greyshaded=greyshaded,
+        accelerator=accelerator,
+        ground=ground,
+        lighting=lighting,
+    )
 
     # Camera
     # Let's define our camera with an adjustable vertical field of view
@@ -191,12 +1030,24 @@ def _set_scene_image_settings(greyshaded=False):
     )
 
     settings = _SceneSettings(
-        resx=resx, resy=resy, camera=camera, samples=10, max_depth=50, world=world
+        resx=resx,
+        resy=resy,
+        camera=camera,
+        samples=10,
+        max_depth=50,
+        world=world,
+        **_lighting_settings(world, lighting),
     )
     return settings
 
 
-def _random_scene_image_settings(seed=None):
+def _random_scene_image_settings(
+    seed=None,
+    accelerator=ACCELERATOR.LINEAR,
+    extent=11,
+    ground=GROUND.SPHERE,
+    lighting=LIGHTING.SKY,
+):
     """Build scene description + settings for the randomly built scene."""
     # Image
     aspect_ratio = 3.0 / 2.0
@@ -204,7 +1055,14 @@ def _random_scene_image_settings(seed=None):
     resy = int(resx // aspect_ratio)
 
     # Scene
-    world = construct_scene(randomize=True, seed=seed)
+    world = construct_scene(
+        randomize=True,
+        seed=seed,
+        accelerator=accelerator,
+        extent=extent,
+        ground=ground,
+        lighting=lighting,
+    )
 
     # Camera
     # Let's define our camera with an adjustable vertical field of view
@@ -225,78 +1083,287 @@ def _random_scene_image_settings(seed=None):
     )
 
     settings = _SceneSettings(
-        resx=resx, resy=resy, camera=camera, samples=16, max_depth=10, world=world
+        resx=resx,
+        resy=resy,
+        camera=camera,
+        samples=16,
+        max_depth=10,
+        world=world,
+        **_lighting_settings(world, lighting),
     )
     return settings
 
 
+def _file_scene_image_settings(path, accelerator=ACCELERATOR.LINEAR):
+    """Load scene description + settings from a scene file."""
+    settings = _SceneSettings(**scenefile.load(path))
+    if accelerator != ACCELERATOR.LINEAR:
+        settings = settings._replace(world=accelerate(settings.world, accelerator))
+    return settings
+
+
 def image(
     path=None,
     diffuse_mode=DIFFUSE_MODE.SIMPLE,
     greyshaded=False,
     randomize=True,
     seed=None,
+    engine=ENGINE.SCALAR,
+    accelerator=ACCELERATOR.LINEAR,
+    extent=11,
+    tile_size=_TILE_SIZE,
+    timings_path=None,
+    image_format=output.FORMAT.PPM,
+    sample_seed=0,
+    progressive=False,
+    resume=False,
+    checkpoint_path=None,
+    pass_samples=1,
+    adaptive_sampling=False,
+    noise_threshold=adaptive.NOISE_THRESHOLD,
+    roulette_depth=ROULETTE_DEPTH,
+    stats=False,
+    scene_path=None,
+    save_scene_path=None,
+    serve=None,
+    authkey=None,
+    frames=None,
+    keyframes_path=None,
+    packet_size=packet.PACKET_SIZE,
+    ground=GROUND.SPHERE,
+    sampler=SAMPLER.INDEPENDENT,
+    lighting=LIGHTING.SKY,
+    light_sampling=True,
 ):
-    """Render image."""
+    """Render image.
+
+    With `progressive` the image is rendered in passes of `pass_samples`
+    samples per pixel, writing a preview after each one and checkpointing the
+    accumulated samples to `checkpoint_path` (`<path>.checkpoint` by default).
+    `resume` carries on with the render saved in the checkpoint, with the same
+    scene and sampling settings it was started with.
+
+    With `adaptive_sampling` the samples are spent on the pixels still noisier
+    than `noise_threshold`, see :mod:`pathtracer.adaptive`, and the map of
+    samples per pixel is saved as `<path>.samples.pfm`.
+
+    Paths play Russian roulette after `roulette_depth` bounces, see
+    :func:`ray_color`.
+
+    The scalar engine traces the camera rays in packets of `packet_size`
+    pixels square (see :mod:`pathtracer.packet`), 0 or None traces single rays.
+
+    With `stats` the rays are counted (see :mod:`pathtracer.raystats`), a
+    summary is printed and saved as `<path>.stats.json`.
+
+    The built-in scenes stand on a huge sphere, or with `ground` set to
+    `GROUND.PLANE` on a plane, faster to intersect.
+
+    `sampler` places the samples of every pixel, stratified or low discrepancy
+    samplers converge with fewer samples per pixel, see
+    :mod:`pathtracer.sampler`.
+
+    With `lighting` set to `LIGHTING.LAMPS` the built-in scenes are lit by
+    small lamps instead of the sky. The lamps (and the spheres of a scene file
+    made of a light material) are sampled explicitly at every diffuse hit
+    unless `light_sampling` is off, see :mod:`pathtracer.light`.
+
+    `scene_path` renders the scene file (see :mod:`pathtracer.scenefile`)
+    instead of the built-in scenes. With `save_scene_path` the scene is saved
+    to a scene file instead of being rendered.
+
+    With a `serve` address (`(host, port)`) the tiles are rendered by remote
+    workers connecting to it with `authkey` (a random one printed if None)
+    instead of local processes, see :mod:`pathtracer.distributed`.
+
+    With a range of `frames` an animation is rendered instead, as a sequence
+    of images numbered after `path`. The camera follows the keyframes of
+    `keyframes_path`, or turns around the scene, see :mod:`pathtracer.animation`.
+    """
     if not path:
-        path = "image.ppm"
+        path = f"image.{output.EXTENSIONS[image_format]}"
+
+    if adaptive_sampling and (progressive or resume):
+        raise ValueError("Adaptive sampling can't be used with progressive renders")
+    if frames is not None and (progressive or resume):
+        raise ValueError("Animations can't be rendered progressively")
+    if pass_samples < 1:
+        raise ValueError(
+            f"Progressive passes need 1 sample at least, got {pass_samples}"
+        )
+
+    checkpoint = None
+    if progressive or resume:
+        checkpoint_path = checkpoint_path or f"{path}.checkpoint"
+        if resume:
+            checkpoint = Checkpoint.load(checkpoint_path)
+            settings = checkpoint.metadata
+            diffuse_mode = DIFFUSE_MODE[settings["diffuse_mode"]]
+            greyshaded = settings["greyshaded"]
+            randomize = settings["randomize"]
+            seed = settings["seed"]
+            extent = settings["extent"]
+            ground = GROUND[settings.get("ground", GROUND.SPHERE.name)]
+            lighting = LIGHTING[settings.get("lighting", LIGHTING.SKY.name)]
+            light_sampling = settings.get("light_sampling", True)
+            sample_seed = settings["sample_seed"]
+            sampler = SAMPLER[settings.get("sampler", SAMPLER.INDEPENDENT.name)]
+            roulette_depth = settings.get("roulette_depth")
+            scene_path = settings.get("scene_path")
+        elif randomize and seed is None:
+            # The random scene must be built again identically to resume.
+            seed = random.randrange(1 << 31)
 
-    if randomize:
-        scene_settings = _random_scene_image_settings(seed=seed)
+    if engine == ENGINE.NUMPY and ground != GROUND.SPHERE and not scene_path:
+        raise ValueError("The numpy engine only renders spheres, not a ground plane")
+    if engine == ENGINE.NUMPY and sampler != SAMPLER.INDEPENDENT:
+        raise ValueError("The numpy engine only draws independent samples")
+
+    if scene_path:
+        scene_settings = _file_scene_image_settings(
+            scene_path, accelerator=accelerator
+        )
+    elif randomize:
+        scene_settings = _random_scene_image_settings(
+            seed=seed,
+            accelerator=accelerator,
+            extent=extent,
+            ground=ground,
+            lighting=lighting,
+        )
     else:
-        scene_settings = _set_scene_image_settings(greyshaded=greyshaded)
+        scene_settings = _set_scene_image_settings(
+            greyshaded=greyshaded,
+            accelerator=accelerator,
+            ground=ground,
+            lighting=lighting,
+        )
 
-    # Render
-    header = [
-        "P3\n",
-        f"{scene_settings.resx} {scene_settings.resy}\n",
-        "255\n",
-    ]
+    if engine == ENGINE.NUMPY and scene_settings.background is not None:
+        raise ValueError("The numpy engine only renders scenes lit by the sky")
+    if engine == ENGINE.NUMPY:
+        try:
+            wavefront.scene_arrays(scene_settings.world)
+        except TypeError as error:
+            # e.g. meshes or lights of a scene file, better here than in workers
+            raise ValueError(str(error)) from None
+
+    if save_scene_path:
+        scenefile.save(save_scene_path, **scene_settings._asdict())
+        print(f"Scene saved to {save_scene_path}")
+        return
 
-    pixels = _image(
+    render_settings = {
+        "resx": scene_settings.resx,
+        "resy": scene_settings.resy,
+        "camera": scene_settings.camera,
+        "world": scene_settings.world,
+        "samples": scene_settings.samples,
+        "max_depth": scene_settings.max_depth,
+        "diffuse_mode": diffuse_mode,
+        "engine": engine,
+        "sample_seed": sample_seed,
+        "sampler": sampler,
+        "adaptive": adaptive_sampling,
+        "noise_threshold": noise_threshold,
+        "roulette_depth": roulette_depth,
+        "stats": stats,
+        "packet_size": packet_size,
+        "background": scene_settings.background,
+        "lights": scene_settings.lights if light_sampling else (),
+    }
+
+    if frames is not None:
+        keyframes = None
+        if keyframes_path:
+            keyframes = animation.load_keyframes(keyframes_path, scene_settings.camera)
+        _animation(
+            path,
+            animation.cameras(scene_settings.camera, frames, keyframes),
+            image_format=image_format,
+            tile_size=tile_size,
+            timings_path=timings_path,
+            stats_path=f"{path}.stats.json" if stats else None,
+            serve=serve,
+            authkey=authkey,
+            **render_settings,
+        )
+        return
+
+    if progressive or resume:
+        if checkpoint is None:
+            checkpoint = Checkpoint.create(
+                checkpoint_path,
+                {
+                    "resx": scene_settings.resx,
+                    "resy": scene_settings.resy,
+                    "samples": scene_settings.samples,
+                    "diffuse_mode": diffuse_mode.name,
+                    "greyshaded": greyshaded,
+                    "randomize": randomize,
+                    "seed": seed,
+                    "extent": extent,
+                    "ground": ground.name,
+                    "lighting": lighting.name,
+                    "light_sampling": light_sampling,
+                    "sample_seed": sample_seed,
+                    "sampler": sampler.name,
+                    "roulette_depth": roulette_depth,
+                    "scene_path": scene_path,
+                },
+            )
+        with checkpoint:
+            _progressive_image(
+                path,
+                checkpoint,
+                image_format=image_format,
+                tile_size=tile_size,
+                pass_samples=pass_samples,
+                stats_path=f"{path}.stats.json" if stats else None,
+                serve=serve,
+                authkey=authkey,
+                **render_settings,
+            )
+        return
+
+    # Render
+    framebuffer = _image(
         test=False,
-        resx=scene_settings.resx,
-        resy=scene_settings.resy,
-        camera=scene_settings.camera,
-        world=scene_settings.world,
-        samples=scene_settings.samples,
-        max_depth=scene_settings.max_depth,
-        diffuse_mode=diffuse_mode,
+        tile_size=tile_size,
+        timings_path=timings_path,
+        sample_map_path=f"{path}.samples.pfm" if adaptive_sampling else None,
+        stats_path=f"{path}.stats.json" if stats else None,
+        serve=serve,
+        authkey=authkey,
+        **render_settings,
     )
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.writelines(header)
-        # `pixels` is a generator so let's extract one value at a time
-        for pixel in pixels:
-            f.write(f"{pixel}\n")
+    output.write(
+        path,
+        framebuffer,
+        scene_settings.resx,
+        scene_settings.resy,
+        image_format=image_format,
+    )
 
 
-def hello_world(path=None):
-    """Hello World render of ppm image file."""
+def hello_world(path=None, image_format=output.FORMAT.PPM):
+    """Hello World render of an image file."""
     if not path:
-        path = "hello_world.ppm"
+        path = f"hello_world.{output.EXTENSIONS[image_format]}"
 
     # Image
     resx = 200
     resy = 100
 
     # Render
-    header = [
-        "P3\n",
-        f"{resx} {resy}\n",
-        "255\n",
-    ]
-
-    pixels = _image(
+    framebuffer = _image(
         test=True,
         resx=resx,
         resy=resy,
     )
 
-    with open(path, "w", encoding="utf-8") as f:
-        f.writelines(header)
-        for pixel in pixels:
-            f.write(f"{pixel}\n")
+    output.write(path, framebuffer, resx, resy, image_format=image_format)
 
 
 def main(diffuse_mode=DIFFUSE_MODE.SIMPLE):
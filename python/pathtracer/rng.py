@@ -0,0 +1,82 @@
+"""Counter-based random numbers.
+
+Every random number is a hash of a key and a counter instead of the next value
+of some shared sequential state: the numbers drawn for a given image seed,
+pixel, sample and bounce are always the same, no matter which process renders
+the pixel, in which tile or in which order. Any pixel can then be re-rendered
+bit-identically in isolation.
+
+The hash is the splitmix64 finalizer, good enough for our Monte Carlo needs
+and cheap in pure Python.
+"""
+
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15  # 2^64 / golden ratio, odd
+MIX_1 = 0xBF58476D1CE4E5B9
+MIX_2 = 0x94D049BB133111EB
+
+_TO_UNIT = 1.0 / (1 << 53)
+
+CAMERA_BOUNCE = 0
+"""int: bounce used for the camera ray (pixel jitter and lens), the path bounces
+start at 1."""
+
+ROULETTE_BOUNCE = 1 << 32
+"""int: offset of the bounce numbers of the Russian roulette draws, so the
+decision to terminate a path never depends on the numbers its scattering drew.
+"""
+
+LIGHT_BOUNCE = 2 << 32
+"""int: offset of the bounce numbers of the light sampling draws (see
+:mod:`pathtracer.light`), independent of the scattering ones as well."""
+
+
+def mix64(value: int) -> int:
+    """Hash a 64 bit integer (splitmix64 finalizer)."""
+    value = ((value ^ (value >> 30)) * MIX_1) & MASK
+    value = ((value ^ (value >> 27)) * MIX_2) & MASK
+    return value ^ (value >> 31)
+
+
+def pixel_key(seed: int, pixel: int) -> int:
+    """Key of the random numbers shared by all the samples of a pixel."""
+    return mix64((seed * GOLDEN + pixel) & MASK)
+
+
+def sample_key(seed: int, pixel: int, sample: int) -> int:
+    """Key of the random stream of a pixel sample."""
+    return mix64((pixel_key(seed, pixel) + sample * GOLDEN) & MASK)
+
+
+class SampleRng:
+    """Random numbers of a single pixel sample.
+
+    Implements the `random()` and `uniform()` methods of the :mod:`random`
+    module, so either can be passed around as the `rng` of the sampling helpers.
+
+    Args:
+        seed (int): Image seed.
+        pixel (int): Pixel index, `scanline * resx + column`.
+        sample (int): Sample index within the pixel.
+
+    """
+
+    __slots__ = ("_key", "_stream", "_draw")
+
+    def __init__(self, seed: int, pixel: int, sample: int):
+        self._key = sample_key(seed, pixel, sample)
+        self.set_bounce(CAMERA_BOUNCE)
+
+    def set_bounce(self, bounce: int):
+        """Switch to the numbers of the given bounce of the path."""
+        self._stream = mix64((self._key ^ (bounce * MIX_1)) & MASK)
+        self._draw = 0
+
+    def random(self) -> float:
+        """Random float in [0, 1)."""
+        self._draw += 1
+        return (mix64((self._stream + self._draw * GOLDEN) & MASK) >> 11) * _TO_UNIT
+
+    def uniform(self, min_value: float, max_value: float) -> float:
+        """Random float in [min_value, max_value)."""
+        return min_value + (max_value - min_value) * self.random()
@@ -0,0 +1,228 @@
+"""Samplers: where in the sampling domain the samples of a pixel fall.
+
+Every random number a pixel sample draws is one dimension of its path: the
+pixel jitter and lens position of the camera ray, then the direction of every
+bounce. Independent random numbers clump and leave holes, stratified and
+low discrepancy samples cover every dimension evenly and the image converges
+with fewer samples per pixel (see `python -m pathtracer bench --suite
+convergence`).
+
+All the samplers are counter-based like :class:`rng.SampleRng` (the numbers
+only depend on the image seed, pixel, sample, bounce and draw) and randomized,
+so they stay unbiased: each pixel gets its own permutations or scrambling.
+"""
+
+import enum
+import functools
+
+from .rng import GOLDEN, MASK, MIX_1, SampleRng, mix64, pixel_key
+
+
+SAMPLER = enum.Enum("SAMPLER", ["INDEPENDENT", "STRATIFIED", "SOBOL"])
+"""enum: sampler of the pixel samples.
+
+- INDEPENDENT: independent random numbers, see :class:`rng.SampleRng`.
+- STRATIFIED: jittered strata, one per sample of the pixel in every dimension,
+  see :class:`StratifiedRng`.
+- SOBOL: Owen-scrambled Sobol points, see :class:`SobolRng`.
+
+"""
+
+_MASK32 = (1 << 32) - 1
+
+_BELOW_ONE = 1.0 - 2.0**-53  # largest float in [0, 1)
+
+_TO_UNIT = 1.0 / (1 << 32)
+
+
+def _bounce_key(key: int, bounce: int) -> int:
+    """Key of the numbers of a bounce, same mixing as :meth:`SampleRng.set_bounce`."""
+    return mix64((key ^ (bounce * MIX_1)) & MASK)
+
+
+def _draw_hash(key: int, draw: int) -> int:
+    return mix64((key + draw * GOLDEN) & MASK)
+
+
+def _permute(index: int, length: int, seed: int) -> int:
+    """Element `index` of a random permutation of `range(length)`.
+
+    Kensler's hash-based permutation ("Correlated Multi-Jittered Sampling",
+    2013), every 32 bit `seed` picks a different permutation.
+    """
+    mask = length - 1
+    mask |= mask >> 1
+    mask |= mask >> 2
+    mask |= mask >> 4
+    mask |= mask >> 8
+    mask |= mask >> 16
+    while True:
+        index ^= seed
+        index = (index * 0xE170893D) & _MASK32
+        index ^= seed >> 16
+        index ^= (index & mask) >> 4
+        index ^= seed >> 8
+        index = (index * 0x0929EB3F) & _MASK32
+        index ^= seed >> 23
+        index ^= (index & mask) >> 1
+        index = (index * (1 | seed >> 27)) & _MASK32
+        index = (index * 0x6935FA69) & _MASK32
+        index ^= (index & mask) >> 11
+        index = (index * 0x74DCB303) & _MASK32
+        index ^= (index & mask) >> 2
+        index = (index * 0x9E501CC3) & _MASK32
+        index ^= (index & mask) >> 2
+        index = (index * 0xC860A3DF) & _MASK32
+        index &= mask
+        index ^= index >> 5
+        if index < length:
+            return (index + seed) % length
+
+
+class StratifiedRng(SampleRng):
+    """Random numbers of a pixel sample, stratified over the pixel samples.
+
+    Every dimension (bounce and draw) is split into `strata` equal strata, the
+    samples `0` to `strata - 1` of the pixel each fall at a random place of a
+    different stratum, the next `strata` samples again and so on. Which sample
+    gets which stratum is shuffled independently in every dimension (Latin
+    hypercube sampling), so the dimensions don't correlate.
+
+    Args:
+        seed (int): Image seed.
+        pixel (int): Pixel index, `scanline * resx + column`.
+        sample (int): Sample index within the pixel.
+        strata (int): Number of strata, usually the samples per pixel.
+
+    """
+
+    __slots__ = ("_strata", "_stratum", "_round_key", "_permutations")
+
+    def __init__(self, seed: int, pixel: int, sample: int, strata: int):
+        self._strata = strata
+        round_, self._stratum = divmod(sample, strata)
+        self._round_key = _draw_hash(pixel_key(seed, pixel), round_)
+        super().__init__(seed, pixel, sample)
+
+    def set_bounce(self, bounce: int):
+        super().set_bounce(bounce)
+        self._permutations = _bounce_key(self._round_key, bounce)
+
+    def random(self) -> float:
+        """Random float in [0, 1), in the stratum of the sample."""
+        jitter = super().random()
+        seed = _draw_hash(self._permutations, self._draw) >> 32
+        stratum = _permute(self._stratum, self._strata, seed)
+        return min((stratum + jitter) / self._strata, _BELOW_ONE)
+
+
+def _direction_numbers(degree, coefficients, initial) -> tuple:
+    """32 direction numbers of a Sobol dimension, from its primitive polynomial."""
+    numbers = [m << (31 - i) for i, m in enumerate(initial)]
+    for i in range(degree, 32):
+        number = numbers[i - degree] ^ (numbers[i - degree] >> degree)
+        for k in range(1, degree):
+            if (coefficients >> (degree - 1 - k)) & 1:
+                number ^= numbers[i - k]
+        numbers.append(number)
+    return tuple(numbers)
+
+
+# The 4 first dimensions of Joe and Kuo's `new-joe-kuo-6.21201` table.
+_DIRECTIONS = (
+    tuple(1 << (31 - i) for i in range(32)),  # van der Corput
+    _direction_numbers(1, 0, (1,)),
+    _direction_numbers(2, 1, (1, 3)),
+    _direction_numbers(3, 1, (1, 3, 1)),
+)
+
+_DIMENSIONS = len(_DIRECTIONS)
+
+
+def _sobol(index: int, dimension: int) -> int:
+    """32 bit fixed point coordinate of the Sobol point `index`."""
+    value = 0
+    for number in _DIRECTIONS[dimension]:
+        if not index:
+            break
+        if index & 1:
+            value ^= number
+        index >>= 1
+    return value
+
+
+def _reverse_bits(value: int) -> int:
+    return int(f"{value:032b}"[::-1], 2)
+
+
+def _scramble(value: int, seed: int) -> int:
+    """Nested uniform (Owen) scrambling of a 32 bit fixed point value.
+
+    Burley's hash-based Owen scrambling ("Practical Hash-based Owen
+    Scrambling", 2020): a Laine-Karras style hash of the reversed bits, every
+    bit only depends on the bits above it.
+    """
+    value = _reverse_bits(value)
+    value = (value + seed) & _MASK32
+    value ^= (value * 0x6C50B47C) & _MASK32
+    value ^= (value * 0xB82F1E52) & _MASK32
+    value ^= (value * 0xC7AFE638) & _MASK32
+    value ^= (value * 0x8D22F6E6) & _MASK32
+    return _reverse_bits(value)
+
+
+class SobolRng(SampleRng):
+    """Random numbers of a pixel sample, from Owen-scrambled Sobol points.
+
+    The samples of a pixel are the points of a 4 dimensional Sobol sequence,
+    evenly covering the 4 first draws of a bounce together (the pixel jitter
+    and lens position of the camera ray, the direction of a bounce), with a
+    new independently scrambled sequence for every group of 4 draws and bounce
+    (padding). The points are at their best for powers of 2 samples per pixel.
+
+    Args:
+        seed (int): Image seed.
+        pixel (int): Pixel index, `scanline * resx + column`.
+        sample (int): Sample index within the pixel.
+
+    """
+
+    __slots__ = ("_sample", "_pixel_key", "_scrambles")
+
+    def __init__(self, seed: int, pixel: int, sample: int):
+        self._sample = sample & _MASK32
+        self._pixel_key = pixel_key(seed, pixel)
+        super().__init__(seed, pixel, sample)
+
+    def set_bounce(self, bounce: int):
+        super().set_bounce(bounce)
+        self._scrambles = _bounce_key(self._pixel_key, bounce)
+
+    def random(self) -> float:
+        """Random float in [0, 1), coordinate of the Sobol point of the sample."""
+        group, dimension = divmod(self._draw, _DIMENSIONS)
+        self._draw += 1
+        seed = _draw_hash(self._scrambles, group)
+        # Shuffle the points with one seed, scramble each dimension with another.
+        index = _scramble(self._sample, seed >> 32)
+        value = _sobol(index, dimension)
+        return _scramble(value, _draw_hash(seed, dimension + 1) >> 32) * _TO_UNIT
+
+
+def rng_factory(sampler, samples: int):
+    """Random numbers of the pixel samples of a sampler.
+
+    Args:
+        sampler (SAMPLER): Sampler.
+        samples (int): Samples per pixel of the image.
+
+    Returns:
+        callable: `(seed, pixel, sample) -> rng` building the random numbers
+            of a pixel sample, like :class:`rng.SampleRng`.
+
+    """
+    if sampler == SAMPLER.STRATIFIED:
+        return functools.partial(StratifiedRng, strata=max(samples, 1))
+    if sampler == SAMPLER.SOBOL:
+        return SobolRng
+    return SampleRng
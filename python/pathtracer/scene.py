@@ -1,20 +1,112 @@
 """Our scene objects."""
 
+import enum
 import random
 
-from .hittable import HittableList, Sphere
+from .hittable import BVH, HittableList, Plane, Sphere, UniformGrid
 from . import material
-from .vec3 import Color, Point3
+from .vec3 import Color, Point3, Vec3
 
 
-def construct_scene(greyshaded=False, randomize=False, seed=None):
-    """Construct 3d scene for rendering."""
+ACCELERATOR = enum.Enum("ACCELERATOR", ["LINEAR", "BVH", "GRID"])
+"""enum: acceleration structure wrapping the scene objects.
+
+- LINEAR: test every object in turn, see :class:`HittableList`.
+- BVH: bounding volume hierarchy, see :class:`BVH`.
+- GRID: uniform grid, see :class:`UniformGrid`.
+
+"""
+
+GROUND = enum.Enum("GROUND", ["SPHERE", "PLANE"])
+"""enum: ground of the built-in scenes.
+
+- SPHERE: huge sphere, as in the book.
+- PLANE: infinite plane tangent to it, much cheaper to intersect, see
+  :class:`Plane`.
+
+"""
+
+LIGHTING = enum.Enum("LIGHTING", ["SKY", "LAMPS"])
+"""enum: lighting of the built-in scenes.
+
+- SKY: lit by the sky gradient, as in the book.
+- LAMPS: at night, lit by small glowing spheres only (see
+  :class:`material.DiffuseLight`), which need the lights to be sampled
+  explicitly to converge, see :mod:`pathtracer.light`.
+
+"""
+
+# Radiance of the lamps, bright enough to light the scenes as the sky does.
+_LAMP = Color(40.0, 36.0, 30.0)
+
+
+def construct_scene(
+    greyshaded=False,
+    randomize=False,
+    seed=None,
+    accelerator=ACCELERATOR.LINEAR,
+    extent=11,
+    ground=GROUND.SPHERE,
+    lighting=LIGHTING.SKY,
+):
+    """Construct 3d scene for rendering.
+
+    The lights of the scene (its emitting objects) are found with
+    :func:`light.find_lights`.
+
+    Args:
+        greyshaded (bool): Manual scene without materials.
+        randomize (bool): Random scene instead of the manual one.
+        seed (int): Random scene generation seed.
+        accelerator (ACCELERATOR): Acceleration structure to wrap the world in.
+        extent (int): Half size of the random scene grid of small spheres, the
+            scene holds roughly `(2 * extent) ** 2` spheres.
+        ground (GROUND): Ground primitive.
+        lighting (LIGHTING): Sky or lamps.
+
+    """
     if randomize:
-        return _random_scene(seed=seed)
-    return _manual_scene(greyshaded=greyshaded)
+        world = _random_scene(seed=seed, extent=extent, ground=ground)
+    else:
+        world = _manual_scene(greyshaded=greyshaded, ground=ground)
+    if lighting == LIGHTING.LAMPS:
+        _add_lamps(world, randomize=randomize)
+
+    return accelerate(world, accelerator)
+
+
+def accelerate(world, accelerator):
+    """Wrap the objects of a flat world in an acceleration structure."""
+    if accelerator == ACCELERATOR.BVH:
+        return BVH(world.hittable_list)
+    if accelerator == ACCELERATOR.GRID:
+        return UniformGrid(world.hittable_list)
+    return world
+
+
+def _add_lamps(world, randomize=False):
+    """Hang small lamps above the scene."""
+    lamp = material.DiffuseLight(_LAMP)
+    if randomize:
+        lamps = [
+            Sphere(Point3(-4.0, 4.0, 2.0), 0.5, lamp),
+            Sphere(Point3(0.0, 4.5, -2.0), 0.5, lamp),
+            Sphere(Point3(4.0, 4.0, 2.0), 0.5, lamp),
+        ]
+    else:
+        lamps = [Sphere(Point3(0.0, 1.2, -0.4), 0.1, lamp)]
+    for item in lamps:
+        world.append(item)
+
+
+def _ground(center, radius, material_, ground):
+    """Ground sphere, or the plane tangent to its top."""
+    if ground == GROUND.PLANE:
+        return Plane(center + Vec3(0.0, radius, 0.0), Vec3(0.0, 1.0, 0.0), material_)
+    return Sphere(center, radius, material_)
 
 
-def _manual_scene(greyshaded=False):
+def _manual_scene(greyshaded=False, ground=GROUND.SPHERE):
     """Manually construct a scene."""
     # Materials
     if greyshaded:
@@ -31,7 +123,7 @@ def _manual_scene(greyshaded=False):
     # World scene with materials assigned
     scene = HittableList(
         [
-            Sphere(Point3(0.0, -100.5, -1.0), 100.0, material=mat_ground),
+            _ground(Point3(0.0, -100.5, -1.0), 100.0, mat_ground, ground),
             Sphere(Point3(0.0, 0.0, -1.0), 0.5, material=mat_center),
             Sphere(Point3(-1.0, 0.0, -1.0), 0.5, material=mat_left),
             Sphere(Point3(-1.0, 0.0, -1.0), 0.4, material=mat_left),
@@ -42,15 +134,15 @@ def _manual_scene(greyshaded=False):
     return scene
 
 
-def _random_scene(seed=None):
+def _random_scene(seed=None, extent=11, ground=GROUND.SPHERE):
     """Construct a random scene."""
     world = HittableList()
 
     mat_ground = material.Lambertian(Color(0.5, 0.5, 0.5))
-    world.append(Sphere(Point3(0, -1000, 0), 1000, mat_ground))
+    world.append(_ground(Point3(0, -1000, 0), 1000, mat_ground, ground))
 
-    for a in range(-11, 11):
-        for b in range(-11, 11):
+    for a in range(-extent, extent):
+        for b in range(-extent, extent):
             if seed is not None:
                 seed += 1
                 random.seed(seed)
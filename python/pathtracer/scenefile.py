@@ -0,0 +1,450 @@
+"""Scene files.
+
+A scene file describes everything :func:`render._image` needs: the image
+settings, the camera, the materials, the spheres and the (optional) infinite
+planes and triangle meshes. Spheres, planes and meshes refer to their material
+by name, each material is built only once however many objects use it. There
+are two flavours of the same description:
+
+- json, to be written by hand:
+
+    {
+      "settings": {"resx": 400, "resy": 225, "samples": 10, "max_depth": 50},
+      "camera": {
+        "lookfrom": [3, 3, 2], "lookat": [0, 0, -1], "vup": [0, 1, 0],
+        "vfov": 20, "aspect_ratio": 1.78, "aperture": 2.0, "focus_dist": 5.2
+      },
+      "materials": {
+        "ground": {"type": "lambertian", "albedo": [0.8, 0.8, 0.0]},
+        "gold": {"type": "metal", "albedo": [0.8, 0.6, 0.2], "fuzz": 0.0},
+        "glass": {"type": "dielectric", "index_of_refraction": 1.5}
+      },
+      "spheres": [
+        {"center": [0, -100.5, -1], "radius": 100, "material": "ground"},
+        {"center": [1, 0, -1], "radius": 0.5, "material": "gold"},
+        {"center": [0, 0, -1], "radius": 0.5}
+      ],
+      "planes": [
+        {"point": [0, -0.5, 0], "normal": [0, 1, 0], "material": "ground"}
+      ],
+      "meshes": [{"path": "teapot.obj", "material": "gold"}]
+    }
+
+  (objects without material are grey shaded). A `"background"` color in the
+  settings replaces the sky gradient, e.g. `[0, 0, 0]` for a scene only lit
+  by `diffuse_light` spheres (`{"type": "diffuse_light", "emit": [4, 4, 4]}`),
+  which are sampled as lights, see :mod:`pathtracer.light`. The meshes are
+  Wavefront OBJ files, their path relative to the scene file, see
+  :mod:`pathtracer.objfile`. A mesh with a list of `"instances"` is loaded
+  once and placed by each of them (see :class:`Instance`), scaled, rotated
+  (degrees around x, y then z) and translated, with its own material if any:
+
+    {"path": "tree.obj", "material": "bark", "instances": [
+      {"translate": [2, 0, 1], "rotate": [0, 30, 0], "scale": 0.5},
+      {"translate": [-3, 0, 4], "scale": [1, 1.5, 1], "material": "dead"}
+    ]}
+
+- binary, for big scenes: the magic bytes `PTSCENE1`, the byte length of a
+  json header (everything but the spheres, materials as a list and planes and
+  meshes referring to them by index) as a little
+  endian uint64, the header padded to a multiple of 8 bytes, then the spheres
+  as float64 `x, y, z, radius` and their int32 material index (-1 for none).
+  The sphere arrays are memory-mapped as is, loading takes next to no time
+  whatever the number of spheres.
+
+Either is loaded as a :class:`PackedSpheres` world, along the meshes if any.
+Scenes with meshes can't be saved.
+"""
+
+from array import array
+import json
+import mmap
+import os
+import struct
+import sys
+
+from .camera import Camera
+from .hittable import (
+    BVH,
+    HittableList,
+    Instance,
+    PackedSpheres,
+    Plane,
+    Sphere,
+    Transform,
+    UniformGrid,
+)
+from .hittable.packed import NO_MATERIAL
+from . import light
+from . import material
+from . import objfile
+from .vec3 import Color, Point3, Vec3
+
+
+MAGIC = b"PTSCENE1"
+
+_SETTINGS = ("resx", "resy", "samples", "max_depth")
+
+
+def _material_to_dict(material_) -> dict:
+    if isinstance(material_, material.Lambertian):
+        return {"type": "lambertian", "albedo": list(material_.albedo)}
+    if isinstance(material_, material.Metal):
+        return {
+            "type": "metal",
+            "albedo": list(material_.albedo),
+            "fuzz": material_.fuzz,
+        }
+    if isinstance(material_, material.Dielectric):
+        return {
+            "type": "dielectric",
+            "index_of_refraction": material_.index_of_refraction,
+        }
+    if isinstance(material_, material.DiffuseLight):
+        return {"type": "diffuse_light", "emit": list(material_.emit)}
+    raise TypeError(f"Can't save material {type(material_).__name__}")
+
+
+def _material_from_dict(data):
+    kind = data["type"]
+    if kind == "lambertian":
+        return material.Lambertian(Color(*data["albedo"]))
+    if kind == "metal":
+        return material.Metal(Color(*data["albedo"]), data.get("fuzz", 0.0))
+    if kind == "dielectric":
+        return material.Dielectric(data["index_of_refraction"])
+    if kind == "diffuse_light":
+        return material.DiffuseLight(Color(*data["emit"]))
+    raise ValueError(f"Unknown material type {kind!r}")
+
+
+def _camera_to_dict(camera: Camera) -> dict:
+    return {
+        "lookfrom": list(camera.lookfrom),
+        "lookat": list(camera.lookat),
+        "vup": list(camera.vup),
+        "vfov": camera.vfov,
+        "aspect_ratio": camera.aspect_ratio,
+        "aperture": camera.aperture,
+        "focus_dist": camera.focus_dist,
+    }
+
+
+def _camera_from_dict(data) -> Camera:
+    return Camera(
+        lookfrom=Point3(*data["lookfrom"]),
+        lookat=Point3(*data["lookat"]),
+        vup=Vec3(*data["vup"]),
+        vfov=data["vfov"],
+        aspect_ratio=data["aspect_ratio"],
+        aperture=data["aperture"],
+        focus_dist=data["focus_dist"],
+    )
+
+
+def pack(world) -> PackedSpheres:
+    """Pack a world of spheres and planes, sharing a copy of identical materials."""
+    if isinstance(world, PackedSpheres):
+        return world
+    if isinstance(world, (BVH, UniformGrid)):
+        objects = world.objects
+    else:
+        objects = world.hittable_list
+
+    spheres = array("d")
+    material_ids = array("i")
+    planes = array("d")
+    plane_material_ids = array("i")
+    materials = []
+    ids = {None: NO_MATERIAL}  # by material object
+    ids_by_value = {}  # by json description
+
+    def material_id(material_):
+        id_ = ids.get(material_)
+        if id_ is None:
+            key = json.dumps(_material_to_dict(material_), sort_keys=True)
+            id_ = ids_by_value.get(key)
+            if id_ is None:
+                id_ = ids_by_value[key] = len(materials)
+                materials.append(material_)
+            ids[material_] = id_
+        return id_
+
+    for item in objects:
+        if isinstance(item, Plane):
+            planes.extend((*item.normal, item.offset))
+            plane_material_ids.append(material_id(item.material))
+            continue
+        if not isinstance(item, Sphere):
+            raise TypeError(
+                f"Can't save {type(item).__name__}, only spheres and planes"
+            )
+        spheres.extend((item.center.x, item.center.y, item.center.z, item.radius))
+        material_ids.append(material_id(item.material))
+
+    return PackedSpheres(
+        spheres,
+        material_ids,
+        materials,
+        planes=planes,
+        plane_material_ids=plane_material_ids,
+    )
+
+
+def _header(resx, resy, camera, samples, max_depth, world, background) -> dict:
+    settings = {
+        "resx": resx,
+        "resy": resy,
+        "samples": samples,
+        "max_depth": max_depth,
+    }
+    if background is not None:
+        settings["background"] = list(background)
+    return {
+        "settings": settings,
+        "camera": _camera_to_dict(camera),
+        "materials": [_material_to_dict(material_) for material_ in world.materials],
+    }
+
+
+def _planes_to_dicts(world, names) -> list:
+    """Planes of a packed world, referring to their material by `names[id]`."""
+    planes = []
+    for index, material_id in enumerate(world.plane_material_ids):
+        x, y, z, offset = world.planes[4 * index : 4 * index + 4]
+        plane = {"point": [offset * x, offset * y, offset * z], "normal": [x, y, z]}
+        if material_id != NO_MATERIAL:
+            plane["material"] = names[material_id]
+        planes.append(plane)
+    return planes
+
+
+def _planes_from_dicts(items, ids, path) -> tuple:
+    """`(planes, plane_material_ids)` arrays, see :class:`PackedSpheres`."""
+    planes = array("d")
+    plane_material_ids = array("i")
+    for item in items:
+        plane = Plane(Point3(*item["point"]), Vec3(*item["normal"]))
+        planes.extend((*plane.normal, plane.offset))
+        name = item.get("material")
+        if name is not None and name not in ids:
+            raise ValueError(f"Plane material {name!r} isn't defined in {path}")
+        plane_material_ids.append(ids.get(name, NO_MATERIAL))
+    return planes, plane_material_ids
+
+
+def _dump_json(header, f):
+    """Dump the json description with one material, sphere or plane per line."""
+
+    def lines(items):
+        return ",\n".join(f"    {item}" for item in items)
+
+    materials = lines(
+        f"{json.dumps(name)}: {json.dumps(data)}"
+        for name, data in header["materials"].items()
+    )
+    spheres = lines(json.dumps(sphere) for sphere in header["spheres"])
+    planes = ""
+    if header.get("planes"):
+        planes = lines(json.dumps(plane) for plane in header["planes"])
+        planes = f',\n  "planes": [\n{planes}\n  ]'
+    f.write(
+        "{\n"
+        f'  "settings": {json.dumps(header["settings"])},\n'
+        f'  "camera": {json.dumps(header["camera"])},\n'
+        f'  "materials": {{\n{materials}\n  }},\n'
+        f'  "spheres": [\n{spheres}\n  ]{planes}\n'
+        "}\n"
+    )
+
+
+def save(
+    path, resx, resy, camera, samples, max_depth, world, background=None, lights=()
+):
+    """Save a scene, as json if `path` ends with `.json` else as binary.
+
+    The arguments are those of `render._SceneSettings`, the world must be made
+    of spheres and planes only. The lights aren't saved, they are found again
+    from the materials when loading.
+    """
+    world = pack(world)
+    header = _header(resx, resy, camera, samples, max_depth, world, background)
+
+    if path.endswith(".json"):
+        names = [
+            f"{data['type']}_{index}" for index, data in enumerate(header["materials"])
+        ]
+        header["materials"] = dict(zip(names, header["materials"]))
+        spheres = []
+        for index, material_id in enumerate(world.material_ids):
+            sphere = {
+                "center": list(world.spheres[4 * index : 4 * index + 3]),
+                "radius": world.spheres[4 * index + 3],
+            }
+            if material_id != NO_MATERIAL:
+                sphere["material"] = names[material_id]
+            spheres.append(sphere)
+        header["spheres"] = spheres
+        if world.plane_material_ids:
+            header["planes"] = _planes_to_dicts(world, names)
+        with open(path, "w", encoding="utf-8") as f:
+            _dump_json(header, f)
+        return
+
+    spheres = array("d", world.spheres)
+    material_ids = array("i", world.material_ids)
+    if sys.byteorder != "little":
+        spheres.byteswap()
+        material_ids.byteswap()
+    header["count"] = len(material_ids)
+    if world.plane_material_ids:
+        header["planes"] = _planes_to_dicts(world, range(len(world.materials)))
+    data = json.dumps(header).encode("utf-8")
+    data += b" " * (-len(data) % 8)  # keep the float64 array aligned
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(data)))
+        f.write(data)
+        f.write(spheres.tobytes())
+        f.write(material_ids.tobytes())
+
+
+def _transform_from_dict(data) -> Transform:
+    """Scale, then rotate around the x, y and z axes, then translate."""
+    scale = data.get("scale", 1.0)
+    if isinstance(scale, (int, float)):
+        scale = (scale, scale, scale)
+    transform = Transform.scaling(*scale)
+    for axis, degrees in zip(
+        (Vec3(1, 0, 0), Vec3(0, 1, 0), Vec3(0, 0, 1)), data.get("rotate", (0, 0, 0))
+    ):
+        if degrees:
+            transform = Transform.rotation(axis, degrees) @ transform
+    return Transform.translation(*data.get("translate", (0, 0, 0))) @ transform
+
+
+def _meshes_from_dicts(items, ids, materials, path) -> list:
+    """Meshes of OBJ files, relative to the scene file, see :mod:`objfile`.
+
+    A mesh with `instances` is loaded once and placed by each of them.
+    """
+
+    def material_of(item, kind):
+        name = item.get("material")
+        if name is not None and name not in ids:
+            raise ValueError(f"{kind} material {name!r} isn't defined in {path}")
+        return materials[ids[name]] if name is not None else None
+
+    meshes = []
+    for item in items:
+        mesh_path = os.path.join(os.path.dirname(path), item["path"])
+        mesh = objfile.load(mesh_path, material=material_of(item, "Mesh"))
+        if "instances" not in item:
+            meshes.append(mesh)
+            continue
+        for instance in item["instances"]:
+            meshes.append(
+                Instance(
+                    mesh,
+                    _transform_from_dict(instance),
+                    material=material_of(instance, "Instance"),
+                )
+            )
+    return meshes
+
+
+def _scene(header, world, meshes=()) -> dict:
+    if meshes:
+        world = HittableList([world, *meshes])
+    scene = {name: header["settings"][name] for name in _SETTINGS}
+    scene["camera"] = _camera_from_dict(header["camera"])
+    scene["world"] = world
+    background = header["settings"].get("background")
+    scene["background"] = None if background is None else Color(*background)
+    scene["lights"] = light.find_lights(world)
+    return scene
+
+
+def _load_json(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        header = json.load(f)
+
+    names = list(header.get("materials", {}))
+    materials = [_material_from_dict(header["materials"][name]) for name in names]
+    ids = {name: index for index, name in enumerate(names)}
+    spheres = array("d")
+    material_ids = array("i")
+    for sphere in header["spheres"]:
+        spheres.extend(sphere["center"])
+        spheres.append(sphere["radius"])
+        name = sphere.get("material")
+        if name is not None and name not in ids:
+            raise ValueError(f"Sphere material {name!r} isn't defined in {path}")
+        material_ids.append(ids.get(name, NO_MATERIAL))
+    planes, plane_material_ids = _planes_from_dicts(
+        header.get("planes", []), ids, path
+    )
+    world = PackedSpheres(
+        spheres,
+        material_ids,
+        materials,
+        planes=planes,
+        plane_material_ids=plane_material_ids,
+    )
+    meshes = _meshes_from_dicts(header.get("meshes", []), ids, materials, path)
+    return _scene(header, world, meshes)
+
+
+def _load_binary(path) -> dict:
+    with open(path, "rb") as f:
+        # The mapping stays open as long as the arrays are used.
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    start = len(MAGIC) + 8
+    (size,) = struct.unpack_from("<Q", data, len(MAGIC))
+    header = json.loads(data[start : start + size])
+    count = header["count"]
+
+    start += size
+    if len(data) != start + 36 * count:
+        raise ValueError(
+            f"Scene file {path} is corrupted: expected {start + 36 * count} "
+            f"bytes, found {len(data)}"
+        )
+    view = memoryview(data)
+    spheres = view[start : start + 32 * count].cast("d")
+    material_ids = view[start + 32 * count : start + 36 * count].cast("i")
+    if sys.byteorder != "little":
+        spheres = array("d", spheres)
+        spheres.byteswap()
+        material_ids = array("i", material_ids)
+        material_ids.byteswap()
+
+    materials = [_material_from_dict(item) for item in header["materials"]]
+    ids = {index: index for index in range(len(materials))}
+    planes, plane_material_ids = _planes_from_dicts(header.get("planes", []), ids, path)
+    world = PackedSpheres(
+        spheres,
+        material_ids,
+        materials,
+        planes=planes,
+        plane_material_ids=plane_material_ids,
+    )
+    meshes = _meshes_from_dicts(header.get("meshes", []), ids, materials, path)
+    return _scene(header, world, meshes)
+
+
+def load(path) -> dict:
+    """Load a scene file (json or binary).
+
+    Returns:
+        dict: The `render._SceneSettings` fields, the world being a
+            :class:`PackedSpheres`, in a :class:`HittableList` along the
+            meshes if any.
+
+    """
+    with open(path, "rb") as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    if binary:
+        return _load_binary(path)
+    return _load_json(path)
+
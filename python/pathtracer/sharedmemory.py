@@ -0,0 +1,100 @@
+"""Arrays shared with the worker processes.
+
+Named arrays are laid out in a single :mod:`multiprocessing.shared_memory`
+block created by the main process. The workers attach to it by name and work
+on zero-copy memoryviews of the arrays, nothing is pickled but the handle.
+"""
+
+from array import array
+import math
+from multiprocessing import shared_memory
+import struct
+
+
+_ALIGNMENT = 64  # bytes, start of every array in the block
+
+# Shared memory blocks this (worker) process is attached to, kept open for the
+# whole life of the process since its views point into them.
+_ATTACHED = []
+
+
+def _views(memory, layout) -> dict:
+    views = {}
+    for name, (start, nbytes, item_format, shape) in layout.items():
+        if not nbytes:  # memoryviews can't be cast to empty shapes
+            views[name] = memoryview(array(item_format))
+            continue
+        views[name] = memory.buf[start : start + nbytes].cast(item_format, shape)
+    return views
+
+
+class SharedArrays:
+    """Named arrays in a single shared memory block.
+
+    Args:
+        arrays (dict): C-contiguous buffers (`array`, ndarray...) by name,
+            copied into the block.
+
+    """
+
+    def __init__(self, arrays):
+        specs = {}
+        for name, buffer in arrays.items():
+            with memoryview(buffer) as view:
+                specs[name] = (view.format, view.shape)
+        self._allocate(specs)
+        layout = self.handle[1]
+        for name, buffer in arrays.items():
+            start, nbytes, _, _ = layout[name]
+            if not nbytes:
+                continue
+            with memoryview(buffer) as view:
+                self._memory.buf[start : start + nbytes] = view.cast("B")
+
+    @classmethod
+    def zeros(cls, specs):
+        """Shared arrays filled with zeros.
+
+        Args:
+            specs (dict): `(format, shape)` of the arrays by name, `format`
+                being a :mod:`struct` format character.
+
+        """
+        shared = cls.__new__(cls)
+        shared._allocate(specs)  # new shared memory is zero filled
+        return shared
+
+    def _allocate(self, specs):
+        layout = {}
+        size = 0
+        for name, (item_format, shape) in specs.items():
+            nbytes = struct.calcsize(item_format) * math.prod(shape)
+            layout[name] = (size, nbytes, item_format, tuple(shape))
+            size += -(-nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.handle = (self._memory.name, layout)
+        """tuple: picklable `(name, layout)` of the block, see :func:`attach`."""
+
+    def views(self) -> dict:
+        """Memoryviews of the arrays by name, to be released before closing."""
+        return _views(self._memory, self.handle[1])
+
+    def close(self):
+        """Release and destroy the shared memory block."""
+        self._memory.close()
+        self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def attach(handle) -> dict:
+    """Zero-copy memoryviews of the arrays shared under `handle`, by name."""
+    name, layout = handle
+    memory = shared_memory.SharedMemory(name=name)
+    _ATTACHED.append(memory)
+    return _views(memory, layout)
@@ -0,0 +1,72 @@
+"""Scene shared with the worker processes.
+
+Instead of pickling the world to every worker, which then holds its own copy,
+the scene is flattened once into packed arrays, copied into a single
+:mod:`multiprocessing.shared_memory` block, and the workers build their world
+on top of zero-copy views of it. Memory use stays that of one scene whatever
+the number of workers, and starting a worker costs the same whatever the size
+of the scene.
+
+- The scalar engine shares the spheres, the planes, their material ids, the
+  material parameters and the flattened BVH (if any), see
+  :class:`PackedSpheres`.
+- The numpy engine shares its ready made structure-of-arrays scene, see
+  :func:`wavefront.scene_arrays`.
+
+Uniform grids aren't flattened, the scalar engine workers get them pickled.
+"""
+
+from .hittable import BVH, PackedSpheres, Plane, UniformGrid
+from .hittable.packed import PackedMaterials, flatten_bvh, pack_materials
+from . import scenefile
+from .sharedmemory import SharedArrays, attach
+from . import wavefront
+
+
+def share(world, numpy_engine=False) -> SharedArrays:
+    """Copy the world into shared memory, in the layout of the render engine.
+
+    Raises:
+        TypeError: For worlds not made of spheres (and planes with the scalar
+            engine) with the built-in materials, and uniform grids with the
+            scalar engine.
+
+    """
+    if numpy_engine:
+        return SharedArrays(wavefront.scene_arrays(world)._asdict())
+    if isinstance(world, UniformGrid):
+        raise TypeError("Can't share a uniform grid")
+
+    packed = scenefile.pack(world)
+    arrays = {
+        "spheres": packed.spheres,
+        "material_ids": packed.material_ids,
+        "materials": pack_materials(packed.materials),
+    }
+    if packed.plane_material_ids:
+        arrays["planes"] = packed.planes
+        arrays["plane_material_ids"] = packed.plane_material_ids
+    if isinstance(world, BVH) and len(world) - len(world.unbounded) > 1:
+        # `pack` keeps the spheres order, the planes are out of the hierarchy.
+        spheres = [item for item in world.objects if not isinstance(item, Plane)]
+        index_of = {id(item): index for index, item in enumerate(spheres)}
+        arrays["bvh_boxes"], arrays["bvh_nodes"] = flatten_bvh(world, index_of)
+    elif packed.bvh_nodes is not None:
+        arrays["bvh_boxes"], arrays["bvh_nodes"] = packed.bvh_boxes, packed.bvh_nodes
+    return SharedArrays(arrays)
+
+
+def world(handle, numpy_engine=False):
+    """World of a worker process on top of the shared arrays, see :func:`share`."""
+    views = attach(handle)
+    if numpy_engine:
+        return wavefront.scene_from_buffers(views)
+    return PackedSpheres(
+        views["spheres"],
+        views["material_ids"],
+        PackedMaterials(views["materials"]),
+        bvh_boxes=views.get("bvh_boxes"),
+        bvh_nodes=views.get("bvh_nodes"),
+        planes=views.get("planes"),
+        plane_material_ids=views.get("plane_material_ids"),
+    )
@@ -5,14 +5,24 @@ import random
 
 
 class Vec3:
-    """Vector 3 implementation."""
+    """Vector 3 implementation.
+
+    The components are stored in slots and the operators skip any type
+    checking: they are the hottest code of the renderer.
+    """
+
+    __slots__ = ("x", "y", "z")
 
     def __init__(self, x: float = 0, y: float = 0, z: float = 0) -> None:
-        self._values = [x, y, z]
+        self.x = x
+        self.y = y
+        self.z = z
 
     def to_int(self):
         """Cast the 3 vector values to int."""
-        self._values = [int(value) for value in self._values]
+        self.x = int(self.x)
+        self.y = int(self.y)
+        self.z = int(self.z)
         return self
 
     def squared_length(self) -> float:
@@ -21,7 +31,7 @@ class Vec3:
 
     def length(self) -> float:
         """Calculate vector length."""
-        return math.sqrt(self.squared_length())
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
 
     def make_unit_vector(self):
         """Transform into a unit vector."""
@@ -32,7 +42,8 @@ class Vec3:
 
     def unit_vector(self):
         """Get unit vector."""
-        return self / self.length()
+        k = 1 / math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+        return Vec3(self.x * k, self.y * k, self.z * k)
 
     def near_zero(self):
         """Whether the vector is close to zero in all dimensions."""
@@ -41,29 +52,66 @@ class Vec3:
 
     def dot(self, other) -> float:
         """Calculate the dot product with another vector."""
-        assert isinstance(other, Vec3)
         return self.x * other.x + self.y * other.y + self.z * other.z
 
     def cross(self, other):
         """Calculate the cross product with another vector."""
-        assert isinstance(other, Vec3)
         return Vec3(
             self.y * other.z - other.y * self.z,
             -(self.x * other.z - other.x * self.z),
             self.x * other.y - other.x * self.y,
         )
 
+    def mul_add(self, scalar: float, other):
+        """Fused `self + scalar * other`."""
+        return Vec3(
+            self.x + scalar * other.x,
+            self.y + scalar * other.y,
+            self.z + scalar * other.z,
+        )
+
+    def sub_dot(self, other, vector) -> float:
+        """Fused `(self - other).dot(vector)`."""
+        return (
+            (self.x - other.x) * vector.x
+            + (self.y - other.y) * vector.y
+            + (self.z - other.z) * vector.z
+        )
+
+    def sub_mul(self, other, scalar: float):
+        """Fused `(self - other) * scalar`."""
+        return Vec3(
+            (self.x - other.x) * scalar,
+            (self.y - other.y) * scalar,
+            (self.z - other.z) * scalar,
+        )
+
+    def distance_squared(self, other) -> float:
+        """Fused `(self - other).squared_length()`."""
+        x = self.x - other.x
+        y = self.y - other.y
+        z = self.z - other.z
+        return x * x + y * y + z * z
+
     def __str__(self):
         return f"{self.x} {self.y} {self.z}"
 
+    def __repr__(self):
+        return f"{type(self).__name__}({self.x}, {self.y}, {self.z})"
+
     def __len__(self):
-        return len(self._values)
+        return 3
+
+    def __iter__(self):
+        yield self.x
+        yield self.y
+        yield self.z
 
     def __getitem__(self, index):
-        return self._values[index]
+        return (self.x, self.y, self.z)[index]
 
     def __setitem__(self, index, value):
-        self._values[index] = value
+        setattr(self, ("x", "y", "z")[index], value)
 
     def __pos__(self):
         return self
@@ -72,169 +120,121 @@ class Vec3:
         return Vec3(-self.x, -self.y, -self.z)
 
     def __add__(self, other):
-        assert isinstance(other, Vec3)
-        return Vec3(
-            self.x + other.x,
-            self.y + other.y,
-            self.z + other.z,
-        )
+        return Vec3(self.x + other.x, self.y + other.y, self.z + other.z)
 
-    def __radd__(self, other):
-        return self.__add__(other)
+    __radd__ = __add__
 
     def __iadd__(self, other):
-        assert isinstance(other, Vec3)
         self.x += other.x
         self.y += other.y
         self.z += other.z
         return self
 
     def __sub__(self, other):
-        assert isinstance(other, Vec3)
-        return Vec3(
-            self.x - other.x,
-            self.y - other.y,
-            self.z - other.z,
-        )
+        return Vec3(self.x - other.x, self.y - other.y, self.z - other.z)
 
     def __isub__(self, other):
-        assert isinstance(other, Vec3)
         self.x -= other.x
         self.y -= other.y
         self.z -= other.z
         return self
 
     def __mul__(self, other):
-        if isinstance(other, (float, int)):
-            return Vec3(
-                self.x * other,
-                self.y * other,
-                self.z * other,
-            )
-
-        assert isinstance(other, Vec3)
-        return Vec3(
-            self.x * other.x,
-            self.y * other.y,
-            self.z * other.z,
-        )
+        if isinstance(other, Vec3):
+            return Vec3(self.x * other.x, self.y * other.y, self.z * other.z)
+        return Vec3(self.x * other, self.y * other, self.z * other)
 
-    def __rmul__(self, other):
-        return self.__mul__(other)
+    __rmul__ = __mul__
 
     def __imul__(self, other):
-        if isinstance(other, (float, int)):
-            self.x *= other
-            self.y *= other
-            self.z *= other
-        else:
-            assert isinstance(other, Vec3)
+        if isinstance(other, Vec3):
             self.x *= other.x
             self.y *= other.y
             self.z *= other.z
+        else:
+            self.x *= other
+            self.y *= other
+            self.z *= other
         return self
 
     def __truediv__(self, other):
-        if isinstance(other, (float, int)):
-            return Vec3(
-                self.x / other,
-                self.y / other,
-                self.z / other,
-            )
-
-        assert isinstance(other, Vec3)
-        return Vec3(
-            self.x / other.x,
-            self.y / other.y,
-            self.z / other.z,
-        )
+        if isinstance(other, Vec3):
+            return Vec3(self.x / other.x, self.y / other.y, self.z / other.z)
+        factor = 1 / other
+        return Vec3(self.x * factor, self.y * factor, self.z * factor)
 
     def __itruediv__(self, other):
-        if isinstance(other, (float, int)):
+        if isinstance(other, Vec3):
+            self.x /= other.x
+            self.y /= other.y
+            self.z /= other.z
+        else:
             factor = 1 / other
             self.x *= factor
             self.y *= factor
             self.z *= factor
-        else:
-            assert isinstance(other, Vec3)
-            self.x /= other.x
-            self.y /= other.y
-            self.z /= other.z
         return self
 
-    @property
-    def x(self) -> float:
-        """X value."""
-        return self._values[0]
+    def __getstate__(self):
+        return (self.x, self.y, self.z)
 
-    @x.setter
-    def x(self, value: float):
-        self._values[0] = value
+    def __setstate__(self, state):
+        self.x, self.y, self.z = state
 
     @property
     def r(self) -> float:
         """R value."""
-        return self._values[0]
+        return self.x
 
     @r.setter
     def r(self, value: float):
-        self._values[0] = value
-
-    @property
-    def y(self) -> float:
-        """Y value."""
-        return self._values[1]
-
-    @y.setter
-    def y(self, value: float):
-        self._values[1] = value
+        self.x = value
 
     @property
     def g(self) -> float:
         """G value."""
-        return self._values[1]
+        return self.y
 
     @g.setter
     def g(self, value: float):
-        self._values[1] = value
-
-    @property
-    def z(self) -> float:
-        """Z value."""
-        return self._values[2]
-
-    @z.setter
-    def z(self, value: float):
-        self._values[2] = value
+        self.y = value
 
     @property
     def b(self) -> float:
         """B value."""
-        return self._values[2]
+        return self.z
 
     @b.setter
     def b(self, value: float):
-        self._values[2] = value
+        self.z = value
 
     @staticmethod
-    def random(min_value=None, max_value=None):
-        """Generate random vector."""
+    def random(min_value=None, max_value=None, rng=random):
+        """Generate random vector.
+
+        `rng` is anything implementing `random()` and `uniform()`, the
+        :mod:`random` module itself or e.g. a :class:`rng.SampleRng`.
+        """
         if min_value is None or max_value is None:
-            return Vec3(random.random(), random.random(), random.random())
+            return Vec3(rng.random(), rng.random(), rng.random())
         return Vec3(
-            random.uniform(min_value, max_value),
-            random.uniform(min_value, max_value),
-            random.uniform(min_value, max_value),
+            rng.uniform(min_value, max_value),
+            rng.uniform(min_value, max_value),
+            rng.uniform(min_value, max_value),
         )
 
 
 class Point3(Vec3):
     """Point"""
 
+    __slots__ = ()
+
 
 class Color(Vec3):
     """Color."""
 
+    __slots__ = ()
+
     def as_string(self, samples_per_pixel=1):
         """Translate to a [0, 255] color value as string for each component."""
         r = self.r
@@ -258,46 +258,105 @@ def clamp(value, min_value, max_value):
     return max(min(value, max_value), min_value)
 
 
-def random_in_unit_sphere():
-    """Rejection method to check if a point in a unit cube is also inside a unit sphere."""
-    while True:
-        point = Vec3.random(-1, 1)
-        if point.squared_length() >= 1:
-            continue
-        return point
-
-
-def random_in_unit_disk():
-    """Generate random point inside the unit disk."""
-    while True:
-        point = Vec3.random(-1, 1)
-        point.z = 0
-        if point.squared_length() >= 1:
-            continue
-        return point
-
-
-def random_unit_vector():
-    """Unit random in sphere vector."""
-    return random_in_unit_sphere().unit_vector()
-
-
-def random_in_hemisphere(normal):
-    """Check if point is in the same hemisphere as the normal."""
-    in_unit_sphere = random_in_unit_sphere()
-    if in_unit_sphere.dot(normal) > 0.0:
-        return in_unit_sphere
-    return -in_unit_sphere
+def random_in_unit_sphere(rng=random):
+    """Uniform random point inside the unit sphere, from 3 draws.
+
+    A random direction (see :func:`random_unit_vector`) scaled by the cube root
+    of a random number, for a uniform density in volume. Closed form rather
+    than rejection sampling, so a point always takes the same draws and
+    stratified samples (see :mod:`pathtracer.sampler`) stay stratified.
+    """
+    z = rng.uniform(-1.0, 1.0)
+    phi = rng.uniform(0.0, 2.0 * math.pi)
+    radius = rng.random() ** (1 / 3)
+    ring = radius * math.sqrt(max(0.0, 1.0 - z * z))
+    return Vec3(ring * math.cos(phi), ring * math.sin(phi), radius * z)
+
+
+def concentric_disk(rng=random):
+    """Uniform random `(x, y)` point inside the unit disk, from 2 draws.
+
+    Shirley and Chiu's concentric mapping of the square `[-1, 1)^2` onto the
+    disk: squares around the center become rings, so neighbouring (e.g.
+    stratified) samples stay neighbours and evenly spread on the disk.
+    """
+    a = rng.uniform(-1.0, 1.0)
+    b = rng.uniform(-1.0, 1.0)
+    if a == 0.0 and b == 0.0:
+        return 0.0, 0.0
+    if abs(a) > abs(b):
+        radius = a
+        theta = 0.25 * math.pi * (b / a)
+    else:
+        radius = b
+        theta = 0.5 * math.pi - 0.25 * math.pi * (a / b)
+    return radius * math.cos(theta), radius * math.sin(theta)
+
+
+def random_in_unit_disk(rng=random):
+    """Uniform random point inside the unit disk (z = 0).
+
+    See :func:`concentric_disk`.
+    """
+    x, y = concentric_disk(rng=rng)
+    return Vec3(x, y, 0.0)
+
+
+def random_unit_vector(rng=random):
+    """Uniform random unit vector, from 2 draws.
+
+    The z coordinate of a uniform direction is itself uniform in [-1, 1]
+    (Archimedes' hat-box theorem), the azimuth uniform around it.
+    """
+    z = rng.uniform(-1.0, 1.0)
+    phi = rng.uniform(0.0, 2.0 * math.pi)
+    radius = math.sqrt(max(0.0, 1.0 - z * z))
+    return Vec3(radius * math.cos(phi), radius * math.sin(phi), z)
+
+
+def random_cosine_direction(normal, rng=random):
+    """Random unit vector around a unit normal, cosine weighted, from 2 draws.
+
+    The probability density of the direction is `cos(theta) / pi`, the ideal
+    diffuse reflection: a point of the unit disk (see :func:`concentric_disk`)
+    lifted onto the hemisphere (Malley's method), around the normal.
+    """
+    x, y = concentric_disk(rng=rng)
+    return from_local(normal, x, y, math.sqrt(max(0.0, 1.0 - x * x - y * y)))
+
+
+def from_local(normal, x: float, y: float, z: float):
+    """Vector of coordinates `x, y, z` in a frame whose z axis is the unit normal.
+
+    The x and y axes are the branchless orthonormal basis of Duff et al. (2017).
+    """
+    nx, ny, nz = normal.x, normal.y, normal.z
+    sign = math.copysign(1.0, nz)
+    a = -1.0 / (sign + nz)
+    b = nx * ny * a
+    return Vec3(
+        x * (1.0 + sign * nx * nx * a) + y * b + z * nx,
+        x * sign * b + y * (sign + ny * ny * a) + z * ny,
+        -x * sign * nx - y * ny + z * nz,
+    )
+
+
+def random_in_hemisphere(normal, rng=random):
+    """Uniform random point inside the unit half sphere on the side of the normal."""
+    point = random_in_unit_sphere(rng=rng)
+    if point.dot(normal) <= 0.0:
+        point.x, point.y, point.z = -point.x, -point.y, -point.z
+    return point
 
 
 def reflect(vector_a, vector_b):
     """Reflected ray."""
-    return vector_a - 2 * vector_a.dot(vector_b) * vector_b
+    return vector_a.mul_add(-2 * vector_a.dot(vector_b), vector_b)
 
 
 def refract(uv: Vec3, n: Vec3, etai_over_etat):
     """Refracted ray."""
     cos_theta = min(-uv.dot(n), 1.0)
-    r_out_perp = etai_over_etat * (uv + cos_theta * n)
-    r_out_parallel = -math.sqrt(abs(1.0 - r_out_perp.squared_length())) * n
-    return r_out_perp + r_out_parallel
+    r_out_perp = uv.mul_add(cos_theta, n)
+    r_out_perp *= etai_over_etat
+    return r_out_perp.mul_add(-math.sqrt(abs(1.0 - r_out_perp.squared_length())), n)
@@ -0,0 +1,110 @@
+"""Batched sample warps: uniform random numbers to points and directions.
+
+NumPy versions of the closed-form samplers of :mod:`pathtracer.vec3`, turning
+arrays of N random numbers into N points or directions at once, for the
+vectorized engines (see :mod:`pathtracer.wavefront`). Each draws the same
+numbers in the same order as its scalar counterpart, so a ray scatters the
+same way whichever engine traces it (up to float rounding).
+
+`random` is anything whose `random()` and `uniform(min_value, max_value)`
+methods return arrays of N floats, e.g. a batch of counter-based streams or a
+:class:`GeneratorRandom`.
+
+NumPy is an optional dependency only required by this module.
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+
+class GeneratorRandom:
+    """Batches of N random numbers from a :class:`numpy.random.Generator`.
+
+    Args:
+        generator (numpy.random.Generator): Random numbers source.
+        count (int): Size of the batches.
+
+    """
+
+    def __init__(self, generator, count: int):
+        self.generator = generator
+        self.count = count
+
+    def random(self):
+        """Random floats in [0, 1)."""
+        return self.generator.random(self.count)
+
+    def uniform(self, min_value, max_value):
+        """Random floats in [min_value, max_value)."""
+        return min_value + (max_value - min_value) * self.random()
+
+
+def random_unit_vectors(random):
+    """(N, 3) uniform random unit vectors, see :func:`vec3.random_unit_vector`."""
+    z = random.uniform(-1.0, 1.0)
+    phi = random.uniform(0.0, 2.0 * math.pi)
+    radius = np.sqrt(np.maximum(0.0, 1.0 - z * z))
+    return np.stack((radius * np.cos(phi), radius * np.sin(phi), z), axis=-1)
+
+
+def random_in_unit_sphere(random):
+    """(N, 3) uniform random points inside the unit sphere.
+
+    See :func:`vec3.random_in_unit_sphere`.
+    """
+    z = random.uniform(-1.0, 1.0)
+    phi = random.uniform(0.0, 2.0 * math.pi)
+    radius = np.cbrt(random.random())
+    ring = radius * np.sqrt(np.maximum(0.0, 1.0 - z * z))
+    return np.stack((ring * np.cos(phi), ring * np.sin(phi), radius * z), axis=-1)
+
+
+def random_in_hemisphere(normals, random):
+    """(N, 3) uniform random points inside the unit half spheres of the normals.
+
+    See :func:`vec3.random_in_hemisphere`.
+    """
+    points = random_in_unit_sphere(random)
+    flip = np.einsum("ij,ij->i", points, normals) <= 0.0
+    points[flip] = -points[flip]
+    return points
+
+
+def concentric_disk(random):
+    """`(x, y)` arrays of N uniform random points inside the unit disk.
+
+    See :func:`vec3.concentric_disk`.
+    """
+    a = random.uniform(-1.0, 1.0)
+    b = random.uniform(-1.0, 1.0)
+    wide = np.abs(a) > np.abs(b)
+    radius = np.where(wide, a, b)
+    # Both are 0 where the radius is, any angle does then.
+    ratio = np.where(wide, b, a) / np.where(radius == 0.0, 1.0, radius)
+    theta = 0.25 * math.pi * np.where(wide, ratio, 2.0 - ratio)
+    return radius * np.cos(theta), radius * np.sin(theta)
+
+
+def random_cosine_directions(normals, random):
+    """(N, 3) cosine weighted random unit vectors around (N, 3) unit normals.
+
+    See :func:`vec3.random_cosine_direction`.
+    """
+    x, y = concentric_disk(random)
+    z = np.sqrt(np.maximum(0.0, 1.0 - x * x - y * y))
+    nx, ny, nz = normals[:, 0], normals[:, 1], normals[:, 2]
+    sign = np.copysign(1.0, nz)
+    a = -1.0 / (sign + nz)
+    b = nx * ny * a
+    return np.stack(
+        (
+            x * (1.0 + sign * nx * nx * a) + y * b + z * nx,
+            x * sign * b + y * (sign + ny * ny * a) + z * ny,
+            -x * sign * nx - y * ny + z * nz,
+        ),
+        axis=-1,
+    )
@@ -0,0 +1,665 @@
+"""Vectorized wavefront render engine.
+
+Instead of following one :class:`Ray` at a time through :func:`render.ray_color`,
+this engine generates every camera ray of a tile as structure-of-arrays NumPy
+buffers and advances them all together, one bounce per iteration. Rays that
+escape to the sky or get absorbed are compacted out of the arrays so that each
+bounce only pays for the rays still alive.
+
+NumPy is an optional dependency only required by this engine.
+"""
+
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+from .hittable import BVH, HittableList, PackedSpheres, Sphere, UniformGrid
+from . import adaptive
+from . import material
+from . import raystats
+from .raystats import TERMINATION
+from . import rng
+from . import warp
+
+
+_T_MIN = 0.0001
+_TO_UNIT = 1.0 / (1 << 53)
+
+# Max ray x sphere matrix entries per intersection chunk, to bound memory use.
+_CHUNK_ELEMENTS = 1 << 21
+
+# Material kinds of the flattened scene.
+_GREY = 0
+_LAMBERTIAN = 1
+_METAL = 2
+_DIELECTRIC = 3
+
+# Material names of the kinds in the ray statistics.
+_KIND_NAMES = (raystats.GREY, "lambertian", "metal", "dielectric")
+
+_SceneArrays = namedtuple(
+    "_SceneArrays",
+    ["centers", "radii", "offsets", "kinds", "albedo", "fuzz", "ior"],
+)
+"""tuple: structure-of-arrays flattened scene.
+
+- centers (ndarray): (N, 3) sphere centers.
+- radii (ndarray): (N,) sphere radii.
+- offsets (ndarray): (N,) precomputed `center . center - radius^2`.
+- kinds (ndarray): (N,) material kind per sphere (`_GREY`, `_LAMBERTIAN`...).
+- albedo (ndarray): (N, 3) material albedo (unused by dielectrics).
+- fuzz (ndarray): (N,) metal fuzz.
+- ior (ndarray): (N,) dielectric index of refraction.
+
+"""
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError(
+            "The numpy render engine requires numpy, install it with "
+            "`pip install numpy`."
+        )
+
+
+def _material_arrays(material_):
+    """Kind, albedo, fuzz and index of refraction of a material."""
+    if material_ is None:
+        return _GREY, (0.0, 0.0, 0.0), 0.0, 1.0
+    if isinstance(material_, material.Lambertian):
+        albedo = material_.albedo
+        return _LAMBERTIAN, (albedo.r, albedo.g, albedo.b), 0.0, 1.0
+    if isinstance(material_, material.Metal):
+        albedo = material_.albedo
+        return _METAL, (albedo.r, albedo.g, albedo.b), material_.fuzz, 1.0
+    if isinstance(material_, material.Dielectric):
+        return _DIELECTRIC, (0.0, 0.0, 0.0), 0.0, material_.index_of_refraction
+    raise TypeError(
+        f"The numpy engine does not support material {type(material_).__name__}"
+    )
+
+
+def _packed_scene_arrays(world: PackedSpheres) -> _SceneArrays:
+    """Flattened scene straight out of the packed sphere buffers."""
+    if world.plane_material_ids:
+        raise TypeError("The numpy engine only renders spheres, got planes")
+    spheres = np.frombuffer(world.spheres, dtype=np.float64).reshape(-1, 4)
+    centers = np.ascontiguousarray(spheres[:, :3])
+    radii = np.ascontiguousarray(spheres[:, 3])
+
+    # One row per material, plus a last one for `NO_MATERIAL` (i.e. -1).
+    table = [_material_arrays(material_) for material_ in world.materials]
+    table.append(_material_arrays(None))
+    kinds, albedo, fuzz, ior = (np.array(column) for column in zip(*table))
+    ids = np.frombuffer(world.material_ids, dtype=np.int32)
+
+    offsets = np.einsum("ij,ij->i", centers, centers) - radii * radii
+    return _SceneArrays(
+        centers,
+        radii,
+        offsets,
+        kinds[ids].astype(np.int8),
+        albedo[ids].astype(np.float64),
+        fuzz[ids].astype(np.float64),
+        ior[ids].astype(np.float64),
+    )
+
+
+def scene_arrays(world: HittableList) -> _SceneArrays:
+    """Flatten a world of spheres into structure-of-arrays buffers."""
+    _require_numpy()
+    if isinstance(world, _SceneArrays):  # already flattened, e.g. shared
+        return world
+    if isinstance(world, PackedSpheres):
+        return _packed_scene_arrays(world)
+    # Acceleration structures are no use here, all spheres are tested at once.
+    if isinstance(world, (BVH, UniformGrid)):
+        objects = list(world.objects)
+    else:
+        objects = list(world.hittable_list)
+    count = len(objects)
+
+    centers = np.zeros((count, 3))
+    radii = np.zeros(count)
+    kinds = np.zeros(count, dtype=np.int8)
+    albedo = np.zeros((count, 3))
+    fuzz = np.zeros(count)
+    ior = np.ones(count)
+
+    for index, item in enumerate(objects):
+        if not isinstance(item, Sphere):
+            raise TypeError(
+                f"The numpy engine only renders spheres, got {type(item).__name__}"
+            )
+        centers[index] = (item.center.x, item.center.y, item.center.z)
+        radii[index] = item.radius
+        kinds[index], albedo[index], fuzz[index], ior[index] = _material_arrays(
+            item.material
+        )
+
+    offsets = np.einsum("ij,ij->i", centers, centers) - radii * radii
+    return _SceneArrays(centers, radii, offsets, kinds, albedo, fuzz, ior)
+
+
+def scene_from_buffers(buffers) -> _SceneArrays:
+    """Flattened scene on top of existing buffers (e.g. shared memory), by name.
+
+    The arrays are zero-copy views of the buffers.
+    """
+    _require_numpy()
+    arrays = {name: np.asarray(buffers[name]) for name in _SceneArrays._fields}
+    # Empty buffers come flat.
+    arrays["centers"] = arrays["centers"].reshape(-1, 3)
+    arrays["albedo"] = arrays["albedo"].reshape(-1, 3)
+    return _SceneArrays(**arrays)
+
+
+def _dot(a, b):
+    return np.einsum("ij,ij->i", a, b)
+
+
+def _unit(vectors):
+    return vectors / np.sqrt(_dot(vectors, vectors))[:, None]
+
+
+class _Random:
+    """Vectorized :class:`rng.SampleRng`, one random stream per ray.
+
+    Draws the same numbers as a `SampleRng` of the same key and bounce.
+    """
+
+    def __init__(self, streams):
+        self.streams = streams
+        self._draw = 0
+
+    @classmethod
+    def for_bounce(cls, keys, bounce):
+        """Random streams of the given bounce of the rays sample keys."""
+        return cls(_mix64(keys ^ np.uint64((bounce * rng.MIX_1) & rng.MASK)))
+
+    def subset(self, mask):
+        """Random streams of the masked rays only."""
+        return _Random(self.streams[mask])
+
+    def random(self):
+        """Random floats in [0, 1), one per ray."""
+        self._draw += 1
+        values = _mix64(self.streams + np.uint64((self._draw * rng.GOLDEN) & rng.MASK))
+        return (values >> np.uint64(11)).astype(np.float64) * _TO_UNIT
+
+    def uniform(self, min_value, max_value):
+        """Random floats in [min_value, max_value), one per ray."""
+        return min_value + (max_value - min_value) * self.random()
+
+
+def _mix64(values):
+    """Vectorized :func:`rng.mix64` of an array of uint64."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(rng.MIX_1)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(rng.MIX_2)
+    return values ^ (values >> np.uint64(31))
+
+
+def sample_keys(seed, pixels, samples):
+    """Vectorized :func:`rng.sample_key` of arrays of pixels and samples."""
+    seed = np.uint64((seed * rng.GOLDEN) & rng.MASK)
+    keys = _mix64(seed + pixels.astype(np.uint64))
+    return _mix64(keys + samples.astype(np.uint64) * np.uint64(rng.GOLDEN))
+
+
+def _reflect(vectors, normals):
+    return vectors - 2 * _dot(vectors, normals)[:, None] * normals
+
+
+def _intersect(scene, origins, directions):
+    """Closest hit of every ray against every sphere.
+
+    Returns:
+        tuple: `(t, index)` arrays, `t` is `inf` for rays that miss everything.
+
+    """
+    count = len(origins)
+    closest = np.full(count, np.inf)
+    index = np.zeros(count, dtype=np.intp)
+    if not len(scene.radii):
+        return closest, index
+
+    chunk = max(1, _CHUNK_ELEMENTS // len(scene.radii))
+    for start in range(0, count, chunk):
+        stop = start + chunk
+        o = origins[start:stop]
+        d = directions[start:stop]
+
+        # oc = o - c, expanded so it's all (rays x spheres) matrix products.
+        a = _dot(d, d)[:, None]
+        b = _dot(o, d)[:, None] - d @ scene.centers.T
+        c = _dot(o, o)[:, None] - 2.0 * (o @ scene.centers.T) + scene.offsets[None, :]
+        discriminant = b * b - a * c
+
+        with np.errstate(invalid="ignore"):
+            root = np.sqrt(discriminant)
+        near = (-b - root) / a
+        far = (-b + root) / a
+        t = np.where(near >= _T_MIN, near, far)
+        t[~(t >= _T_MIN)] = np.inf  # also discards NaN roots of misses
+
+        best = np.argmin(t, axis=1)
+        closest[start:stop] = t[np.arange(len(best)), best]
+        index[start:stop] = best
+
+    return closest, index
+
+
+def _scatter(
+    scene, random, directions, points, normals, front_face, hit_index, diffuse_mode
+):
+    """Scatter all the hit rays according to their materials.
+
+    Returns:
+        tuple: `(new_directions, attenuation, alive)` arrays.
+
+    """
+    # Avoid a circular import, `render` owns the diffuse mode enum.
+    from .render import DIFFUSE_MODE
+
+    count = len(directions)
+    kinds = scene.kinds[hit_index]
+    new_directions = np.empty_like(directions)
+    attenuation = np.empty_like(directions)
+    alive = np.ones(count, dtype=bool)
+
+    grey = kinds == _GREY
+    if grey.any():
+        normal = normals[grey]
+        if diffuse_mode == DIFFUSE_MODE.SIMPLE:
+            direction = normal + warp.random_in_unit_sphere(random.subset(grey))
+        elif diffuse_mode == DIFFUSE_MODE.LAMBERTIAN:
+            direction = warp.random_cosine_directions(normal, random.subset(grey))
+        else:  # DIFFUSE_MODE.ALTERNATE
+            direction = warp.random_in_hemisphere(normal, random.subset(grey))
+        new_directions[grey] = direction
+        attenuation[grey] = 0.5
+
+    lambertian = kinds == _LAMBERTIAN
+    if lambertian.any():
+        normal = normals[lambertian]
+        new_directions[lambertian] = warp.random_cosine_directions(
+            normal, random.subset(lambertian)
+        )
+        attenuation[lambertian] = scene.albedo[hit_index[lambertian]]
+
+    metal = kinds == _METAL
+    if metal.any():
+        normal = normals[metal]
+        index = hit_index[metal]
+        reflected = _reflect(_unit(directions[metal]), normal)
+        direction = reflected + scene.fuzz[index][:, None] * warp.random_in_unit_sphere(
+            random.subset(metal)
+        )
+        new_directions[metal] = direction
+        attenuation[metal] = scene.albedo[index]
+        alive[metal] = _dot(direction, normal) > 0
+
+    dielectric = kinds == _DIELECTRIC
+    if dielectric.any():
+        normal = normals[dielectric]
+        ior = scene.ior[hit_index[dielectric]]
+        ratio = np.where(front_face[dielectric], 1.0 / ior, ior)
+
+        unit_direction = _unit(directions[dielectric])
+        cos_theta = np.minimum(-_dot(unit_direction, normal), 1.0)
+        sin_theta = np.sqrt(1.0 - cos_theta * cos_theta)
+
+        # Schlick's approximation for reflectance.
+        r0 = ((1 - ratio) / (1 + ratio)) ** 2
+        reflectance = r0 + (1 - r0) * (1 - cos_theta) ** 5
+        reflects = (ratio * sin_theta > 1.0) | (
+            reflectance > random.subset(dielectric).random()
+        )
+
+        r_out_perp = ratio[:, None] * (unit_direction + cos_theta[:, None] * normal)
+        r_out_parallel = (
+            -np.sqrt(np.abs(1.0 - _dot(r_out_perp, r_out_perp)))[:, None] * normal
+        )
+        direction = np.where(
+            reflects[:, None],
+            _reflect(unit_direction, normal),
+            r_out_perp + r_out_parallel,
+        )
+        new_directions[dielectric] = direction
+        attenuation[dielectric] = 1.0  # glass surface absorbs nothing
+
+    return new_directions, attenuation, alive
+
+
+def trace(
+    scene,
+    origins,
+    directions,
+    keys,
+    pixel_index,
+    pixel_count,
+    max_depth,
+    diffuse_mode,
+    roulette_depth=None,
+):
+    """Trace a wavefront of rays and accumulate their radiance per pixel.
+
+    Args:
+        scene (_SceneArrays): Flattened scene.
+        origins (ndarray): (N, 3) ray origins.
+        directions (ndarray): (N, 3) ray directions.
+        pixel_index (ndarray): (N,) pixel each ray contributes to.
+        pixel_count (int): Number of pixels in the output.
+        max_depth (int): Max bounce.
+        keys (ndarray): (N,) uint64 random stream keys, see :func:`sample_keys`.
+        diffuse_mode (DIFFUSE_MODE): Grey shaded diffuse implementation.
+        roulette_depth (int): Bounces after which paths play Russian roulette,
+            see :func:`render.ray_color`. `None` never terminates paths early.
+
+    Returns:
+        ndarray: (pixel_count, 3) summed radiance per pixel.
+
+    """
+    _require_numpy()
+    radiance = np.zeros((pixel_count, 3))
+    throughput = np.ones_like(directions)
+    stats = raystats.current
+    if stats is not None:
+        stats.primary_rays += len(origins)
+
+    for bounce in range(1, max_depth + 1):
+        if not len(origins):
+            break
+
+        t, hit_index = _intersect(scene, origins, directions)
+        missed = np.isinf(t)
+        if stats is not None:
+            if bounce > 1:
+                stats.secondary_rays += len(origins)
+            stats.intersection_tests += len(origins) * len(scene.radii)
+            stats.terminations[TERMINATION.ESCAPED] += int(missed.sum())
+
+        # Rays escaping to the sky gather the background gradient.
+        if missed.any():
+            unit_direction = _unit(directions[missed])
+            parameter = (0.5 * (unit_direction[:, 1] + 1.0))[:, None]
+            sky = (1 - parameter) + parameter * np.array([0.5, 0.7, 1.0])
+            color = throughput[missed] * sky
+            for channel in range(3):
+                radiance[:, channel] += np.bincount(
+                    pixel_index[missed],
+                    weights=color[:, channel],
+                    minlength=pixel_count,
+                )
+
+        # Compact the wavefront down to the rays that hit something.
+        hit = ~missed
+        origins = origins[hit]
+        directions = directions[hit]
+        throughput = throughput[hit]
+        pixel_index = pixel_index[hit]
+        keys = keys[hit]
+        t = t[hit]
+        hit_index = hit_index[hit]
+
+        points = origins + t[:, None] * directions
+        outward = (points - scene.centers[hit_index]) / scene.radii[hit_index][:, None]
+        front_face = _dot(directions, outward) < 0
+        normals = np.where(front_face[:, None], outward, -outward)
+
+        directions, attenuation, alive = _scatter(
+            scene,
+            _Random.for_bounce(keys, bounce),
+            directions,
+            points,
+            normals,
+            front_face,
+            hit_index,
+            diffuse_mode,
+        )
+        if stats is not None:
+            kinds = np.bincount(scene.kinds[hit_index], minlength=len(_KIND_NAMES))
+            for name, count in zip(_KIND_NAMES, kinds.tolist()):
+                if count:
+                    stats.scatters[name] += count
+            scattered = int(alive.sum())
+            stats.terminations[TERMINATION.ABSORBED] += len(alive) - scattered
+
+        throughput = throughput * attenuation
+        if roulette_depth is not None and bounce >= roulette_depth:
+            survival = np.minimum(throughput.max(axis=1), 1.0)
+            roulette = _Random.for_bounce(keys, rng.ROULETTE_BOUNCE + bounce)
+            alive &= roulette.random() < survival
+            throughput[alive] /= survival[alive, None]
+            if stats is not None:
+                stats.terminations[TERMINATION.ROULETTE] += scattered - int(alive.sum())
+
+        # Absorbed rays gather no more light.
+        origins = points[alive]
+        directions = directions[alive]
+        throughput = throughput[alive]
+        pixel_index = pixel_index[alive]
+        keys = keys[alive]
+
+    # Rays still alive after `max_depth` bounces gather no light.
+    if stats is not None:
+        stats.terminations[TERMINATION.MAX_DEPTH] += len(origins)
+    return radiance
+
+
+def camera_rays(camera, columns, rows, resx, resy, samples, seed, sample_start=0):
+    """Generate all the jittered camera rays for a block of pixels.
+
+    Args:
+        camera (Camera): Camera object.
+        columns (ndarray): Pixel column of each pixel in the block.
+        rows (ndarray): Pixel row of each pixel in the block.
+        resx (int): Image width in pixels.
+        resy (int): Image height in pixels.
+        samples (int): AA samples per pixel.
+        seed (int): Image seed of the random streams, see :mod:`pathtracer.rng`.
+        sample_start (int): Index of the first sample of each pixel, or an
+            array with the first sample of every pixel.
+
+    Returns:
+        tuple: `(origins, directions, keys, pixel_index)` arrays.
+
+    """
+    _require_numpy()
+    pixel_index = np.repeat(np.arange(len(columns)), samples)
+    sample_start = np.broadcast_to(sample_start, len(columns))
+    keys = sample_keys(
+        seed,
+        rows[pixel_index] * resx + columns[pixel_index],
+        np.repeat(sample_start, samples) + np.tile(np.arange(samples), len(columns)),
+    )
+    random = _Random.for_bounce(keys, rng.CAMERA_BOUNCE)
+
+    s = (columns[pixel_index] + random.random()) / (resx - 1)
+    t = (rows[pixel_index] + random.random()) / (resy - 1)
+
+    disk_x, disk_y = warp.concentric_disk(random)
+    disk_x *= camera.lens_radius
+    disk_y *= camera.lens_radius
+
+    u = np.array([camera.u.x, camera.u.y, camera.u.z])
+    v = np.array([camera.v.x, camera.v.y, camera.v.z])
+    origin = np.array([camera.origin.x, camera.origin.y, camera.origin.z])
+    lower_left_corner = np.array(
+        [
+            camera.lower_left_corner.x,
+            camera.lower_left_corner.y,
+            camera.lower_left_corner.z,
+        ]
+    )
+    horizontal = np.array(
+        [camera.horizontal.x, camera.horizontal.y, camera.horizontal.z]
+    )
+    vertical = np.array([camera.vertical.x, camera.vertical.y, camera.vertical.z])
+
+    offset = disk_x[:, None] * u + disk_y[:, None] * v
+    origins = origin + offset
+    directions = (
+        lower_left_corner
+        + s[:, None] * horizontal
+        + t[:, None] * vertical
+        - origin
+        - offset
+    )
+    return origins, directions, keys, pixel_index
+
+
+def render_tile(tile, kwargs, sample_start=0, samples=None):
+    """Render a tile of the image with the wavefront engine.
+
+    Args:
+        tile (_Tile): Block of pixels to render.
+        kwargs (dict): Same render settings as :func:`render._scanline`.
+        sample_start (int): First sample to render of each pixel.
+        samples (int): Number of samples to render of each pixel, defaults to
+            all the samples of the render settings.
+
+    Returns:
+        array: Packed linear RGB floats, averaged over the samples, of the tile
+            pixels from top to bottom.
+
+    """
+    _require_numpy()
+    from .render import DIFFUSE_MODE
+
+    resx = kwargs.get("resx", 0)
+    resy = kwargs.get("resy", 0)
+    if samples is None:
+        samples = kwargs.get("samples", 1)
+    camera = kwargs.get("camera")
+    world = kwargs.get("world")
+    max_depth = kwargs.get("max_depth")
+    diffuse_mode = kwargs.get("diffuse_mode", DIFFUSE_MODE.SIMPLE)
+    sample_seed = kwargs.get("sample_seed", 0)
+    roulette_depth = kwargs.get("roulette_depth")
+
+    scene = scene_arrays(world)
+
+    # Scanlines from top to bottom, each from left to right.
+    rows = np.arange(tile.y + tile.height - 1, tile.y - 1, -1)
+    columns = np.tile(np.arange(tile.x, tile.x + tile.width), len(rows))
+    scanlines = np.repeat(rows, tile.width)
+    origins, directions, keys, pixel_index = camera_rays(
+        camera, columns, scanlines, resx, resy, samples, sample_seed, sample_start
+    )
+    radiance = trace(
+        scene,
+        origins,
+        directions,
+        keys,
+        pixel_index,
+        len(columns),
+        max_depth,
+        diffuse_mode,
+        roulette_depth,
+    )
+
+    pixels = array("f")
+    pixels.frombytes((radiance / samples).astype(np.float32).tobytes())
+    return pixels
+
+
+def render_tile_adaptive(tile, kwargs, threshold=adaptive.NOISE_THRESHOLD):
+    """Adaptively sample a tile of the image with the wavefront engine.
+
+    Vectorized counterpart of :func:`adaptive.render_pixels`, each round traces
+    one more batch of samples of all the noisiest pixels at once.
+
+    Returns:
+        tuple: `(pixels, counts)`, the packed linear RGB floats averaged over
+            the samples of the tile pixels from top to bottom (see
+            :func:`render_tile`) and an `array("I")` of their sample counts.
+
+    """
+    _require_numpy()
+    from .render import DIFFUSE_MODE
+
+    resx = kwargs.get("resx", 0)
+    resy = kwargs.get("resy", 0)
+    samples = kwargs.get("samples", 1)
+    camera = kwargs.get("camera")
+    world = kwargs.get("world")
+    max_depth = kwargs.get("max_depth")
+    diffuse_mode = kwargs.get("diffuse_mode", DIFFUSE_MODE.SIMPLE)
+    sample_seed = kwargs.get("sample_seed", 0)
+    roulette_depth = kwargs.get("roulette_depth")
+
+    scene = scene_arrays(world)
+
+    rows = np.arange(tile.y + tile.height - 1, tile.y - 1, -1)
+    columns = np.tile(np.arange(tile.x, tile.x + tile.width), len(rows))
+    scanlines = np.repeat(rows, tile.width)
+    pixel_count = len(columns)
+
+    colors = np.zeros((pixel_count, 3))
+    counts = np.zeros(pixel_count, dtype=np.int64)
+    lum_sums = np.zeros(pixel_count)
+    lum_sqs = np.zeros(pixel_count)
+
+    def add_samples(selected, count):
+        origins, directions, keys, ray_pixel = camera_rays(
+            camera,
+            columns[selected],
+            scanlines[selected],
+            resx,
+            resy,
+            count,
+            sample_seed,
+            sample_start=counts[selected],
+        )
+        # One "pixel" per ray to get the radiance of every single sample.
+        ray_count = len(origins)
+        radiance = trace(
+            scene,
+            origins,
+            directions,
+            keys,
+            np.arange(ray_count),
+            ray_count,
+            max_depth,
+            diffuse_mode,
+            roulette_depth,
+        )
+        luminance = radiance @ np.array(adaptive.LUMINANCE)
+        pixel_index = selected[ray_pixel]
+        for channel in range(3):
+            colors[:, channel] += np.bincount(
+                pixel_index, weights=radiance[:, channel], minlength=pixel_count
+            )
+        lum_sums[:] += np.bincount(pixel_index, luminance, minlength=pixel_count)
+        lum_sqs[:] += np.bincount(
+            pixel_index, luminance * luminance, minlength=pixel_count
+        )
+        counts[selected] += count
+
+    pilot = adaptive.min_samples(samples)
+    batch = adaptive.batch_samples(samples)
+    budget = samples * pixel_count
+    max_samples = adaptive.MAX_SAMPLES_FACTOR * samples
+
+    add_samples(np.arange(pixel_count), pilot)
+    spent = pilot * pixel_count
+
+    while spent + batch <= budget:
+        error = adaptive.noise(counts, lum_sums, lum_sqs)
+        noisy = np.flatnonzero((error > threshold) & (counts + batch <= max_samples))
+        if not len(noisy):
+            break
+        # Noisiest pixels first, as many as the budget left allows.
+        noisy = noisy[np.argsort(-error[noisy], kind="stable")]
+        noisy = noisy[: (budget - spent) // batch]
+        add_samples(noisy, batch)
+        spent += batch * len(noisy)
+
+    pixels = array("f")
+    pixels.frombytes((colors / counts[:, None]).astype(np.float32).tobytes())
+    return pixels, array("I", counts.tolist())
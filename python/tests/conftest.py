@@ -0,0 +1,18 @@
+import random
+
+import pytest
+
+from pathtracer.ray import Ray
+from pathtracer.vec3 import Point3
+
+
+@pytest.fixture
+def rays():
+    """Rays from all around the random scene (see `scene`) through it."""
+    rng = random.Random(5)
+    result = []
+    for _ in range(300):
+        origin = Point3(rng.uniform(-12, 12), rng.uniform(0.2, 6), rng.uniform(-12, 12))
+        target = Point3(rng.uniform(-4, 4), rng.uniform(-0.5, 1.5), rng.uniform(-4, 4))
+        result.append(Ray(origin, target - origin))
+    return result
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from pathtracer import adaptive
+
+
+def _noisy_pixel(pixel, sample):
+    """Very noisy colors on odd pixels, a flat grey on even ones."""
+    if pixel % 2 == 0:
+        return 0.5, 0.5, 0.5
+    value = random.Random(pixel * 1000 + sample).random() ** 4
+    return value, value, value
+
+
+@pytest.mark.parametrize("samples", range(1, 17))
+def test_render_pixels_keeps_to_the_budget(samples):
+    pixel_count = 64
+    _, counts = adaptive.render_pixels(pixel_count, samples, _noisy_pixel)
+    assert sum(counts) <= samples * pixel_count
+    assert min(counts) >= 1
+
+
+@pytest.mark.parametrize("samples", range(3, 17))
+def test_render_pixels_adapts_small_budgets(samples):
+    _, counts = adaptive.render_pixels(64, samples, _noisy_pixel)
+    # The flat pixels stop at the pilot samples, the noisy ones get the rest.
+    assert set(counts[0::2]) == {adaptive.min_samples(samples)}
+    assert sum(counts[1::2]) > sum(counts[0::2])
+
+
+@pytest.mark.parametrize("samples", range(1, 65))
+def test_min_samples_below_budget(samples):
+    pilot = adaptive.min_samples(samples)
+    assert 1 <= pilot <= samples
+    if samples >= 3:
+        assert 2 <= pilot < samples
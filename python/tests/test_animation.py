@@ -0,0 +1,14 @@
+import pytest
+
+from pathtracer import animation
+
+
+def test_parse_frames():
+    assert animation.parse_frames("3") == range(0, 3)
+    assert animation.parse_frames("2:5") == range(2, 5)
+
+
+@pytest.mark.parametrize("text", ["0", "5:5", "5:2", "-2:3", "-1"])
+def test_parse_frames_rejects_empty_and_negative_ranges(text):
+    with pytest.raises(ValueError):
+        animation.parse_frames(text)
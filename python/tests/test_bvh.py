@@ -0,0 +1,21 @@
+import math
+
+from pathtracer.hittable import BVH
+from pathtracer.scene import construct_scene
+
+
+def _hit(world, ray):
+    """What matters of the closest hit of a ray, None if it misses."""
+    hit, record = world.hit(ray, 0.0001, math.inf)
+    if not hit:
+        return None
+    return record.t, tuple(record.point), tuple(record.normal), record.material
+
+
+def test_bvh_hits_like_the_linear_list(rays):
+    world = construct_scene(randomize=True, seed=3, extent=3)
+    bvh = BVH(world.hittable_list)
+    hits = [_hit(world, ray) for ray in rays]
+    assert [_hit(bvh, ray) for ray in rays] == hits
+    assert sum(hit is not None for hit in hits) > len(rays) // 2
+
@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+from pathtracer import scenefile
+from pathtracer.hittable import BVH, Box, Disk, HittableList, PackedSpheres, Sphere
+from pathtracer.hittable.packed import flatten_bvh
+from pathtracer.scene import GROUND, construct_scene
+from pathtracer.vec3 import Point3, Vec3
+
+
+def _material(material_):
+    """Material by value, packed worlds share a copy of identical ones."""
+    if material_ is None:
+        return None
+    values = {
+        name: tuple(value) if isinstance(value, Vec3) else value
+        for name, value in vars(material_).items()
+    }
+    return type(material_).__name__, values
+
+
+def _hit(world, ray):
+    """What matters of the closest hit of a ray, None if it misses."""
+    hit, record = world.hit(ray, 0.0001, math.inf)
+    if not hit:
+        return None
+    return (
+        record.t,
+        tuple(record.point),
+        tuple(record.normal),
+        _material(record.material),
+    )
+
+
+def test_list_keeps_the_closest_of_its_objects(rays):
+    objects = construct_scene(randomize=True, seed=3, extent=3).hittable_list + [
+        Disk(Point3(0, 2, 0), Vec3(0, 1, 1), 1.5),
+        Box(Point3(-2, 0, 3), Point3(-1, 3, 4)),
+    ]
+    world = HittableList(objects)
+    for ray in rays:
+        hits = [hit for hit in (_hit(item, ray) for item in objects) if hit]
+        assert _hit(world, ray) == min(hits, key=lambda hit: hit[0], default=None)
+
+
+@pytest.mark.parametrize("ground", list(GROUND))
+def test_packed_hits_like_the_objects(rays, ground):
+    world = construct_scene(randomize=True, seed=3, extent=3, ground=ground)
+    packed = scenefile.pack(world)
+    hits = [_hit(world, ray) for ray in rays]
+    assert [_hit(packed, ray) for ray in rays] == hits
+
+
+def test_packed_bvh_hits_like_the_objects(rays):
+    world = construct_scene(randomize=True, seed=3, extent=3)
+    bvh = BVH(world.hittable_list)
+    packed = scenefile.pack(bvh)
+    index_of = {id(item): index for index, item in enumerate(bvh.objects)}
+    boxes, nodes = flatten_bvh(bvh, index_of)
+    packed_bvh = PackedSpheres(
+        packed.spheres,
+        packed.material_ids,
+        packed.materials,
+        bvh_boxes=boxes,
+        bvh_nodes=nodes,
+    )
+    assert all(isinstance(item, Sphere) for item in bvh.objects)
+    hits = [_hit(world, ray) for ray in rays]
+    assert [_hit(packed_bvh, ray) for ray in rays] == hits
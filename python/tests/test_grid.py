@@ -0,0 +1,23 @@
+import math
+
+import pytest
+
+from pathtracer.hittable import UniformGrid
+from pathtracer.scene import GROUND, construct_scene
+
+
+def _hit(world, ray):
+    """What matters of the closest hit of a ray, None if it misses."""
+    hit, record = world.hit(ray, 0.0001, math.inf)
+    if not hit:
+        return None
+    return record.t, tuple(record.point), tuple(record.normal), record.material
+
+
+@pytest.mark.parametrize("ground", list(GROUND))
+def test_grid_hits_like_the_linear_list(rays, ground):
+    world = construct_scene(randomize=True, seed=3, extent=3, ground=ground)
+    grid = UniformGrid(world.hittable_list)
+    hits = [_hit(world, ray) for ray in rays]
+    assert [_hit(grid, ray) for ray in rays] == hits
+    assert sum(hit is not None for hit in hits) > len(rays) // 2
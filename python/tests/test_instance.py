@@ -0,0 +1,76 @@
+from array import array
+import math
+import random
+
+import pytest
+
+from pathtracer import material
+from pathtracer.hittable import Instance, Sphere, Transform, TriangleMesh
+from pathtracer.ray import Ray
+from pathtracer.vec3 import Color, Point3, Vec3
+
+# Tetrahedron, counterclockwise seen from outside.
+_VERTICES = (1, 1, 1, 1, -1, -1, -1, 1, -1, -1, -1, 1)
+_INDICES = (0, 1, 2, 0, 3, 1, 0, 2, 3, 1, 3, 2)
+
+
+def _rays(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        origin = Point3(*(rng.uniform(-6, 6) for _ in range(3)))
+        target = Point3(rng.uniform(0, 4), rng.uniform(-1, 3), rng.uniform(-2, 2))
+        yield Ray(origin, target - origin)
+
+
+def _assert_same_hits(world, reference, rays):
+    hits = 0
+    for ray in rays:
+        hit, record = world.hit(ray, 0.0001, math.inf)
+        reference_hit, reference_record = reference.hit(ray, 0.0001, math.inf)
+        assert hit == reference_hit
+        if hit:
+            hits += 1
+            assert record.t == pytest.approx(reference_record.t)
+            assert tuple(record.point) == pytest.approx(tuple(reference_record.point))
+            assert tuple(record.normal) == pytest.approx(tuple(reference_record.normal))
+            assert record.front_face == reference_record.front_face
+            assert record.material is reference_record.material
+    assert hits > 20
+
+
+def test_transform_inverse():
+    transform = (
+        Transform.translation(1, 2, 3)
+        @ Transform.rotation(Vec3(1, 1, 0), 40)
+        @ Transform.scaling(2, 0.5, 1)
+    )
+    point = Point3(0.3, -1.2, 4.0)
+    assert tuple(transform.inverse().point(transform.point(point))) == pytest.approx(
+        tuple(point)
+    )
+
+
+def test_sphere_instance_hits_like_the_moved_sphere():
+    metal = material.Metal(Color(0.8, 0.8, 0.8), 0.0)
+    prototype = Sphere(Point3(0, 0, 0), 1.0, material=metal)
+    instance = Instance(
+        prototype, Transform.translation(2, 1, 0) @ Transform.scaling(1.5)
+    )
+    moved = Sphere(Point3(2, 1, 0), 1.5, material=metal)
+    _assert_same_hits(instance, moved, _rays(200, 1))
+
+
+def test_mesh_instance_hits_like_the_transformed_mesh():
+    transform = (
+        Transform.translation(2, 1, 0)
+        @ Transform.rotation(Vec3(0, 1, 1), 30)
+        @ Transform.scaling(1.5, 1.0, 0.8)
+    )
+    prototype = TriangleMesh(array("d", _VERTICES), array("i", _INDICES))
+    lambertian = material.Lambertian(Color(0.5, 0.5, 0.5))
+    instance = Instance(prototype, transform, material=lambertian)
+    vertices = array("d")
+    for start in range(0, len(_VERTICES), 3):
+        vertices.extend(transform.point(Point3(*_VERTICES[start : start + 3])))
+    transformed = TriangleMesh(vertices, array("i", _INDICES), material=lambertian)
+    _assert_same_hits(instance, transformed, _rays(300, 2))
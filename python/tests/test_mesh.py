@@ -0,0 +1,74 @@
+from array import array
+import math
+import random
+
+import pytest
+
+from pathtracer.hittable import Box, TriangleMesh
+from pathtracer.ray import Ray
+from pathtracer.vec3 import Point3, Vec3
+
+
+def _cube(low, high):
+    """Mesh of an axis-aligned cube, counterclockwise seen from outside."""
+    corners = [(x, y, z) for x in (low, high) for y in (low, high) for z in (low, high)]
+    vertices = array("d", [value for corner in corners for value in corner])
+    indices = array("i")
+    center = Vec3(*([(low + high) / 2] * 3))
+    for axis in range(3):
+        for side in (low, high):
+            quad = [i for i, corner in enumerate(corners) if corner[axis] == side]
+            a, b, d, c = quad  # corners in binary order, c opposite to a
+            for triangle in ((a, b, c), (a, c, d)):
+                p, q, r = (Vec3(*corners[index]) for index in triangle)
+                if (q - p).cross(r - p).dot(p - center) < 0:
+                    triangle = triangle[::-1]
+                indices.extend(triangle)
+    return TriangleMesh(vertices, indices)
+
+
+def test_triangle_hit_and_facing():
+    mesh = TriangleMesh(array("d", [0, 0, 0, 1, 0, 0, 0, 1, 0]), array("i", [0, 1, 2]))
+    hit, record = mesh.hit(Ray(Point3(0.25, 0.25, 2), Vec3(0, 0, -1)), 0.0001, math.inf)
+    assert hit
+    assert record.t == 2.0
+    assert tuple(record.point) == (0.25, 0.25, 0.0)
+    assert tuple(record.normal) == (0.0, 0.0, 1.0)
+    assert record.front_face
+    hit, record = mesh.hit(Ray(Point3(0.25, 0.25, -1), Vec3(0, 0, 1)), 0.0001, math.inf)
+    assert hit and not record.front_face
+    # Outside of the barycentric range, and parallel to the triangle.
+    assert mesh.closest_hit(Ray(Point3(0.6, 0.6, 1), Vec3(0, 0, -1)), 0, 9) is None
+    assert mesh.closest_hit(Ray(Point3(-1, 0.2, 0), Vec3(1, 0, 0)), 0, 9) is None
+
+
+def test_cube_mesh_hits_like_a_box():
+    mesh = _cube(-1.0, 1.0)
+    box = Box(Point3(-1, -1, -1), Point3(1, 1, 1))
+    assert len(mesh) == 12
+    rng = random.Random(2)
+    hits = 0
+    for _ in range(300):
+        origin = Point3(*(rng.uniform(-4, 4) for _ in range(3)))
+        direction = Point3(*(rng.uniform(-1.5, 1.5) for _ in range(3))) - origin
+        ray = Ray(origin, direction)
+        mesh_hit, mesh_record = mesh.hit(ray, 0.0001, math.inf)
+        box_hit, box_record = box.hit(ray, 0.0001, math.inf)
+        assert mesh_hit == box_hit
+        if mesh_hit:
+            hits += 1
+            assert mesh_record.t == pytest.approx(box_record.t)
+            assert tuple(mesh_record.normal) == pytest.approx(tuple(box_record.normal))
+            assert mesh_record.front_face == box_record.front_face
+    assert hits > 100
+
+
+def test_occluded_agrees_with_closest_hit():
+    mesh = _cube(-1.0, 1.0)
+    rng = random.Random(3)
+    for _ in range(300):
+        origin = Point3(*(rng.uniform(-4, 4) for _ in range(3)))
+        ray = Ray(origin, Vec3(*(rng.uniform(-1, 1) for _ in range(3))))
+        t_max = rng.uniform(0.5, 8.0)
+        closest = mesh.closest_hit(ray, 0.0001, t_max)
+        assert mesh.occluded(ray, 0.0001, t_max) == (closest is not None)
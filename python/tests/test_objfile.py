@@ -0,0 +1,25 @@
+import pytest
+
+from pathtracer import objfile
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "mesh.obj"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_read_faces(tmp_path):
+    path = _write(
+        tmp_path,
+        "v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1/1 2/2 3/3 4/4\nf -4 -3 -2\n",
+    )
+    vertices, indices = objfile.read(path)
+    assert len(vertices) == 12
+    assert list(indices) == [0, 1, 2, 0, 2, 3, 0, 1, 2]
+
+
+def test_read_rejects_index_zero(tmp_path):
+    path = _write(tmp_path, "v 0 0 0\nv 1 0 0\nv 1 1 0\nf 1 0/1 3\n")
+    with pytest.raises(ValueError, match=r"mesh\.obj:4: .*'0/1'"):
+        objfile.read(path)
@@ -0,0 +1,86 @@
+import math
+
+import pytest
+
+from pathtracer.hittable import Box, Disk, Plane
+from pathtracer.ray import Ray
+from pathtracer.vec3 import Point3, Vec3
+
+
+def _hit(world, ray, t_max=math.inf):
+    """`(t, point, normal, front_face)` of the closest hit, None if it misses."""
+    hit, record = world.hit(ray, 0.0001, t_max)
+    if not hit:
+        return None
+    return (
+        record.t,
+        tuple(record.point),
+        tuple(record.normal),
+        record.front_face,
+    )
+
+
+def test_plane_hits_both_sides():
+    plane = Plane(Point3(0, -1, 0), Vec3(0, 2, 0))
+    assert _hit(plane, Ray(Point3(1, 3, 2), Vec3(0, -2, 0))) == (
+        2.0,
+        (1.0, -1.0, 2.0),
+        (0.0, 1.0, 0.0),
+        True,
+    )
+    assert _hit(plane, Ray(Point3(1, -3, 2), Vec3(0, 1, 0))) == (
+        2.0,
+        (1.0, -1.0, 2.0),
+        (-0.0, -1.0, -0.0),
+        False,
+    )
+
+
+def test_plane_misses_parallel_and_behind_rays():
+    plane = Plane(Point3(0, -1, 0), Vec3(0, 1, 0))
+    assert _hit(plane, Ray(Point3(0, 0, 0), Vec3(1, 0, 0))) is None
+    assert _hit(plane, Ray(Point3(0, 0, 0), Vec3(0, 1, 0))) is None
+    assert _hit(plane, Ray(Point3(0, 0, 0), Vec3(0, -1, 0)), t_max=0.5) is None
+
+
+def test_disk_hits_inside_its_radius_only():
+    disk = Disk(Point3(0, 0, -2), Vec3(0, 0, 1), 0.5)
+    assert _hit(disk, Ray(Point3(0.3, 0.3, 0), Vec3(0, 0, -1))) == (
+        2.0,
+        (0.3, 0.3, -2.0),
+        (0.0, 0.0, 1.0),
+        True,
+    )
+    assert _hit(disk, Ray(Point3(0.4, 0.4, 0), Vec3(0, 0, -1))) is None
+    assert _hit(disk, Ray(Point3(0, 0, -4), Vec3(0, 0, 1)))[2:] == (
+        (-0.0, -0.0, -1.0),
+        False,
+    )
+
+
+@pytest.mark.parametrize(
+    "origin, direction, t, normal",
+    [
+        ((-3, 0.5, 0.5), (1, 0, 0), 2.0, (-1, 0, 0)),
+        ((3, 0.5, 0.5), (-1, 0, 0), 2.0, (1, 0, 0)),
+        ((0.5, 4, 0.5), (0, -1, 0), 2.0, (0, 1, 0)),
+        ((0.5, -2, 0.5), (0, 1, 0), 1.0, (0, -1, 0)),
+        ((0.5, 0.5, 5), (0, 0, -2), 1.0, (0, 0, 1)),
+        ((0.5, 0.5, -3), (0, 0, 1), 2.0, (0, 0, -1)),
+    ],
+)
+def test_box_faces(origin, direction, t, normal):
+    box = Box(Point3(-1, -1, -1), Point3(1, 2, 3))
+    hit = _hit(box, Ray(Point3(*origin), Vec3(*direction)))
+    assert hit[0] == t
+    assert hit[2] == normal
+    assert hit[3] is True
+
+
+def test_box_from_inside_and_misses():
+    box = Box(Point3(-1, -1, -1), Point3(1, 1, 1))
+    t, point, normal, front_face = _hit(box, Ray(Point3(0, 0, 0), Vec3(0, 0, 1)))
+    assert (t, point, front_face) == (1.0, (0.0, 0.0, 1.0), False)
+    assert normal == (-0.0, -0.0, -1.0)
+    assert _hit(box, Ray(Point3(0, 3, 0), Vec3(1, 0, 0))) is None
+    assert _hit(box, Ray(Point3(-3, 0, 0), Vec3(1, 1, 0))) is None
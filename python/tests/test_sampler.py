@@ -0,0 +1,34 @@
+import pytest
+
+from pathtracer.sampler import SAMPLER, rng_factory
+
+_SAMPLES = 16
+_DRAWS = 10
+
+
+def _draws(make_rng, pixel, sample, bounce):
+    rng = make_rng(7, pixel, sample)
+    rng.set_bounce(bounce)
+    return [rng.random() for _ in range(_DRAWS)]
+
+
+@pytest.mark.parametrize("sampler", list(SAMPLER))
+def test_samples_are_deterministic_and_in_unit_interval(sampler):
+    make_rng = rng_factory(sampler, _SAMPLES)
+    for pixel in (0, 1, 12345):
+        for sample in range(_SAMPLES):
+            for bounce in (0, 1, 5):
+                values = _draws(make_rng, pixel, sample, bounce)
+                assert values == _draws(make_rng, pixel, sample, bounce)
+                assert all(0.0 <= value < 1.0 for value in values)
+
+
+@pytest.mark.parametrize("sampler", [SAMPLER.STRATIFIED, SAMPLER.SOBOL])
+def test_samples_of_a_pixel_fill_every_stratum(sampler):
+    # Both place one of `_SAMPLES` samples per stratum in every dimension.
+    make_rng = rng_factory(sampler, _SAMPLES)
+    for bounce in (0, 3):
+        draws = [_draws(make_rng, 42, sample, bounce) for sample in range(_SAMPLES)]
+        for dimension in range(_DRAWS):
+            strata = {int(values[dimension] * _SAMPLES) for values in draws}
+            assert strata == set(range(_SAMPLES))